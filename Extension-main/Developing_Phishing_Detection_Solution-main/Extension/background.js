@@ -2,6 +2,9 @@ const API_CONFIG = {
   API_URL: "http://localhost:8000",
   ENDPOINTS: {
     CHECK_URL: "/api/check-url",
+    BLACKLIST_SNAPSHOT: "/api/blacklist/snapshot",
+    BLACKLIST_DELTA: "/api/blacklist/delta",
+    WHITELIST_SNAPSHOT: "/api/whitelist/snapshot",
     HEALTH: "/"
   }
 };
@@ -9,6 +12,32 @@ const API_CONFIG = {
 const urlCache = new Map();
 const CACHE_TTL = 5 * 60 * 1000;
 
+// Local copies of the backend lists (sorted 64-bit host hashes, see
+// backend/list_snapshot.py). A blacklisted host is answered without a
+// request unless the whitelist covers it, since the server checks the
+// whitelist first; everything else still goes to /api/check-url.
+const BLACKLIST_DELTA_INTERVAL = 10 * 60 * 1000;
+const BLACKLIST_SNAPSHOT_INTERVAL = 24 * 60 * 60 * 1000;
+const SNAPSHOT_HEADER_SIZE = 24;
+
+const localBlacklist = {
+  view: null,
+  count: 0,
+  version: 0,
+  added: new Set(),
+  snapshotAt: 0,
+  syncedAt: 0,
+  syncing: null
+};
+
+// Revalidated with every blacklist sync; no deltas
+const localWhitelist = {
+  view: null,
+  count: 0,
+  version: 0,
+  added: new Set()
+};
+
 const BADGE_COLORS = {
   safe: '#10b981',
   suspicious: '#f59e0b',
@@ -64,6 +93,137 @@ chrome.webNavigation.onCompleted.addListener(async (details) => {
   }
 });
 
+async function loadSnapshot(list, endpoint) {
+  // no-cache revalidates with the stored ETag, so an unchanged list is a 304
+  const response = await fetch(`${API_CONFIG.API_URL}${endpoint}`, { cache: 'no-cache' });
+  if (!response.ok) {
+    throw new Error(`snapshot HTTP ${response.status}`);
+  }
+  const view = new DataView(await response.arrayBuffer());
+  const magic = String.fromCharCode(view.getUint8(0), view.getUint8(1), view.getUint8(2), view.getUint8(3));
+  if (magic !== 'PSHL' || view.getUint8(4) !== 1) {
+    throw new Error('unknown snapshot format');
+  }
+
+  list.view = view;
+  list.version = Number(view.getBigUint64(8));
+  list.count = view.getUint32(16);
+  list.added.clear();
+}
+
+async function loadBlacklistSnapshot() {
+  await loadSnapshot(localBlacklist, API_CONFIG.ENDPOINTS.BLACKLIST_SNAPSHOT);
+  localBlacklist.snapshotAt = Date.now();
+}
+
+async function syncBlacklistDelta() {
+  const response = await fetch(
+    `${API_CONFIG.API_URL}${API_CONFIG.ENDPOINTS.BLACKLIST_DELTA}?since=${localBlacklist.version}`
+  );
+  const data = await response.json();
+  if (data.error) {
+    throw new Error(data.error);
+  }
+  if (data.full) {
+    await loadBlacklistSnapshot();
+    return;
+  }
+  for (const hash of data.hashes) {
+    localBlacklist.added.add(BigInt(`0x${hash}`));
+  }
+  localBlacklist.version = data.version;
+}
+
+function syncLocalBlacklist() {
+  if (localBlacklist.syncing) {
+    return localBlacklist.syncing;
+  }
+  const now = Date.now();
+  let task = null;
+  if (!localBlacklist.view || now - localBlacklist.snapshotAt > BLACKLIST_SNAPSHOT_INTERVAL) {
+    task = loadBlacklistSnapshot;
+  } else if (now - localBlacklist.syncedAt > BLACKLIST_DELTA_INTERVAL) {
+    task = syncBlacklistDelta;
+  }
+  if (!task) {
+    return Promise.resolve();
+  }
+
+  localBlacklist.syncedAt = now;
+  const whitelist = loadSnapshot(localWhitelist, API_CONFIG.ENDPOINTS.WHITELIST_SNAPSHOT);
+  localBlacklist.syncing = Promise.all([task(), whitelist])
+    .catch(error => console.log('Blacklist sync failed:', error.message))
+    .finally(() => { localBlacklist.syncing = null; });
+  return localBlacklist.syncing;
+}
+
+// host itself followed by its parent domains, stopping before the TLD. This
+// covers every parent the server's whitelist can match (it stops at the
+// registrable domain), so a host is deferred whenever the server might
+// whitelist it
+function parentHosts(host) {
+  const labels = host.split('.');
+  const hosts = [];
+  for (let i = 0; i < Math.max(labels.length - 1, 1); i++) {
+    hosts.push(labels.slice(i).join('.'));
+  }
+  return hosts;
+}
+
+async function hostHash(host) {
+  const digest = await crypto.subtle.digest('SHA-256', new TextEncoder().encode(host));
+  return new DataView(digest).getBigUint64(0);
+}
+
+function hasHostHash(list, hash) {
+  if (list.added.has(hash)) {
+    return true;
+  }
+  const view = list.view;
+  let lo = 0;
+  let hi = list.count;
+  while (lo < hi) {
+    const mid = (lo + hi) >>> 1;
+    const value = view.getBigUint64(SNAPSHOT_HEADER_SIZE + mid * 8);
+    if (value === hash) {
+      return true;
+    }
+    if (value < hash) {
+      lo = mid + 1;
+    } else {
+      hi = mid;
+    }
+  }
+  return false;
+}
+
+async function checkLocalBlacklist(url) {
+  if (!localBlacklist.view || !localWhitelist.view) {
+    return null;
+  }
+  let host;
+  try {
+    host = new URL(url).hostname.toLowerCase();
+  } catch (error) {
+    return null;
+  }
+  // Only the host itself: which parent domains the server matches depends
+  // on the public suffix list, so parent-domain hits are left to the server
+  if (!hasHostHash(localBlacklist, await hostHash(host))) {
+    return null;
+  }
+  for (const candidate of parentHosts(host)) {
+    if (hasHostHash(localWhitelist, await hostHash(candidate))) {
+      return null;
+    }
+  }
+  return { risk: 'malicious', score: 1.0, reasons: ['blacklist'], source: 'local' };
+}
+
+function checkUrlEndpoint(url) {
+  return `${API_CONFIG.API_URL}${API_CONFIG.ENDPOINTS.CHECK_URL}?url=${encodeURIComponent(url)}`;
+}
+
 async function scanUrl(url, tabId) {
   chrome.action.setBadgeText({ text: '...', tabId: tabId });
   chrome.action.setBadgeBackgroundColor({ color: BADGE_COLORS.loading, tabId: tabId });
@@ -84,17 +244,20 @@ async function scanUrl(url, tabId) {
     return cached.result;
   }
 
+  syncLocalBlacklist();
+
   try {
-    const response = await fetch(`${API_CONFIG.API_URL}${API_CONFIG.ENDPOINTS.CHECK_URL}`, {
-      method: 'POST',
-      headers: { 'Content-Type': 'application/json' },
-      body: JSON.stringify({ url: url })
-    });
+    let result = await checkLocalBlacklist(url);
 
-    const result = await response.json();
+    if (!result) {
+      // GET so the browser cache (and any proxy) can reuse verdicts via ETag
+      const response = await fetch(checkUrlEndpoint(url));
 
-    if (result.error) {
-      throw new Error(result.error);
+      result = await response.json();
+
+      if (result.error) {
+        throw new Error(result.error);
+      }
     }
 
     urlCache.set(cacheKey, {
@@ -197,11 +360,7 @@ chrome.runtime.onMessage.addListener((request, sender, sendResponse) => {
   }
   
   else if (request.action === 'checkUrl') {
-    fetch(`${API_CONFIG.API_URL}${API_CONFIG.ENDPOINTS.CHECK_URL}`, {
-      method: 'POST',
-      headers: { 'Content-Type': 'application/json' },
-      body: JSON.stringify({ url: request.url })
-    })
+    fetch(checkUrlEndpoint(request.url))
     .then(response => response.json())
     .then(data => sendResponse(data))
     .catch(error => sendResponse({ error: error.message }));
@@ -228,6 +387,7 @@ chrome.runtime.onMessage.addListener((request, sender, sendResponse) => {
 
 chrome.runtime.onStartup.addListener(() => {
   console.log('PhishShield service worker started');
+  syncLocalBlacklist();
   
   fetch(`${API_CONFIG.API_URL}${API_CONFIG.ENDPOINTS.HEALTH}`)
     .then(response => {
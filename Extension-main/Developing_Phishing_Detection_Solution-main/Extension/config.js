@@ -2,6 +2,8 @@ const PHISHSHIELD_CONFIG = {
   API_URL: "http://localhost:8000",
   ENDPOINTS: {
     CHECK_URL: "/api/check-url",
+    CHECK_URLS: "/api/check-urls",
+    CHECK_URLS_STREAM: "/api/check-urls/stream",
     REPORT_URL: "/api/report-url",
     WHITELIST: "/api/whitelist",
     BLACKLIST: "/api/blacklist",
@@ -31,6 +33,9 @@ const PHISHSHIELD_CONFIG = {
     SCAN_LINKS: true,
     SHOW_NOTIFICATIONS: true
   },
+  LINK_SCAN: {
+    MAX_LINKS: 500
+  },
   CACHE: {
     TTL: 5 * 60 * 1000,
     MAX_SIZE: 1000
@@ -392,25 +392,41 @@ getScoreColor(score) {
       document.getElementById('linksCount').textContent = `${links.length} links`;
 
       const stats = { total: links.length, safe: 0, suspicious: 0, malicious: 0 };
-      const results = [];
-
-      for (const link of links.slice(0, 50)) {
-        try {
-          const checkResponse = await fetch(`${this.config.API_URL}${this.config.ENDPOINTS.CHECK_URL}`, {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ url: link })
-          });
 
-          const data = await checkResponse.json();
-          results.push({ url: link, ...data });
+      const batch = links.slice(0, this.config.LINK_SCAN.MAX_LINKS);
+      const checkResponse = await fetch(`${this.config.API_URL}${this.config.ENDPOINTS.CHECK_URLS_STREAM}`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ urls: batch })
+      });
+
+      if (!checkResponse.ok) {
+        const errorData = await checkResponse.json().catch(() => ({}));
+        throw new Error(errorData.error || `HTTP ${checkResponse.status}`);
+      }
+
+      // Verdicts arrive as NDJSON: list/cache hits first, model-scored links in
+      // chunks after. Each chunk updates the popup and the page straight away.
+      let checked = 0;
+      await this.readNdjson(checkResponse, (rows) => {
+        const scanned = [];
+
+        for (const data of rows) {
+          if (!data.url) {
+            throw new Error(data.error || 'Invalid scan response');
+          }
+          const link = data.url;
+          if (data.error) {
+            console.error('Error scanning link:', link, data.error);
+            continue;
+          }
+          scanned.push(data);
+          checked++;
 
           if (data.risk === 'safe') stats.safe++;
           else if (data.risk === 'suspicious') stats.suspicious++;
           else if (data.risk === 'malicious') stats.malicious++;
 
-          this.updateLinksStats(stats);
-
           if (data.risk === 'malicious' || data.risk === 'suspicious') {
             badLinksArea.style.display = 'block';
 
@@ -424,24 +440,28 @@ getScoreColor(score) {
 
             badLinksList.appendChild(div);
           }
+        }
+
+        this.updateLinksStats(stats);
 
-        } catch (error) {
-          console.error('Error scanning link:', link, error);
+        if (scanned.length) {
+          chrome.tabs.sendMessage(this.currentTabId, {
+            action: 'highlightLinks',
+            results: scanned
+          }).catch(() => console.log("Không thể highlight links (có thể tab đã đóng)"));
         }
-      }
+      });
 
       const pageLinksStats = (await chrome.storage.local.get(['pageLinksStats'])).pageLinksStats || {};
       pageLinksStats[this.currentUrl] = stats;
       await chrome.storage.local.set({ pageLinksStats });
 
-      try {
-        chrome.tabs.sendMessage(this.currentTabId, {
-          action: 'highlightLinks',
-          results: results
-        });
-      } catch (e) { console.log("Không thể highlight links (có thể tab đã đóng)"); }
-
-      this.showToast(`Scanned ${links.length} links!`, 'success');
+      // Links past MAX_LINKS or that failed to scan are not counted as scanned
+      if (checked < links.length) {
+        this.showToast(`Scanned ${checked} of ${links.length} links`, 'success');
+      } else {
+        this.showToast(`Scanned ${links.length} links!`, 'success');
+      }
     } catch (error) {
       console.error('Error scanning page links:', error);
       if (error.message.includes("No links found")) {
@@ -455,6 +475,26 @@ getScoreColor(score) {
     }
   }
 
+  async readNdjson(response, onRows) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffered = '';
+
+    while (true) {
+      const { done, value } = await reader.read();
+      buffered += decoder.decode(value || new Uint8Array(), { stream: !done });
+      const lines = buffered.split('\n');
+      buffered = done ? '' : lines.pop();
+      const rows = lines.filter(line => line.trim()).map(line => JSON.parse(line));
+      if (rows.length) {
+        onRows(rows);
+      }
+      if (done) {
+        return;
+      }
+    }
+  }
+
   showToast(message, type) {
     const toast = document.getElementById('toast');
     toast.textContent = message;
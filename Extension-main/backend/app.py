@@ -1,24 +1,59 @@
-from fastapi import FastAPI
+import time
+
+# Taken before the framework imports so startup timing covers them
+_IMPORT_STARTED = time.perf_counter()
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from fastapi.routing import APIRoute
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from typing import List, Dict
-import joblib
+from typing import AsyncIterator, Dict, Iterator, List, NamedTuple, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+import asyncio
+import hashlib
+import hmac
 import json
 import os
-import re
+import threading
+import warnings
+from datetime import datetime
 from urllib.parse import urlparse
-import pandas as pd
+from bson import ObjectId
 from pymongo import MongoClient
-from pymongo.errors import PyMongoError
+from pymongo.errors import (
+    AutoReconnect,
+    ConnectionFailure,
+    ExecutionTimeout,
+    NetworkTimeout,
+    PyMongoError,
+    ServerSelectionTimeoutError,
+)
 
-# Import config in both module and script contexts
+# Import config and sibling modules in both module and script contexts
 try:
     from . import config as cfg  # type: ignore
+    from . import artifact_watcher, batcher, circuit_breaker, features, host_index, host_memo, list_snapshot, metrics, public_suffix, report_sink, scoring, singleflight, smart_whitelist, verdict_cache  # type: ignore
 except Exception:
     try:
         from backend import config as cfg  # type: ignore
+        from backend import artifact_watcher, batcher, circuit_breaker, features, host_index, host_memo, list_snapshot, metrics, public_suffix, report_sink, scoring, singleflight, smart_whitelist, verdict_cache  # type: ignore
     except Exception:
         import config as cfg  # type: ignore
+        import artifact_watcher  # type: ignore
+        import batcher  # type: ignore
+        import circuit_breaker  # type: ignore
+        import features  # type: ignore
+        import host_index  # type: ignore
+        import host_memo  # type: ignore
+        import list_snapshot  # type: ignore
+        import public_suffix  # type: ignore
+        import report_sink  # type: ignore
+        import scoring  # type: ignore
+        import singleflight  # type: ignore
+        import metrics  # type: ignore
+        import smart_whitelist  # type: ignore
+        import verdict_cache  # type: ignore
 
 
 app = FastAPI()
@@ -37,180 +72,894 @@ ML_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "Machine-
 MODEL_PATH = os.path.join(ML_DIR, "phishing_detector_model.pkl")
 FEATURES_PATH = os.path.join(ML_DIR, "feature_names.json")
 
-pipeline = joblib.load(MODEL_PATH)
-with open(FEATURES_PATH, "r") as f:
-    FEATURE_NAMES: List[str] = json.load(f).get("feature_names", [])
+COMPILED_MODEL_PATH = getattr(cfg, "COMPILED_MODEL_PATH", "") or os.path.join(ML_DIR, "phishing_detector_model.compiled")
+
+
+FAST_START = getattr(cfg, "FAST_START", False)
+# Multi-worker mode: model arrays and host index snapshots are memory-mapped
+# read-only so every uvicorn worker shares one copy of the pages
+SHARED_MEMORY = getattr(cfg, "SHARED_MEMORY", False)
+MMAP_MODEL = FAST_START or SHARED_MEMORY
+
+
+
+class ServingModel(NamedTuple):
+    """Everything a model call needs, swapped as one reference on (re)load."""
+    model: object
+    # "compiled", "compiled-mmap" or "sklearn"
+    kind: str
+    # "rf-" + SHA-256 prefix of the .pkl, see scoring.model_version
+    version: str
+    extractor: features.FeatureExtractor
+    # The sklearn pipeline of this artifact if it was unpickled, else None
+    pipeline: object = None
+
+
+# Filled in by _load_models() on startup (in the background with FAST_START)
+# and replaced by reload_model()
+pipeline = None
+serving: Optional[ServingModel] = None
+_model_ready = threading.Event()
+_model_load_started = False
+_model_load_lock = threading.Lock()
+_model_lock = threading.Lock()
+startup_timings: Dict[str, float] = {}
+# Process memory (bytes) around model loading, see metrics.process_memory()
+startup_memory: Dict[str, Dict[str, int]] = {}
+
+
+def _get_pipeline():
+    """The sklearn pipeline, unpickled on first use; joblib/sklearn are only imported here."""
+    global pipeline
+    if pipeline is None:
+        with _model_lock:
+            if pipeline is None:
+                pipeline = _unpickle_pipeline()
+    return pipeline
+
+
+def _unpickle_pipeline():
+    import joblib
+    return joblib.load(MODEL_PATH)
+
+
+def _read_feature_names() -> List[str]:
+    with open(FEATURES_PATH, "r") as f:
+        return json.load(f).get("feature_names", [])
+
+
+def _load_compiled_model(feature_names: List[str], mmap: bool = False):
+    if not getattr(cfg, "USE_COMPILED_MODEL", True):
+        return None
+    return scoring.load_compiled_model(COMPILED_MODEL_PATH, MODEL_PATH, feature_names, mmap=mmap)
+
+
+# Operator-supplied trusted suffixes, on top of smart_whitelist.TRUSTED_SUFFIXES
+if getattr(cfg, "TRUSTED_SUFFIXES_FILE", ""):
+    smart_whitelist.load_trusted_suffixes(cfg.TRUSTED_SUFFIXES_FILE)
+
+# The model was fitted on a DataFrame; it is served plain float arrays in the
+# same column order, which is what the feature-names check would verify.
+warnings.filterwarnings("ignore", message="X does not have valid feature names", category=UserWarning)
 
 
 class URLInput(BaseModel):
     url: str
 
 
-def _count(pattern: str, text: str) -> int:
-    return len(re.findall(pattern, text))
-
-
-def _is_ip(host: str) -> int:
-    return 1 if re.fullmatch(r"\d+\.\d+\.\d+\.\d+", host or "") else 0
-
-
-def build_ml_features(url: str, feature_names: List[str]) -> Dict[str, float]:
-    parsed = urlparse(url)
-    host = parsed.hostname or ""
-    path = parsed.path or ""
-    suffix = (host.split(".")[-1] if "." in host else "")
-    subdomains = host.split(".")[:-2] if host.count(".") >= 2 else []
-
-    text = url or ""
-
-    feature_values: Dict[str, float] = {
-        "feat_url_length": float(len(text)),
-        "feat_hostname_length": float(len(host)),
-        "feat_path_length": float(len(path)),
-        "feat_count_hyphen": float(text.count("-")),
-        "feat_count_at": float(text.count("@")),
-        "feat_count_dot": float(text.count(".")),
-        "feat_count_slash": float(text.count("/")),
-        "feat_count_percent": float(text.count("%")),
-        "feat_count_digits": float(_count(r"\d", text)),
-        "feat_count_letters": float(_count(r"[A-Za-z]", text)),
-        "feat_has_login": 1.0 if re.search(r"login", text, re.I) else 0.0,
-        "feat_has_secure": 1.0 if re.search(r"secure", text, re.I) else 0.0,
-        "feat_has_bank": 1.0 if re.search(r"bank", text, re.I) else 0.0,
-        "feat_has_account": 1.0 if re.search(r"account", text, re.I) else 0.0,
-        "feat_has_verify": 1.0 if re.search(r"verify", text, re.I) else 0.0,
-        "feat_has_password": 1.0 if re.search(r"password|passwd|pwd", text, re.I) else 0.0,
-        "feat_has_signin": 1.0 if re.search(r"sign\s*in|signin", text, re.I) else 0.0,
-        "feat_total_keywords": 0.0,  # computed below
-        "feat_subdomain_count": float(len([s for s in subdomains if s])),
-        "feat_domain_length": float(len(host.split(".")[0])) if host else 0.0,
-        "feat_suffix_length": float(len(suffix)),
-        "feat_use_https": 1.0 if parsed.scheme == "https" else 0.0,
-        "feat_use_ip": float(_is_ip(host)),
+class URLListInput(BaseModel):
+    urls: List[str]
+
+
+MODEL_VERSION = scoring.MODEL_VERSION
+
+
+# Per-stage latency histograms and decision counters, served at /metrics
+stats = metrics.Metrics(enabled=getattr(cfg, "METRICS_ENABLED", False))
+
+verdicts = verdict_cache.VerdictCache(
+    maxsize=getattr(cfg, "VERDICT_CACHE_SIZE", 10000),
+    ttl=getattr(cfg, "VERDICT_CACHE_TTL_SECONDS", 300),
+)
+
+# Host-level parts of verdicts (list hit, trust, host adjustments), shared by
+# every URL on the host; the verdict cache above is per URL
+host_profiles = host_memo.HostMemo(
+    maxsize=getattr(cfg, "HOST_MEMO_SIZE", 50000),
+    ttl=getattr(cfg, "HOST_MEMO_TTL_SECONDS", 300),
+)
+
+
+# Concurrent check-url calls for the same (normalized) URL share one computation
+inflight = singleflight.SingleFlight(enabled=getattr(cfg, "SINGLEFLIGHT_ENABLED", True))
+
+
+def _cache_key(url: str) -> str:
+    """
+    Verdict cache key. Scheme (HTTP penalty) and trailing slashes (length and
+    slash-count features) change the verdict, so only case is normalized;
+    for ASCII URLs every feature and rule is case-insensitive.
+    """
+    return url.lower() if url.isascii() else url
+
+
+def _list_verdict(list_name: str) -> Dict:
+    return scoring.list_verdict(list_name, MODEL_VERSION)
+
+
+def _lookup_lists(host: str) -> Optional[str]:
+    """Return "whitelist"/"blacklist" if host is listed, else None."""
+    if not host:
+        return None
+    if whitelist_index.loaded and blacklist_index.loaded:
+        with stats.stage("whitelist"):
+            whitelisted = whitelist_index.contains(host)
+        if whitelisted:
+            return "whitelist"
+        with stats.stage("blacklist"):
+            blacklisted = blacklist_index.contains(host)
+        return "blacklist" if blacklisted else None
+
+    # Index not loaded yet (startup, or disabled): query Mongo directly. While
+    # Mongo is failing the lists are skipped rather than failing the check
+    try:
+        return db_breaker.call(_query_lists, host)
+    except (PyMongoError, circuit_breaker.CircuitOpenError):
+        return None
+
+
+def _query_lists(host: str) -> Optional[str]:
+    wl = _get_whitelist_collection()
+    if wl is not None:
+        with stats.stage("whitelist"):
+            wl_doc = wl.find_one(_list_query(whitelist_index, [host]), LIST_PROJECTION)
+        if wl_doc:
+            return "whitelist"
+
+    bl = _get_blacklist_collection()
+    if bl is not None:
+        with stats.stage("blacklist"):
+            bl_doc = bl.find_one(_list_query(blacklist_index, [host]), LIST_PROJECTION)
+        if bl_doc:
+            return "blacklist"
+    return None
+
+
+def _lists_degraded() -> bool:
+    """Lookups go to Mongo and Mongo is failing, so verdicts may miss list hits."""
+    return not _indexes_loaded() and db_breaker.failures > 0
+
+
+def _cache_verdict(key: str, host: str, verdict: Dict) -> None:
+    # A verdict computed without the lists is served but not cached
+    if not _lists_degraded():
+        verdicts.put(key, host, MODEL_VERSION, verdict)
+
+
+# Only the indexed key is read back, so list lookups are covered by the rhost index
+LIST_PROJECTION = {"rhost": 1, "_id": 0}
+
+
+def _list_query(index, hosts: List[str]) -> Dict:
+    """
+    Exact matches on the reversed-host keys of `hosts`, including parent
+    domains for lists that match them.
+    """
+    keys = [k for h in hosts for k in host_index.rhost_keys(h, index.match_parents)]
+    return {"rhost": {"$in": keys}}
+
+
+def _lookup_lists_bulk(hosts: List[str]) -> Dict[str, str]:
+    """Same matching rules as _lookup_lists, resolved with one query per collection."""
+    hosts = sorted({h for h in hosts if h})
+    hits: Dict[str, str] = {}
+    if not hosts:
+        return hits
+    if whitelist_index.loaded and blacklist_index.loaded:
+        for h in hosts:
+            listed = _lookup_lists(h)
+            if listed:
+                hits[h] = listed
+        return hits
+    try:
+        return db_breaker.call(_query_lists_bulk, hosts)
+    except (PyMongoError, circuit_breaker.CircuitOpenError):
+        return hits
+
+
+def _query_lists_bulk(hosts: List[str]) -> Dict[str, str]:
+    hits: Dict[str, str] = {}
+    for name, coll, index in (
+        ("whitelist", _get_whitelist_collection(), whitelist_index),
+        ("blacklist", _get_blacklist_collection(), blacklist_index),
+    ):
+        pending = [h for h in hosts if h not in hits]
+        if coll is None or not pending:
+            continue
+        with stats.stage(name):
+            found = {doc["rhost"] for doc in coll.find(_list_query(index, pending), LIST_PROJECTION)}
+        for h in pending:
+            if any(k in found for k in host_index.rhost_keys(h, index.match_parents)):
+                hits[h] = name
+    return hits
+
+
+def _serving_model() -> ServingModel:
+    state = serving
+    if state is None:
+        if not _model_load_started:
+            # Startup hooks have not run (app used without lifespan events)
+            _load_models()
+        elif not _model_ready.wait(getattr(cfg, "MODEL_WAIT_SECONDS", 30)):
+            raise RuntimeError("model is not loaded yet")
+        state = serving
+        if state is None:
+            raise RuntimeError("model failed to load")
+    return state
+
+
+def _predict_probas(urls: List[str]) -> List[float]:
+    """Score URLs with a single model call. Returns P(phishing) per URL."""
+    # Read once: a reload swapping in another model does not affect this call
+    return _predict_with(_serving_model(), urls)
+
+
+def _predict_with(state: ServingModel, urls: List[str]) -> List[float]:
+    with stats.stage("features"):
+        if len(urls) == 1:
+            X = state.extractor.row(urls[0])
+        else:
+            X = state.extractor.matrix(urls)
+
+    # Predict probability for class 1 (phishing). If predict_proba missing, fallback to label
+    with stats.stage("predict"):
+        try:
+            return [float(p[1]) for p in state.model.predict_proba(X)]
+        except Exception:
+            fallback = state.pipeline if state.pipeline is not None else _get_pipeline()
+            return [1.0 if int(label) == 1 else 0.0 for label in fallback.predict(X)]
+
+
+WARMUP_URLS = ["https://example.com/", "http://login.example.net/account/verify?id=1"]
+
+
+def _build_serving_model(mmap: bool, reuse_pipeline: bool = True) -> ServingModel:
+    """
+    Load the artifacts on disk: the compiled forest if usable, else the
+    sklearn pipeline. With `reuse_pipeline`, an already unpickled pipeline is
+    used instead of reading the .pkl again (startup only).
+    """
+    feature_names = _read_feature_names()
+    model = _load_compiled_model(feature_names, mmap=mmap)
+    kind = "compiled-mmap" if mmap else "compiled"
+    fallback = None
+    if model is None or not mmap:
+        # Unless memory-mapping, the pipeline stays loaded as the fallback model
+        fallback = _get_pipeline() if reuse_pipeline else _unpickle_pipeline()
+        if model is None:
+            model, kind = fallback, "sklearn"
+    version = scoring.model_version(MODEL_PATH, model if kind != "sklearn" else None)
+    return ServingModel(model, kind, version, features.FeatureExtractor(feature_names), fallback)
+
+
+def _warm_up(state: ServingModel) -> None:
+    """First calls pay for page faults on the mapped arrays and lazy NumPy setup."""
+    for urls in (WARMUP_URLS[:1], WARMUP_URLS):
+        probas = _predict_with(state, urls)
+        if len(probas) != len(urls) or not all(0.0 <= p <= 1.0 for p in probas):
+            raise ValueError(f"warm-up produced invalid probabilities: {probas}")
+
+
+def _install(state: ServingModel) -> None:
+    global serving, pipeline, MODEL_VERSION
+    # Requests that already read `serving` finish on the previous model
+    serving = state
+    pipeline = state.pipeline
+    MODEL_VERSION = state.version
+
+
+def _load_models() -> None:
+    """Load the serving model (compiled forest if usable, else the sklearn pipeline) and warm it up."""
+    with _model_load_lock:
+        if serving is not None:
+            return
+        try:
+            startup_memory["before_model"] = metrics.process_memory()
+            start = time.perf_counter()
+            state = _build_serving_model(MMAP_MODEL)
+            startup_timings["model_load"] = time.perf_counter() - start
+
+            start = time.perf_counter()
+            _warm_up(state)
+            _install(state)
+            startup_timings["warmup"] = time.perf_counter() - start
+            startup_memory["after_model"] = metrics.process_memory()
+            print(
+                f"⏱️  Model ready ({state.kind}, {state.version}): import {startup_timings['import']:.3f}s, "
+                f"load {startup_timings['model_load']:.3f}s, warm-up {startup_timings['warmup']:.3f}s"
+            )
+            before, after = startup_memory["before_model"], startup_memory["after_model"]
+            if "rss" in before and "rss" in after:
+                print(
+                    f"💾 Worker {os.getpid()} RSS {before['rss'] / 2**20:.1f} MB → {after['rss'] / 2**20:.1f} MB"
+                    + (f" (PSS {after['pss'] / 2**20:.1f} MB)" if "pss" in after else "")
+                )
+        except Exception as e:
+            print(f"❌ Model load failed: {e}")
+        finally:
+            _model_ready.set()
+
+
+# --- Model hot-reload ----------------------------------------------------------
+# A new model is loaded and warmed up next to the serving one, then swapped in
+# with one assignment. Verdicts are cached per model_version, so the swap
+# retires the old model's cached verdicts without touching anything else.
+
+model_reloads: Dict = {"total": 0, "failed": 0, "last_error": None, "last_seconds": None}
+
+
+def reload_model(reason: str) -> Dict:
+    """Load, warm up and swap in the artifacts currently on disk."""
+    with _model_load_lock:
+        previous = serving
+        start = time.perf_counter()
+        try:
+            state = _build_serving_model(MMAP_MODEL, reuse_pipeline=False)
+            _warm_up(state)
+        except Exception as e:
+            model_reloads["failed"] += 1
+            model_reloads["last_error"] = f"{type(e).__name__}: {e}"
+            print(f"❌ Model reload ({reason}) failed, still serving {MODEL_VERSION}: {e}")
+            return {"ok": False, "error": str(e), "model_version": MODEL_VERSION}
+        seconds = time.perf_counter() - start
+        if previous is not None and (previous.version, previous.kind) == (state.version, state.kind):
+            return {"ok": True, "changed": False, "model_version": state.version, "model": state.kind}
+        _install(state)
+        _model_ready.set()
+        model_reloads["total"] += 1
+        model_reloads["last_error"] = None
+        model_reloads["last_seconds"] = round(seconds, 4)
+    old = previous.version if previous else None
+    print(f"🔄 Model reloaded ({reason}): {old} → {state.version} ({state.kind}) in {seconds:.3f}s")
+    return {
+        "ok": True,
+        "changed": True,
+        "model_version": state.version,
+        "previous_version": old,
+        "model": state.kind,
+        "seconds": round(seconds, 4),
     }
 
-    keyword_flags = [
-        feature_values["feat_has_login"],
-        feature_values["feat_has_secure"],
-        feature_values["feat_has_bank"],
-        feature_values["feat_has_account"],
-        feature_values["feat_has_verify"],
-        feature_values["feat_has_password"],
-        feature_values["feat_has_signin"],
-    ]
-    feature_values["feat_total_keywords"] = float(sum(1 for v in keyword_flags if v == 1.0))
 
-    # Only return the requested features in the exact order the model expects
-    return {name: feature_values.get(name, 0.0) for name in feature_names}
+def _admin_allowed(request: Request) -> bool:
+    token = getattr(cfg, "ADMIN_TOKEN", "")
+    return bool(token) and hmac.compare_digest(request.headers.get("x-admin-token", ""), token)
+
+
+@app.post("/api/admin/reload-model")
+def admin_reload_model(request: Request):
+    """Reload the model in this worker; the request returns once the new model is serving."""
+    if not _admin_allowed(request):
+        return JSONResponse({"ok": False, "error": "forbidden"}, status_code=403)
+    result = reload_model("admin")
+    return JSONResponse(result, status_code=200 if result["ok"] else 500)
+
+
+_model_watcher = None
+
+
+@app.on_event("startup")
+def _start_model_watcher():
+    global _model_watcher
+    interval = getattr(cfg, "MODEL_WATCH_SECONDS", 0)
+    if interval <= 0:
+        return
+    paths = [MODEL_PATH, FEATURES_PATH, os.path.join(COMPILED_MODEL_PATH, "meta.json")]
+    _model_watcher = artifact_watcher.ArtifactWatcher(paths, interval, lambda: reload_model("file change"))
+    _model_watcher.start()
+
+
+@app.on_event("shutdown")
+def _stop_model_watcher():
+    if _model_watcher is not None:
+        _model_watcher.stop()
+
+
+@app.on_event("startup")
+def _load_public_suffix_list():
+    # Shared by features, trust rules and list lookups; loaded here rather than on the first request
+    start = time.perf_counter()
+    public_suffix.default_list()
+    startup_timings["public_suffix"] = time.perf_counter() - start
+
+
+@app.on_event("startup")
+def _start_model_load():
+    global _model_load_started
+    _model_load_started = True
+    if FAST_START:
+        # Liveness answers right away; /readyz reports 503 until this finishes
+        threading.Thread(target=_load_models, name="model-load", daemon=True).start()
+    else:
+        _load_models()
+
+
+@app.get("/healthz")
+def healthz():
+    """Liveness: the process is up and serving HTTP."""
+    return {"status": "ok"}
+
+
+@app.get("/readyz")
+def readyz():
+    """Readiness: the model is loaded and warmed up."""
+    state = serving
+    ready = state is not None
+    body = {
+        "ready": ready,
+        "model": state.kind if state else None,
+        "model_version": MODEL_VERSION,
+        "model_reloads": dict(model_reloads),
+        "host_index_loaded": whitelist_index.loaded and blacklist_index.loaded,
+        # Not part of readiness: checks keep working (model only) while Mongo is down
+        "database": db_breaker.stats(),
+        "lists": {
+            index.name: {"loaded": index.loaded, "source": index.source, "hosts": len(index)}
+            for index in (whitelist_index, blacklist_index)
+        },
+        "startup_seconds": {k: round(v, 4) for k, v in startup_timings.items()},
+        "pid": os.getpid(),
+        "memory_bytes": dict(startup_memory, current=metrics.process_memory()),
+    }
+    return JSONResponse(body, status_code=200 if ready else 503)
+
+
+# Optional micro-batching of concurrent single-URL model calls (started on startup)
+_model_batcher = None
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+
+
+def _record_batch(size: int, seconds: float) -> None:
+    stats.observe("microbatch_size", size, "Rows per micro-batched model call", BATCH_SIZE_BUCKETS)
+
+
+def _score_one(url: str) -> float:
+    """P(phishing) for one URL, coalesced with concurrent calls when micro-batching is on."""
+    if _model_batcher is not None:
+        try:
+            return _model_batcher.score(url)
+        except FutureTimeoutError:
+            # The batch worker is stuck or backed up: score this one directly
+            pass
+    return _predict_probas([url])[0]
+
+
+def _model_verdict(url: str, proba: float, profile: host_memo.HostProfile) -> Dict:
+    """Apply smart whitelist adjustments, the HTTP penalty and risk thresholds to a model score."""
+    # Apply smart whitelist adjustments to reduce false positives
+    with stats.stage("adjust"):
+        adjusted_score, adjustments = smart_whitelist.adjust_score_for_context(
+            url, proba, trusted=profile.trusted, host_factors=profile.factors
+        )
+    with stats.stage("risk_map"):
+        return scoring.map_risk(url, adjusted_score, adjustments, MODEL_VERSION)
+
+
+def _trusted_verdict(trusted: Tuple[bool, str]) -> Optional[Dict]:
+    return scoring.trusted_verdict(trusted, MODEL_VERSION)
+
+
+_host_of = scoring.host_of
+
+
+def _host_profile(host: str, listed: Optional[str]) -> host_memo.HostProfile:
+    """
+    Host-level parts of a verdict for `host` (`listed` is the _lookup_lists
+    result), memoized unless the lists could not be consulted.
+    """
+    if listed:
+        profile = host_memo.HostProfile(listed, (False, ""), ())
+    else:
+        with stats.stage("trusted_pattern"):
+            trusted = smart_whitelist.check_trusted_host(host)
+        # Trusted hosts never reach the model, so their adjustments are never used
+        factors = () if trusted[0] else smart_whitelist.host_adjustments(host)
+        profile = host_memo.HostProfile(None, trusted, factors)
+    if not _lists_degraded():
+        host_profiles.put(host, profile)
+    return profile
+
+
+def _model_profile(host: str) -> host_memo.HostProfile:
+    """Profile of a host that went to the model (so neither listed nor trusted)."""
+    profile = host_profiles.peek(host)
+    if profile is None:
+        profile = host_memo.HostProfile(None, (False, ""), smart_whitelist.host_adjustments(host))
+    return profile
+
+
+def _pre_model_verdict(profile: host_memo.HostProfile) -> Optional[Dict]:
+    """Verdict from the lists or trusted patterns, if any."""
+    if profile.listed:
+        stats.decision(profile.listed)
+        return _list_verdict(profile.listed)
+
+    # Trusted patterns short-circuit to "safe", so skip the model for them
+    verdict = _trusted_verdict(profile.trusted)
+    if verdict:
+        stats.decision("trusted_pattern")
+    return verdict
+
+
+def _compute_verdict(url: str, host: str) -> Dict:
+    # Check whitelist/blacklist before model
+    profile = host_profiles.get(host)
+    if profile is None:
+        profile = _host_profile(host, _lookup_lists(host))
+    verdict = _pre_model_verdict(profile)
+    if verdict:
+        return verdict
+    proba = _score_one(url)
+    stats.decision("model")
+    return _model_verdict(url, proba, profile)
 
 
 @app.post("/api/check-url")
 def check_url(input_data: URLInput):
     try:
-        # Check whitelist/blacklist before model
-        parsed_for_lists = urlparse(input_data.url)
-        host = (parsed_for_lists.hostname or "").lower()
-        # Normalize URL for comparison (remove scheme, trailing slash, lowercase)
-        url_normalized = input_data.url.lower().rstrip("/")
-        if url_normalized.startswith("http://"):
-            url_normalized = url_normalized[7:]
-        elif url_normalized.startswith("https://"):
-            url_normalized = url_normalized[8:]
-        url_normalized = url_normalized.rstrip("/")
-        
-        wl = _get_whitelist_collection()
-        if wl is not None:
-            # Check by host or normalized URL
-            wl_doc = wl.find_one({"$or": [
-                {"host": host},
-                {"url": {"$regex": f"^{re.escape(host)}", "$options": "i"}}
-            ]})
-            if wl_doc:
-                return {"risk": "safe", "score": 0.0, "reasons": ["whitelist"], "model_version": "rf-pipeline"}
-        
-        bl = _get_blacklist_collection()
-        if bl is not None:
-            # Check by host (most reliable) - exact match
-            bl_doc = bl.find_one({"host": host})
-            if bl_doc:
-                return {"risk": "malicious", "score": 1.0, "reasons": ["blacklist"], "model_version": "rf-pipeline"}
-            # Also check if URL contains the host
-            bl_doc2 = bl.find_one({"url": {"$regex": re.escape(host), "$options": "i"}})
-            if bl_doc2:
-                return {"risk": "malicious", "score": 1.0, "reasons": ["blacklist"], "model_version": "rf-pipeline"}
-
-        features = build_ml_features(input_data.url, FEATURE_NAMES)
-        df = pd.DataFrame([[features[name] for name in FEATURE_NAMES]], columns=FEATURE_NAMES)
-
-        # Predict probability for class 1 (phishing). If predict_proba missing, fallback to label
-        try:
-            proba = float(pipeline.predict_proba(df)[0][1])
-        except Exception:
-            label = int(pipeline.predict(df)[0])
-            proba = 1.0 if label == 1 else 0.0
+        with stats.stage("total"):
+            key = _cache_key(input_data.url)
+            with stats.stage("cache"):
+                cached = verdicts.get(key, MODEL_VERSION)
+            if cached is not None:
+                stats.decision("cache")
+                return cached
+            return inflight.do(key, lambda: _compute_and_cache(input_data.url, key))
+    except Exception as e:
+        return {"error": str(e)}
+
+
+def _compute_and_cache(url: str, key: str) -> Dict:
+    # Cached before the flight ends, so requests arriving after it hit the cache
+    host = _host_of(url)
+    verdict = _compute_verdict(url, host)
+    _cache_verdict(key, host, verdict)
+    return verdict
+
+
+# --- Cacheable GET form ------------------------------------------------------
+# GET /api/check-url?url=... returns the POST payload with an ETag and a
+# Cache-Control lifetime chosen by how the verdict was reached, so browser
+# caches and reverse proxies can absorb repeat lookups.
+
+def _list_version(index) -> str:
+    return f"{list_snapshot.to_version(index.stamp)}.{len(index)}"
 
-        # Apply smart whitelist adjustments to reduce false positives
+
+def _check_url_etag(url: str) -> Optional[str]:
+    """
+    Strong ETag for a check-url verdict. The verdict is a function of the
+    normalized URL, the model and both lists, so the tag is derived from
+    those and can be checked before any scoring. None until the host
+    indexes are loaded, since list versions are unknown before that.
+    """
+    if not _indexes_loaded():
+        return None
+    parts = [_cache_key(url), MODEL_VERSION, _list_version(whitelist_index), _list_version(blacklist_index)]
+    return '"' + hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()[:32] + '"'
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [t.strip() for t in if_none_match.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+
+def _verdict_cache_control(verdict: Optional[Dict]) -> str:
+    """
+    List and trusted-pattern verdicts only change with the lists, so they get
+    the long lifetime; model-scored (or unknown) verdicts the short one.
+    """
+    if verdict is not None and "error" in verdict:
+        return "no-store"
+    if verdict is not None and "model_probability" not in verdict.get("reasons", []):
+        return f"public, max-age={getattr(cfg, 'CHECK_URL_LIST_MAX_AGE', 3600)}"
+    return f"public, max-age={getattr(cfg, 'CHECK_URL_MODEL_MAX_AGE', 300)}"
+
+
+def _not_modified(request: Request, url: str) -> Tuple[Optional[str], Optional[Response]]:
+    """(etag, 304 response if the client already has it)."""
+    etag = _check_url_etag(url)
+    if etag is None or not _etag_matches(request.headers.get("if-none-match"), etag):
+        return etag, None
+    # The cached verdict, if any, picks the lifetime without scoring the URL
+    cached = verdicts.peek(_cache_key(url), MODEL_VERSION)
+    return etag, Response(status_code=304, headers={"ETag": etag, "Cache-Control": _verdict_cache_control(cached)})
+
+
+def _verdict_response(verdict: Dict, etag: Optional[str]) -> JSONResponse:
+    headers = {"Cache-Control": _verdict_cache_control(verdict)}
+    if etag is not None and "error" not in verdict:
+        headers["ETag"] = etag
+    return JSONResponse(verdict, headers=headers)
+
+
+@app.get("/api/check-url")
+def check_url_get(url: str, request: Request):
+    etag, not_modified = _not_modified(request, url)
+    if not_modified is not None:
+        return not_modified
+    return _verdict_response(check_url(URLInput(url=url)), etag)
+
+
+def _prepare_batch(urls: List[str]) -> Tuple[Dict[str, Dict], Dict[str, str], List[str]]:
+    """
+    Resolve everything short of the model for a batch of URLs.
+    Returns (verdicts so far, host per unresolved URL, URLs still to score).
+    """
+    unique_urls = list(dict.fromkeys(urls))
+    results: Dict[str, Dict] = {}
+    hosts: Dict[str, str] = {}
+    for url in unique_urls:
+        cached = verdicts.get(_cache_key(url), MODEL_VERSION)
+        if cached is not None:
+            stats.decision("cache")
+            results[url] = cached
+            continue
         try:
-            from smart_whitelist import adjust_score_for_context, check_trusted_pattern
-            
-            # Check if URL matches trusted pattern
-            is_trusted, trust_reason = check_trusted_pattern(input_data.url)
-            if is_trusted:
-                return {
-                    "risk": "safe",
-                    "score": 0.0,
-                    "reasons": [trust_reason],
-                    "model_version": "rf-pipeline",
-                }
-            
-            # Adjust score based on context
-            adjusted_score, adjustments = adjust_score_for_context(input_data.url, proba)
-            proba = adjusted_score
-            
-        except ImportError:
-            # If smart_whitelist not available, use original score
-            adjustments = []
-
-        # Check for HTTP (no SSL) - security warning
-        is_http_no_ssl = input_data.url.lower().startswith("http://")
-        if is_http_no_ssl:
-            # Increase risk score for HTTP sites (no encryption)
-            proba = min(1.0, proba + 0.25)  # Add 25% to risk score
-            if "adjustments" not in dir():
-                adjustments = []
-            adjustments.append("http_no_ssl_warning")
-
-        # Map to risk levels
-        if proba >= 0.8:
-            risk = "malicious"
-        elif proba >= 0.5:
-            risk = "suspicious"
-        elif is_http_no_ssl:
-            # HTTP sites are at least suspicious even with low ML score
-            risk = "suspicious"
-            proba = max(proba, 0.5)
-        else:
-            risk = "safe"
-
-        reasons = ["model_probability"]
-        if adjustments:
-            reasons.extend(adjustments)
-        
-
-        return {
-            "risk": risk,
-            "score": proba,
-            "reasons": reasons,
-            "model_version": "rf-pipeline",
-        }
+            hosts[url] = _host_of(url)
+        except ValueError as e:
+            results[url] = {"error": str(e)}
+
+    # Only hosts missing from the host memo go to the lists
+    profiles: Dict[str, host_memo.HostProfile] = {}
+    for host in dict.fromkeys(hosts.values()):
+        profile = host_profiles.get(host)
+        if profile is not None:
+            profiles[host] = profile
+    misses = [host for host in dict.fromkeys(hosts.values()) if host not in profiles]
+    listed = _lookup_lists_bulk(misses)
+    for host in misses:
+        profiles[host] = _host_profile(host, listed.get(host))
+
+    to_score = []
+    for url, host in hosts.items():
+        verdict = _pre_model_verdict(profiles[host])
+        if verdict is None:
+            to_score.append(url)
+            continue
+        results[url] = verdict
+        _cache_verdict(_cache_key(url), host, verdict)
+    return results, hosts, to_score
+
+
+def _finish_batch(
+    urls: List[str], results: Dict[str, Dict], hosts: Dict[str, str], to_score: List[str], probas: List[float]
+) -> Dict:
+    for url, proba in zip(to_score, probas):
+        stats.decision("model")
+        verdict = _model_verdict(url, proba, _model_profile(hosts[url]))
+        results[url] = verdict
+        _cache_verdict(_cache_key(url), hosts[url], verdict)
+    return {"results": [{"url": url, **results[url]} for url in urls]}
+
+
+def _batch_too_large(urls: List[str]) -> Optional[Dict]:
+    max_urls = getattr(cfg, "MAX_BATCH_URLS", 500)
+    if len(urls) > max_urls:
+        return {"error": f"Too many URLs (max {max_urls})"}
+    return None
+
+
+@app.post("/api/check-urls")
+def check_urls(input_data: URLListInput):
+    """Batch variant of /api/check-url: one list query per collection and one model call."""
+    too_large = _batch_too_large(input_data.urls)
+    if too_large:
+        return too_large
+    try:
+        results, hosts, to_score = _prepare_batch(input_data.urls)
+        probas = _predict_probas(to_score) if to_score else []
+        return _finish_batch(input_data.urls, results, hosts, to_score, probas)
     except Exception as e:
         return {"error": str(e)}
 
 
+# --- Streaming link scans ---------------------------------------------------
+# POST /api/check-urls/stream answers with one NDJSON line per unique URL as
+# verdicts resolve: cache, list, trusted-pattern and error lines in the first
+# write, then model-scored links in chunks of STREAM_MODEL_BATCH.
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def _ndjson(rows: List[Dict]) -> bytes:
+    return "".join(json.dumps(row, separators=(",", ":")) + "\n" for row in rows).encode("utf-8")
+
+
+def _stream_head(urls: List[str]) -> Tuple[List[Dict], Dict[str, str], List[List[str]]]:
+    """
+    Lines that need no model, the host per URL left to score, and those URLs
+    in model-sized chunks. Host-level work (lists, trust, host adjustments)
+    is done once per host by _prepare_batch, and each host's URLs are kept
+    together so they are scored in as few chunks as possible. Every URL is
+    scored; the request as a whole is bounded by MAX_BATCH_URLS.
+    """
+    results, hosts, to_score = _prepare_batch(urls)
+    lines = [{"url": url, **verdict} for url, verdict in results.items()]
+    order = {host: i for i, host in enumerate(dict.fromkeys(hosts[url] for url in to_score))}
+    kept = sorted(to_score, key=lambda url: order[hosts[url]])
+    size = max(getattr(cfg, "STREAM_MODEL_BATCH", 32), 1)
+    return lines, hosts, [kept[i:i + size] for i in range(0, len(kept), size)]
+
+
+def _stream_chunk(chunk: List[str], hosts: Dict[str, str], probas: List[float]) -> List[Dict]:
+    return _finish_batch(chunk, {}, hosts, chunk, probas)["results"]
+
+
+def _stream_verdicts(urls: List[str]) -> Iterator[bytes]:
+    try:
+        lines, hosts, chunks = _stream_head(urls)
+    except Exception as e:
+        yield _ndjson([{"error": str(e)}])
+        return
+    if lines:
+        yield _ndjson(lines)
+    for chunk in chunks:
+        try:
+            rows = _stream_chunk(chunk, hosts, _predict_probas(chunk))
+        except Exception as e:
+            rows = [{"url": url, "error": str(e)} for url in chunk]
+        yield _ndjson(rows)
+
+
+@app.post("/api/check-urls/stream")
+def check_urls_stream(input_data: URLListInput):
+    too_large = _batch_too_large(input_data.urls)
+    if too_large:
+        return JSONResponse(too_large, status_code=413)
+    return StreamingResponse(_stream_verdicts(input_data.urls), media_type=NDJSON_MEDIA_TYPE)
+
+
+@app.get("/api/cache-stats")
+def cache_stats():
+    return {**verdicts.stats(), "coalesced": inflight.coalesced, "host_memo": host_profiles.stats()}
+
+
+def _cache_samples():
+    s = verdicts.stats()
+    return [
+        ("verdict_cache_hits_total", "counter", "Verdict cache hits", [({}, s["hits"])]),
+        ("verdict_cache_misses_total", "counter", "Verdict cache misses", [({}, s["misses"])]),
+        ("verdict_cache_entries", "gauge", "Verdicts currently cached", [({}, s["size"])]),
+        ("host_memo_hits_total", "counter", "Host-level verdict parts answered from the host memo",
+         [({}, host_profiles.hits)]),
+        ("host_memo_misses_total", "counter", "Hosts looked up in the lists and trust rules",
+         [({}, host_profiles.misses)]),
+        ("host_memo_entries", "gauge", "Hosts currently memoized", [({}, len(host_profiles))]),
+        ("singleflight_coalesced_total", "counter", "check-url requests that joined an identical in-flight one",
+         [({}, inflight.coalesced)]),
+        ("singleflight_inflight", "gauge", "Distinct check-url computations in flight", [({}, len(inflight))]),
+    ]
+
+
+stats.register_collector(_cache_samples)
+
+
+def _public_suffix_samples():
+    s = public_suffix.default_list().stats()
+    return [
+        ("public_suffix_cache_hits_total", "counter", "Hostname parses answered from the memo", [({}, s["hits"])]),
+        ("public_suffix_cache_misses_total", "counter", "Hostnames parsed against the suffix trie", [({}, s["misses"])]),
+    ]
+
+
+stats.register_collector(_public_suffix_samples)
+
+
+def _microbatch_samples():
+    if _model_batcher is None:
+        return []
+    return [
+        ("microbatch_batches_total", "counter", "Micro-batched model calls", [({}, _model_batcher.batches)]),
+        ("microbatch_rows_total", "counter", "Rows scored through the micro-batcher", [({}, _model_batcher.rows)]),
+        ("microbatch_timeouts_total", "counter", "Micro-batched rows scored directly after waiting too long", [({}, _model_batcher.timeouts)]),
+    ]
+
+
+stats.register_collector(_microbatch_samples)
+
+
+def _startup_samples():
+    return [("startup_seconds", "gauge", "Time spent in each startup phase",
+             [({"phase": phase}, seconds) for phase, seconds in sorted(startup_timings.items())])]
+
+
+stats.register_collector(_startup_samples)
+
+
+def _model_samples():
+    state = serving
+    return [
+        ("model_info", "gauge", "Serving model version and kind",
+         [({"version": state.version, "kind": state.kind}, 1)] if state else []),
+        ("model_reloads_total", "counter", "Models swapped in by a reload", [({}, model_reloads["total"])]),
+        ("model_reload_failures_total", "counter", "Reloads that kept the previous model", [({}, model_reloads["failed"])]),
+    ]
+
+
+stats.register_collector(_model_samples)
+
+
+def _memory_samples():
+    return [("process_memory_bytes", "gauge", "Resident memory of this worker (rss, pss, shared)",
+             [({"kind": kind}, value) for kind, value in sorted(metrics.process_memory().items())])]
+
+
+stats.register_collector(_memory_samples)
+
+
+@app.on_event("startup")
+def _start_microbatcher():
+    global _model_batcher
+    if getattr(cfg, "MICROBATCH_ENABLED", False):
+        _model_batcher = batcher.MicroBatcher(
+            _predict_probas,
+            window=getattr(cfg, "MICROBATCH_WINDOW_MS", 2.0) / 1000.0,
+            max_batch=getattr(cfg, "MICROBATCH_MAX_SIZE", 64),
+            on_batch=_record_batch,
+            timeout=getattr(cfg, "MICROBATCH_TIMEOUT_MS", 1000.0) / 1000.0,
+        )
+
+
+@app.on_event("shutdown")
+def _stop_microbatcher():
+    global _model_batcher
+    if _model_batcher is not None:
+        _model_batcher.close()
+        _model_batcher = None
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    return PlainTextResponse(stats.render(), media_type="text/plain; version=0.0.4")
+
+
 _mongo_client = None
 _reports_coll = None
 _blacklist_coll = None
 _whitelist_coll = None
+_list_indexes_ready = False
+
+# Only unreachable or timed-out servers count as Mongo failing. Data-level
+# errors (duplicate keys, rejected operations) pass through without tripping
+# the circuit, since the server answered them
+MONGO_OUTAGE_ERRORS = (
+    ConnectionFailure,
+    AutoReconnect,
+    NetworkTimeout,
+    ExecutionTimeout,
+    ServerSelectionTimeoutError,
+)
+
+# Guards list lookups, list and report writes and index refreshes: while Mongo
+# keeps failing, calls are refused at once instead of each waiting out a timeout
+db_breaker = circuit_breaker.CircuitBreaker(
+    "mongo",
+    failure_threshold=getattr(cfg, "MONGO_BREAKER_FAILURES", 3),
+    reset_seconds=getattr(cfg, "MONGO_BREAKER_RESET_SECONDS", 15.0),
+    errors=MONGO_OUTAGE_ERRORS,
+)
+
+
+def _mongo_client_options() -> Dict:
+    return {
+        "connectTimeoutMS": getattr(cfg, "MONGO_CONNECT_TIMEOUT_MS", 2000),
+        "serverSelectionTimeoutMS": getattr(cfg, "MONGO_SERVER_SELECTION_TIMEOUT_MS", 2000),
+        "socketTimeoutMS": getattr(cfg, "MONGO_SOCKET_TIMEOUT_MS", 3000),
+    }
 
 
 def _ensure_db():
@@ -219,11 +968,32 @@ def _ensure_db():
         return
     mongo_uri = getattr(cfg, "MONGO_URI", "")
     if mongo_uri:
-        _mongo_client = MongoClient(mongo_uri)
+        _mongo_client = MongoClient(mongo_uri, **_mongo_client_options())
         db = _mongo_client.get_default_database() if "/" in mongo_uri.split("?")[0] else _mongo_client["phishshield"]
         _reports_coll = db["reports"]
         _blacklist_coll = db["blacklist"]
         _whitelist_coll = db["whitelist"]
+        _ensure_list_indexes()
+
+
+def _ensure_list_indexes():
+    """Create the list indexes; retried from the index refresher if Mongo was unreachable."""
+    global _list_indexes_ready
+    indexes = [(coll, "rhost", host_index.RHOST_INDEX_OPTIONS) for coll in (_whitelist_coll, _blacklist_coll)]
+    # imported_at serves the blacklist delta endpoint
+    indexes.append((_blacklist_coll, "imported_at", {"background": True}))
+    for coll, key, options in indexes:
+        try:
+            db_breaker.call(coll.create_index, key, **options)
+        except (ConnectionFailure, circuit_breaker.CircuitOpenError) as e:
+            print(f"⚠️  MongoDB unreachable, list indexes not checked: {e}")
+            return
+        except PyMongoError as e:
+            print(f"⚠️  Could not create {key} index on {coll.name}: {e}")
+            if key == "rhost":
+                # Usually duplicate hosts from before the rhost key existed
+                print("   Run: python3 backend/scripts/migrate_rhost.py")
+    _list_indexes_ready = True
 
 
 def _get_reports_collection():
@@ -241,46 +1011,262 @@ def _get_whitelist_collection():
     return _whitelist_coll
 
 
+# In-memory host indexes; list lookups stay off Mongo once these are loaded
+_shared_index_dir = getattr(cfg, "SHARED_INDEX_DIR", "") if SHARED_MEMORY else None
+whitelist_index = host_index.HostIndex(
+    "whitelist", match_parents=getattr(cfg, "WHITELIST_MATCH_PARENTS", False), shared_dir=_shared_index_dir
+)
+blacklist_index = host_index.HostIndex(
+    "blacklist", match_parents=getattr(cfg, "BLACKLIST_MATCH_PARENTS", True), shared_dir=_shared_index_dir
+)
+_index_refresher = None
+
+# Binary copies of the list indexes for clients that check hosts locally. The
+# whitelist one lets them defer whitelisted hosts to the server, which checks
+# the whitelist first
+blacklist_snapshot = list_snapshot.ListSnapshot(blacklist_index)
+whitelist_snapshot = list_snapshot.ListSnapshot(whitelist_index)
+
+
+def _snapshot_of(index) -> list_snapshot.ListSnapshot:
+    return blacklist_snapshot if index is blacklist_index else whitelist_snapshot
+
+
+def _on_list_change(index, new_hosts):
+    if new_hosts is None:
+        # Full reload changed the list (e.g. deletions): drop every cached verdict
+        verdicts.clear()
+        host_profiles.clear()
+        _snapshot_of(index).invalidate()
+        return
+    _snapshot_of(index).add(new_hosts)
+    for host in new_hosts:
+        verdicts.invalidate_host(host)
+        host_profiles.invalidate_host(host)
+
+
+@app.on_event("startup")
+def _start_host_index():
+    global _index_refresher
+    if not getattr(cfg, "HOST_INDEX_ENABLED", True):
+        return
+    sources = [
+        (whitelist_index, _get_whitelist_collection),
+        (blacklist_index, _get_blacklist_collection),
+    ]
+    for index, get_coll in sources:
+        try:
+            coll = get_coll()
+            if coll is not None:
+                db_breaker.call(index.load_from, coll)
+        except (PyMongoError, circuit_breaker.CircuitOpenError) as e:
+            # The refresher retries the full load; until then lookups use the
+            # local snapshot if there is one, or query Mongo
+            print(f"⚠️  Could not load {index.name} index: {e}")
+            _load_list_snapshot(index)
+    _persist_list_snapshots(force=True)
+    _index_refresher = host_index.HostIndexRefresher(
+        sources,
+        interval=getattr(cfg, "HOST_INDEX_REFRESH_SECONDS", 10),
+        full_reload_interval=getattr(cfg, "HOST_INDEX_FULL_RELOAD_SECONDS", 600),
+        on_change=_on_list_change,
+        breaker=db_breaker,
+        on_cycle=_refresher_cycle,
+    )
+    _index_refresher.start()
+
+
+def _list_snapshot_path(index) -> str:
+    return os.path.join(getattr(cfg, "LIST_SNAPSHOT_DIR", ""), f"{index.name}.hosts")
+
+
+def _load_list_snapshot(index) -> None:
+    if not getattr(cfg, "LIST_SNAPSHOT_DIR", ""):
+        return
+    path = _list_snapshot_path(index)
+    if not os.path.exists(path):
+        return
+    try:
+        count = list_snapshot.load_index(index, path)
+    except (OSError, ValueError) as e:
+        print(f"⚠️  Could not load {index.name} snapshot {path}: {e}")
+        return
+    print(f"📦 Serving {count} {index.name} hosts from local snapshot {path}")
+
+
+_last_list_persist = 0.0
+
+
+def _persist_list_snapshots(force: bool = False) -> None:
+    """
+    Save the Mongo-loaded indexes to LIST_SNAPSHOT_DIR, at most every
+    LIST_SNAPSHOT_SECONDS and only when the copy on disk is out of date.
+    """
+    global _last_list_persist
+    if not getattr(cfg, "LIST_SNAPSHOT_DIR", ""):
+        return
+    if not force and time.monotonic() - _last_list_persist < getattr(cfg, "LIST_SNAPSHOT_SECONDS", 300):
+        return
+    _last_list_persist = time.monotonic()
+    for index in (whitelist_index, blacklist_index):
+        if not index.loaded or index.source != "mongo":
+            continue
+        path = _list_snapshot_path(index)
+        if list_snapshot.read_header(path) == (list_snapshot.to_version(index.stamp), len(index)):
+            continue
+        try:
+            list_snapshot.save_index(index, path)
+        except OSError as e:
+            print(f"⚠️  Could not save {index.name} snapshot {path}: {e}")
+
+
+def _refresher_cycle() -> None:
+    _persist_list_snapshots()
+    if _reports_coll is not None and not _list_indexes_ready and db_breaker.state == circuit_breaker.CLOSED:
+        _ensure_list_indexes()
+
+
+@app.on_event("shutdown")
+def _stop_host_index():
+    if _index_refresher is not None:
+        _index_refresher.stop()
+
+
+REPORTS_JSON_PATH = os.path.join(os.path.dirname(__file__), "reports.json")
+REPORTS_PATH = getattr(cfg, "REPORTS_FILE", "") or os.path.join(os.path.dirname(__file__), "reports.jsonl")
+REPORTS_SPILL_PATH = getattr(cfg, "REPORTS_SPILL_FILE", "") or os.path.join(os.path.dirname(__file__), "reports.pending.jsonl")
+
+_reports = None
+_reports_lock = threading.Lock()
+
+
+def _get_report_sink():
+    """Write-behind sink for reports: Mongo insert_many batches, or JSONL appends without Mongo."""
+    global _reports
+    if _reports is not None:
+        return _reports
+    with _reports_lock:
+        if _reports is None:
+            coll = _get_reports_collection()
+            spill = None
+            if coll is not None:
+                # Refused straight away while the circuit is open; the sink keeps the batch
+                # queued, and spills it to disk if the writes keep failing
+                write = report_sink.mongo_writer(coll)
+                writer = lambda batch: db_breaker.call(write, batch)  # noqa: E731
+                spill = report_sink.jsonl_writer(REPORTS_SPILL_PATH)
+            else:
+                if os.path.exists(REPORTS_JSON_PATH):
+                    print(f"⚠️  {REPORTS_JSON_PATH} is no longer read; new reports go to {os.path.basename(REPORTS_PATH)}")
+                    print("   Run: python3 backend/scripts/migrate_reports.py")
+                writer = report_sink.jsonl_writer(REPORTS_PATH)
+            sink = report_sink.ReportSink(
+                writer,
+                max_queue=getattr(cfg, "REPORT_QUEUE_MAX", 10000),
+                batch_size=getattr(cfg, "REPORT_BATCH_SIZE", 500),
+                flush_interval=getattr(cfg, "REPORT_FLUSH_SECONDS", 1.0),
+                dedup_window=getattr(cfg, "REPORT_DEDUP_SECONDS", 60.0),
+                spill=spill,
+                spill_after=getattr(cfg, "REPORT_SPILL_AFTER", 3),
+            )
+            if spill is not None:
+                _restore_spilled_reports(sink)
+            _reports = sink
+    return _reports
+
+
+def _restore_spilled_reports(sink) -> None:
+    """Queue the reports an earlier run spilled to disk; they keep their ids, so a replay is not stored twice."""
+    try:
+        docs = report_sink.read_spill(REPORTS_SPILL_PATH)
+    except OSError as e:
+        print(f"⚠️  Could not read spilled reports: {e}")
+        return
+    for doc in docs:
+        if ObjectId.is_valid(doc.get("_id")):
+            doc["_id"] = ObjectId(doc["_id"])
+    if docs:
+        print(f"📦 Re-queued {len(docs)} reports spilled to {os.path.basename(REPORTS_SPILL_PATH)}")
+        sink.restore(docs)
+
+
+@app.on_event("shutdown")
+def _stop_report_sink():
+    if _reports is not None:
+        _reports.close()
+
+
+def _report_samples():
+    if _reports is None:
+        return []
+    s = _reports.stats()
+    return [
+        ("report_queue_depth", "gauge", "Reports waiting to be written", [({}, s["queued"])]),
+        ("reports_written_total", "counter", "Reports written by the write-behind sink", [({}, s["written"])]),
+        ("reports_duplicate_total", "counter", "Reports dropped as repeats within the dedup window", [({}, s["duplicates"])]),
+        ("reports_dropped_total", "counter", "Reports rejected on a full queue or lost because they could not be written", [({}, s["dropped"])]),
+        ("reports_spilled_total", "counter", "Reports spilled to disk because they could not be written", [({}, s["spilled"])]),
+    ]
+
+
+stats.register_collector(_report_samples)
+
+
 @app.post("/api/report-url")
 def report_url(input_data: URLInput):
-    payload = {"url": input_data.url}
-    coll = _get_reports_collection()
-    if coll is not None:
-        try:
-            p = urlparse(input_data.url)
-            res = coll.insert_one({"url": input_data.url, "host": p.hostname or ""})
-            return {"ok": True, "id": str(res.inserted_id)}
-        except PyMongoError as e:
-            return {"ok": False, "error": str(e)}
-    # Fallback to file if no Mongo configured
     try:
-        reports_path = os.path.join(os.path.dirname(__file__), "reports.json")
-        data = []
-        if os.path.exists(reports_path):
-            with open(reports_path, "r") as f:
-                data = json.load(f)
-        data.append(payload)
-        with open(reports_path, "w") as f:
-            json.dump(data, f, indent=2)
-        return {"ok": True, "file": "reports.json"}
+        sink = _get_report_sink()
+        doc = {"url": input_data.url, "host": urlparse(input_data.url).hostname or ""}
+        if _reports_coll is not None:
+            # Assign the id up front so it can be returned before the write
+            doc["_id"] = ObjectId()
+        status = sink.submit(doc)
     except Exception as e:
         return {"ok": False, "error": str(e)}
+    if status == "dropped":
+        return {"ok": False, "error": "report queue is full"}
+    result = {"ok": True}
+    if status == "duplicate":
+        result["duplicate"] = True
+    elif "_id" in doc:
+        result["id"] = str(doc["_id"])
+    else:
+        result["file"] = os.path.basename(REPORTS_PATH)
+    return result
 
 
 class ListInput(BaseModel):
     url: str
 
 
+def _list_upsert(item: ListInput) -> Tuple[str, Dict, Dict]:
+    """(host, filter, update) for adding a URL to the whitelist/blacklist, keyed on the reversed host."""
+    host = host_index.doc_host({"url": item.url})
+    rhost = host_index.reverse_host(host)
+    if not rhost:
+        raise ValueError(f"No host in URL: {item.url}")
+    update = {"$set": {"url": item.url, "host": host, "rhost": rhost, "imported_at": datetime.utcnow()}}
+    return host, {"rhost": rhost}, update
+
+
+def _after_list_upsert(index, host: str) -> None:
+    index.add([host])
+    _snapshot_of(index).add([host])
+    verdicts.invalidate_host(host)
+    host_profiles.invalidate_host(host)
+
+
 @app.post("/api/whitelist")
 def add_whitelist(item: ListInput):
     coll = _get_whitelist_collection()
     if coll is None:
         return {"ok": False, "error": "No database configured"}
-    p = urlparse(item.url)
     try:
-        coll.update_one({"$or": [{"url": item.url}, {"host": p.hostname or ""}]}, {"$set": {"url": item.url, "host": p.hostname or ""}}, upsert=True)
+        host, query, update = _list_upsert(item)
+        db_breaker.call(coll.update_one, query, update, upsert=True)
+        _after_list_upsert(whitelist_index, host)
         return {"ok": True}
-    except PyMongoError as e:
+    except (PyMongoError, ValueError, circuit_breaker.CircuitOpenError) as e:
         return {"ok": False, "error": str(e)}
 
 
@@ -289,14 +1275,322 @@ def add_blacklist(item: ListInput):
     coll = _get_blacklist_collection()
     if coll is None:
         return {"ok": False, "error": "No database configured"}
-    p = urlparse(item.url)
     try:
-        coll.update_one({"$or": [{"url": item.url}, {"host": p.hostname or ""}]}, {"$set": {"url": item.url, "host": p.hostname or ""}}, upsert=True)
+        host, query, update = _list_upsert(item)
+        db_breaker.call(coll.update_one, query, update, upsert=True)
+        _after_list_upsert(blacklist_index, host)
         return {"ok": True}
-    except PyMongoError as e:
+    except (PyMongoError, ValueError, circuit_breaker.CircuitOpenError) as e:
         return {"ok": False, "error": str(e)}
 
 
+def _snapshot_response(snapshot: list_snapshot.ListSnapshot, request: Request) -> Response:
+    built = snapshot.get()
+    if built is None:
+        return JSONResponse({"error": f"{snapshot.index.name.capitalize()} index not loaded"}, status_code=503)
+    version, body, etag = built
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "X-List-Version": str(version)}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/octet-stream", headers=headers)
+
+
+@app.get("/api/blacklist/snapshot")
+def get_blacklist_snapshot(request: Request):
+    return _snapshot_response(blacklist_snapshot, request)
+
+
+@app.get("/api/whitelist/snapshot")
+def get_whitelist_snapshot(request: Request):
+    return _snapshot_response(whitelist_snapshot, request)
+
+
+@app.get("/api/blacklist/delta")
+def get_blacklist_delta(since: int = 0):
+    coll = _get_blacklist_collection()
+    if coll is None:
+        # Nothing to diff against: clients fall back to the snapshot
+        return {"version": since, "full": True, "hashes": []}
+    try:
+        return db_breaker.call(
+            list_snapshot.delta, coll, since,
+            overlap_seconds=getattr(cfg, "BLACKLIST_DELTA_OVERLAP_SECONDS", 60.0),
+            limit=getattr(cfg, "BLACKLIST_DELTA_MAX", 50000),
+        )
+    except (PyMongoError, circuit_breaker.CircuitOpenError) as e:
+        return {"error": str(e)}
+
+
+def _snapshot_samples():
+    s = blacklist_snapshot.stats()
+    return [
+        ("blacklist_snapshot_hosts", "gauge", "Hosts in the published blacklist snapshot", [({}, s["hosts"])]),
+        ("blacklist_snapshot_version", "gauge", "Version (ms since epoch) of the blacklist snapshot",
+         [({}, s["version"] or 0)]),
+        ("blacklist_snapshot_rebuilds_total", "counter", "Full snapshot rebuilds from the index", [({}, s["rebuilds"])]),
+        ("blacklist_snapshot_merges_total", "counter", "Incremental snapshot merges", [({}, s["merges"])]),
+    ]
+
+
+stats.register_collector(_snapshot_samples)
+
+
+CIRCUIT_STATES = {circuit_breaker.CLOSED: 0, circuit_breaker.HALF_OPEN: 1, circuit_breaker.OPEN: 2}
+
+
+def _database_samples():
+    s = db_breaker.stats()
+    return [
+        ("mongo_circuit_state", "gauge", "MongoDB circuit breaker (0 closed, 1 half-open, 2 open)",
+         [({}, CIRCUIT_STATES[s["state"]])]),
+        ("mongo_circuit_opened_total", "counter", "Times the MongoDB circuit opened", [({}, s["opened_total"])]),
+        ("mongo_circuit_rejected_total", "counter", "Calls refused while the MongoDB circuit was open",
+         [({}, s["rejected_total"])]),
+        ("list_index_from_snapshot", "gauge", "1 while a list index is served from its local snapshot",
+         [({"list": index.name}, int(index.source == "snapshot")) for index in (whitelist_index, blacklist_index)]),
+    ]
+
+
+stats.register_collector(_database_samples)
+
+
 @app.get("/")
 def read_root():
     return {"message": "PhishShield API is running 🚀"}
+
+
+# --- Async mode -------------------------------------------------------------
+# With ASYNC_MODE=1 the endpoints below replace their sync counterparts. List
+# lookups and cache hits are in-memory and run on the event loop, Mongo goes
+# through pymongo's AsyncMongoClient and the model runs on a dedicated thread
+# pool, so in-flight requests are bounded by MAX_INFLIGHT_CHECKS rather than
+# by the size of Starlette's threadpool.
+
+try:
+    from pymongo import AsyncMongoClient
+except ImportError:  # pymongo < 4.10: fall back to sync calls on _db_executor
+    AsyncMongoClient = None
+
+_async_client = None
+_async_db = None
+_model_executor = None
+_db_executor = None
+_inflight = None
+
+
+def _get_async_collection(name: str):
+    global _async_client, _async_db
+    if AsyncMongoClient is None:
+        return None
+    if _async_db is None:
+        mongo_uri = getattr(cfg, "MONGO_URI", "")
+        if not mongo_uri:
+            return None
+        _async_client = AsyncMongoClient(mongo_uri, **_mongo_client_options())
+        _async_db = _async_client.get_default_database() if "/" in mongo_uri.split("?")[0] else _async_client["phishshield"]
+    return _async_db[name]
+
+
+async def _run_model(fn, *args):
+    global _model_executor
+    if _model_executor is None:
+        _model_executor = ThreadPoolExecutor(
+            max_workers=getattr(cfg, "MODEL_EXECUTOR_WORKERS", os.cpu_count() or 1),
+            thread_name_prefix="phishshield-model",
+        )
+    return await asyncio.get_running_loop().run_in_executor(_model_executor, fn, *args)
+
+
+async def _run_db(fn, *args):
+    global _db_executor
+    if _db_executor is None:
+        _db_executor = ThreadPoolExecutor(
+            max_workers=getattr(cfg, "DB_EXECUTOR_WORKERS", 32),
+            thread_name_prefix="phishshield-db",
+        )
+    return await asyncio.get_running_loop().run_in_executor(_db_executor, fn, *args)
+
+
+def _inflight_limit() -> asyncio.Semaphore:
+    global _inflight
+    if _inflight is None:
+        _inflight = asyncio.Semaphore(getattr(cfg, "MAX_INFLIGHT_CHECKS", 4096))
+    return _inflight
+
+
+def _indexes_loaded() -> bool:
+    return whitelist_index.loaded and blacklist_index.loaded
+
+
+async def _lookup_lists_async(host: str) -> Optional[str]:
+    if not host or _indexes_loaded():
+        return _lookup_lists(host)
+    wl = _get_async_collection("whitelist")
+    if wl is None:
+        return await _run_db(_lookup_lists, host)
+    try:
+        with stats.stage("whitelist"):
+            wl_doc = await db_breaker.call_async(wl.find_one, _list_query(whitelist_index, [host]), LIST_PROJECTION)
+        if wl_doc:
+            return "whitelist"
+        bl = _get_async_collection("blacklist")
+        with stats.stage("blacklist"):
+            bl_doc = await db_breaker.call_async(bl.find_one, _list_query(blacklist_index, [host]), LIST_PROJECTION)
+    except (PyMongoError, circuit_breaker.CircuitOpenError):
+        # Same as the sync path: fall through to the model rather than fail the check
+        return None
+    return "blacklist" if bl_doc else None
+
+
+async def check_url_async(input_data: URLInput):
+    async with _inflight_limit():
+        try:
+            with stats.stage("total"):
+                key = _cache_key(input_data.url)
+                with stats.stage("cache"):
+                    cached = verdicts.get(key, MODEL_VERSION)
+                if cached is not None:
+                    stats.decision("cache")
+                    return cached
+                return await inflight.do_async(key, lambda: _compute_and_cache_async(input_data.url, key))
+        except Exception as e:
+            return {"error": str(e)}
+
+
+async def _compute_and_cache_async(url: str, key: str) -> Dict:
+    host = _host_of(url)
+    profile = host_profiles.get(host)
+    if profile is None:
+        profile = _host_profile(host, await _lookup_lists_async(host))
+    verdict = _pre_model_verdict(profile)
+    if verdict is None:
+        proba = None
+        if _model_batcher is not None:
+            try:
+                proba = await asyncio.wait_for(asyncio.wrap_future(_model_batcher.submit(url)), _model_batcher.timeout)
+            except asyncio.TimeoutError:
+                # Same fallback as _score_one
+                _model_batcher.timeouts += 1
+        if proba is None:
+            proba = (await _run_model(_predict_probas, [url]))[0]
+        stats.decision("model")
+        verdict = _model_verdict(url, proba, profile)
+    _cache_verdict(key, host, verdict)
+    return verdict
+
+
+async def check_url_get_async(url: str, request: Request):
+    etag, not_modified = _not_modified(request, url)
+    if not_modified is not None:
+        return not_modified
+    return _verdict_response(await check_url_async(URLInput(url=url)), etag)
+
+
+async def check_urls_async(input_data: URLListInput):
+    too_large = _batch_too_large(input_data.urls)
+    if too_large:
+        return too_large
+    async with _inflight_limit():
+        try:
+            if _indexes_loaded():
+                results, hosts, to_score = _prepare_batch(input_data.urls)
+            else:
+                results, hosts, to_score = await _run_db(_prepare_batch, input_data.urls)
+            probas = await _run_model(_predict_probas, to_score) if to_score else []
+            return _finish_batch(input_data.urls, results, hosts, to_score, probas)
+        except Exception as e:
+            return {"error": str(e)}
+
+
+async def _stream_verdicts_async(urls: List[str]) -> AsyncIterator[bytes]:
+    async with _inflight_limit():
+        try:
+            if _indexes_loaded():
+                lines, hosts, chunks = _stream_head(urls)
+            else:
+                lines, hosts, chunks = await _run_db(_stream_head, urls)
+        except Exception as e:
+            yield _ndjson([{"error": str(e)}])
+            return
+        if lines:
+            yield _ndjson(lines)
+        for chunk in chunks:
+            try:
+                rows = _stream_chunk(chunk, hosts, await _run_model(_predict_probas, chunk))
+            except Exception as e:
+                rows = [{"url": url, "error": str(e)} for url in chunk]
+            yield _ndjson(rows)
+
+
+async def check_urls_stream_async(input_data: URLListInput):
+    too_large = _batch_too_large(input_data.urls)
+    if too_large:
+        return JSONResponse(too_large, status_code=413)
+    return StreamingResponse(_stream_verdicts_async(input_data.urls), media_type=NDJSON_MEDIA_TYPE)
+
+
+async def report_url_async(input_data: URLInput):
+    if _reports is None:
+        # First report creates the sink (may connect to Mongo / re-queue spilled reports)
+        return await _run_db(report_url, input_data)
+    return report_url(input_data)
+
+
+async def _add_to_list_async(name: str, index, item: ListInput, sync_handler):
+    coll = _get_async_collection(name)
+    if coll is None:
+        return await _run_db(sync_handler, item)
+    try:
+        host, query, update = _list_upsert(item)
+        await db_breaker.call_async(coll.update_one, query, update, upsert=True)
+        _after_list_upsert(index, host)
+        return {"ok": True}
+    except (PyMongoError, ValueError, circuit_breaker.CircuitOpenError) as e:
+        return {"ok": False, "error": str(e)}
+
+
+async def add_whitelist_async(item: ListInput):
+    return await _add_to_list_async("whitelist", whitelist_index, item, add_whitelist)
+
+
+async def add_blacklist_async(item: ListInput):
+    return await _add_to_list_async("blacklist", blacklist_index, item, add_blacklist)
+
+
+def _install_async_routes():
+    handlers = {
+        "/api/check-url": check_url_async,
+        "/api/check-urls": check_urls_async,
+        "/api/check-urls/stream": check_urls_stream_async,
+        "/api/report-url": report_url_async,
+        "/api/whitelist": add_whitelist_async,
+        "/api/blacklist": add_blacklist_async,
+    }
+    get_handlers = {
+        "/api/check-url": check_url_get_async,
+    }
+    app.router.routes[:] = [
+        r for r in app.router.routes
+        if not (isinstance(r, APIRoute) and (
+            (r.path in handlers and "POST" in r.methods) or (r.path in get_handlers and "GET" in r.methods)
+        ))
+    ]
+    for path, handler in handlers.items():
+        app.add_api_route(path, handler, methods=["POST"])
+    for path, handler in get_handlers.items():
+        app.add_api_route(path, handler, methods=["GET"])
+
+
+@app.on_event("shutdown")
+async def _stop_async_resources():
+    for executor in (_model_executor, _db_executor):
+        if executor is not None:
+            executor.shutdown(wait=False)
+    if _async_client is not None:
+        await _async_client.close()
+
+
+if getattr(cfg, "ASYNC_MODE", False):
+    _install_async_routes()
+
+startup_timings["import"] = time.perf_counter() - _IMPORT_STARTED
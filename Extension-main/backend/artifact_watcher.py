@@ -0,0 +1,59 @@
+"""
+Polling watcher for files that are replaced in place (model artifacts).
+
+A change is reported once the files have stopped changing: the new
+(mtime, size) signature has to be seen on two consecutive polls, so a copy
+still being written is not picked up halfway. Polling keeps it portable and
+dependency-free; artifacts change rarely and the interval is seconds.
+"""
+import logging
+import os
+import threading
+from typing import Callable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+Signature = Tuple[Optional[Tuple[int, int]], ...]
+
+
+class ArtifactWatcher(threading.Thread):
+    def __init__(self, paths: List[str], interval: float, on_change: Callable[[], object]):
+        super().__init__(name="artifact-watcher", daemon=True)
+        self.paths = list(paths)
+        self.interval = interval
+        self.on_change = on_change
+        self.changes = 0
+        self._stop_event = threading.Event()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+    def signature(self) -> Signature:
+        sig = []
+        for path in self.paths:
+            try:
+                st = os.stat(path)
+            except OSError:
+                sig.append(None)
+                continue
+            sig.append((st.st_mtime_ns, st.st_size))
+        return tuple(sig)
+
+    def run(self) -> None:
+        current = self.signature()
+        pending = None
+        while not self._stop_event.wait(self.interval):
+            sig = self.signature()
+            if sig == current:
+                pending = None
+                continue
+            if sig != pending:
+                # Changed since the last poll; wait until it settles
+                pending = sig
+                continue
+            current, pending = sig, None
+            self.changes += 1
+            try:
+                self.on_change()
+            except Exception:
+                logger.exception("Artifact change handler failed")
@@ -0,0 +1,124 @@
+"""
+Micro-batching scheduler for model calls.
+
+Concurrent callers submit single URLs; a worker thread collects them for up
+to `window` seconds (or until `max_batch` rows are queued), scores the
+whole batch with one call and resolves each caller's future with its row.
+Futures are concurrent.futures.Future, so sync handlers block on
+`.result()` and async handlers await `asyncio.wrap_future(...)`.
+
+Every future taken by the worker is resolved: a batch whose score count
+does not match its size fails all of its callers. Callers wait at most
+`timeout` seconds (see `score`); a future cancelled by a caller that gave
+up is skipped.
+"""
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    def __init__(
+        self,
+        score_batch: Callable[[List[str]], List[float]],
+        window: float = 0.002,
+        max_batch: int = 64,
+        on_batch: Optional[Callable[[int, float], None]] = None,
+        timeout: Optional[float] = None,
+    ):
+        self.score_batch = score_batch
+        self.window = window
+        self.max_batch = max_batch
+        # Called with (batch size, seconds spent scoring) after every batch
+        self.on_batch = on_batch
+        self.timeout = timeout
+        self.batches = 0
+        self.rows = 0
+        self.timeouts = 0
+        self._queue: deque = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="model-microbatcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, url: str) -> Future:
+        fut: Future = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("MicroBatcher is closed")
+            self._queue.append((url, fut))
+            if len(self._queue) == 1 or len(self._queue) >= self.max_batch:
+                self._cond.notify()
+        return fut
+
+    def score(self, url: str) -> float:
+        """
+        Blocking helper for sync callers. Raises concurrent.futures.TimeoutError
+        if the row is not scored within `timeout` seconds.
+        """
+        fut = self.submit(url)
+        try:
+            return fut.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            fut.cancel()
+            self.timeouts += 1
+            raise
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join(timeout=5)
+
+    def _take_batch(self) -> Optional[List]:
+        """The next batch (possibly empty if every caller gave up), or None once closed and drained."""
+        with self._cond:
+            while not self._queue and not self._closed:
+                self._cond.wait()
+            if not self._queue:
+                return None
+            # Hold the batch open for `window` after the first request arrives
+            deadline = time.monotonic() + self.window
+            while len(self._queue) < self.max_batch and not self._closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            n = min(len(self._queue), self.max_batch)
+            batch = [self._queue.popleft() for _ in range(n)]
+        # From here on a caller can no longer cancel its future
+        return [(url, fut) for url, fut in batch if fut.set_running_or_notify_cancel()]
+
+    def _run(self) -> None:
+        while True:
+            batch = self._take_batch()
+            if batch is None:
+                return
+            if not batch:
+                continue
+            urls = [url for url, _ in batch]
+            start = time.perf_counter()
+            try:
+                probas = list(self.score_batch(urls))
+                if len(probas) != len(batch):
+                    raise RuntimeError(f"score_batch returned {len(probas)} scores for {len(batch)} URLs")
+            except Exception as e:
+                for _, fut in batch:
+                    fut.set_exception(e)
+                continue
+            elapsed = time.perf_counter() - start
+            self.batches += 1
+            self.rows += len(batch)
+            for (_, fut), proba in zip(batch, probas):
+                fut.set_result(proba)
+            if self.on_batch is not None:
+                try:
+                    self.on_batch(len(batch), elapsed)
+                except Exception:
+                    # Only metrics; the worker must keep serving
+                    logger.exception("on_batch callback failed")
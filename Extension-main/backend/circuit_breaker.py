@@ -0,0 +1,126 @@
+"""
+Circuit breaker for calls to a dependency that can become slow or
+unavailable (MongoDB).
+
+closed     calls go through; `failure_threshold` consecutive failures open it
+open       calls are rejected immediately with CircuitOpenError for
+           `reset_seconds`
+half_open  after that, one trial call is let through; success closes the
+           circuit, failure opens it again
+"""
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple, Type, TypeVar
+
+T = TypeVar("T")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    pass
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 3,
+        reset_seconds: float = 15.0,
+        errors: Tuple[Type[BaseException], ...] = (Exception,),
+    ):
+        self.name = name
+        self.failure_threshold = max(failure_threshold, 1)
+        self.reset_seconds = reset_seconds
+        # Only these count as failures; anything else is the caller's problem
+        self.errors = errors
+        self.failures = 0
+        self.opened = 0
+        self.rejected = 0
+        self.last_error: Optional[str] = None
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_seconds:
+                return HALF_OPEN
+            return self._state
+
+    def allow(self) -> bool:
+        """Whether a call may go ahead now; counts a rejection if not."""
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_seconds:
+                self._state = HALF_OPEN
+                self._trial = False
+            if self._state == HALF_OPEN and not self._trial:
+                self._trial = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self._state = CLOSED
+            self._trial = False
+
+    def record_failure(self, error: Optional[BaseException] = None) -> None:
+        with self._lock:
+            self.failures += 1
+            if error is not None:
+                self.last_error = f"{type(error).__name__}: {error}"
+            if self._state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    self.opened += 1
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+                self._trial = False
+
+    def _release_trial(self) -> None:
+        with self._lock:
+            self._trial = False
+
+    def call(self, fn: Callable[..., T], *args, **kwargs) -> T:
+        if not self.allow():
+            raise CircuitOpenError(f"{self.name} circuit is open")
+        try:
+            result = fn(*args, **kwargs)
+        except self.errors as e:
+            self.record_failure(e)
+            raise
+        except BaseException:
+            self._release_trial()
+            raise
+        self.record_success()
+        return result
+
+    async def call_async(self, fn: Callable[..., T], *args, **kwargs) -> T:
+        if not self.allow():
+            raise CircuitOpenError(f"{self.name} circuit is open")
+        try:
+            result = await fn(*args, **kwargs)
+        except self.errors as e:
+            self.record_failure(e)
+            raise
+        except BaseException:
+            self._release_trial()
+            raise
+        self.record_success()
+        return result
+
+    def stats(self) -> Dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "opened_total": self.opened,
+            "rejected_total": self.rejected,
+            "last_error": self.last_error,
+        }
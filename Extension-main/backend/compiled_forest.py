@@ -0,0 +1,224 @@
+"""
+Flat-array evaluator for the served scikit-learn RandomForest pipeline.
+
+`compile_pipeline` copies every tree of the fitted forest into shared
+node arrays (feature, threshold, left/right child, per-class leaf value)
+and records the preprocessing steps in front of it. `CompiledForest`
+evaluates single rows and batches on those arrays with a handful of NumPy
+operations per tree level, skipping sklearn's input validation and
+per-estimator dispatch. Results match `pipeline.predict_proba` up to
+floating-point summation order.
+
+Supported pipelines: StandardScaler / MinMaxScaler / SimpleImputer (or
+"passthrough") steps followed by a RandomForestClassifier or
+ExtraTreesClassifier. Anything else raises ValueError so callers can keep
+serving the sklearn pipeline.
+"""
+import hashlib
+import json
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+
+FORMAT_VERSION = 1
+
+_ARRAYS = ("feature", "threshold", "left", "right", "value", "roots")
+
+
+class CompiledForest:
+    def __init__(
+        self,
+        feature: np.ndarray,
+        threshold: np.ndarray,
+        left: np.ndarray,
+        right: np.ndarray,
+        value: np.ndarray,
+        roots: np.ndarray,
+        max_depth: int,
+        classes: List,
+        transforms: Optional[List[Dict]] = None,
+        meta: Optional[Dict] = None,
+    ):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value  # (n_nodes, n_classes), already normalized per node
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.classes_ = np.asarray(classes)
+        self.transforms = transforms or []
+        self.meta = meta or {}
+
+    @property
+    def n_estimators(self) -> int:
+        return len(self.roots)
+
+    def _transform(self, X: np.ndarray) -> np.ndarray:
+        X = np.array(X, dtype=np.float64)  # copy: transforms work in place
+        for step in self.transforms:
+            kind = step["kind"]
+            if kind == "impute":
+                mask = np.isnan(X)
+                if mask.any():
+                    X[mask] = np.broadcast_to(step["statistics"], X.shape)[mask]
+            elif kind == "standard":
+                # Same operations, in the same order, as StandardScaler.transform
+                if step["mean"] is not None:
+                    X -= step["mean"]
+                if step["scale"] is not None:
+                    X /= step["scale"]
+            elif kind == "minmax":
+                X *= step["scale"]
+                X += step["min"]
+        # sklearn trees compare float32 features against float64 thresholds
+        return X.astype(np.float32)
+
+    def predict_proba(self, X) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        Xf = self._transform(X)
+        n_rows, n_features = Xf.shape
+        flat = Xf.ravel()
+        row_base = (np.arange(n_rows, dtype=np.int64) * n_features)[:, None]
+        node = np.broadcast_to(self.roots, (n_rows, len(self.roots))).copy()
+        # Leaves point back to themselves, so max_depth steps reach every leaf
+        for _ in range(self.max_depth):
+            x = flat.take(row_base + self.feature.take(node))
+            node = np.where(x <= self.threshold.take(node), self.left.take(node), self.right.take(node))
+        return self.value.take(node, axis=0).sum(axis=1) / len(self.roots)
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+    def save(self, path: str) -> None:
+        """Write the arrays as .npy files plus meta.json into directory `path`."""
+        os.makedirs(path, exist_ok=True)
+        for name in _ARRAYS:
+            _save_array(os.path.join(path, f"{name}.npy"), getattr(self, name))
+        transforms = []
+        for i, step in enumerate(self.transforms):
+            entry = {"kind": step["kind"], "arrays": {}}
+            for key, arr in step.items():
+                if key == "kind":
+                    continue
+                if arr is None:
+                    entry["arrays"][key] = None
+                else:
+                    fname = f"transform{i}_{key}.npy"
+                    _save_array(os.path.join(path, fname), arr)
+                    entry["arrays"][key] = fname
+            transforms.append(entry)
+        meta = dict(self.meta)
+        meta.update({
+            "format_version": FORMAT_VERSION,
+            "max_depth": self.max_depth,
+            "classes": self.classes_.tolist(),
+            "transforms": transforms,
+        })
+        # Written last: a loader that sees the new meta.json sees the new arrays
+        meta_path = os.path.join(path, "meta.json")
+        with open(f"{meta_path}.tmp", "w") as f:
+            json.dump(meta, f, indent=2)
+        os.replace(f"{meta_path}.tmp", meta_path)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = False) -> "CompiledForest":
+        with open(os.path.join(path, "meta.json"), "r") as f:
+            meta = json.load(f)
+        if meta.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported compiled model format: {meta.get('format_version')}")
+        mode = "r" if mmap else None
+        arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mode) for name in _ARRAYS}
+        transforms = []
+        for entry in meta.pop("transforms"):
+            step = {"kind": entry["kind"]}
+            for key, fname in entry["arrays"].items():
+                step[key] = None if fname is None else np.load(os.path.join(path, fname))
+            transforms.append(step)
+        return cls(
+            max_depth=meta.pop("max_depth"),
+            classes=meta.pop("classes"),
+            transforms=transforms,
+            meta=meta,
+            **arrays,
+        )
+
+
+def _save_array(path: str, arr: np.ndarray) -> None:
+    # Replaced rather than overwritten, so a running server that memory-maps
+    # the old file keeps reading intact data until it reloads
+    with open(f"{path}.tmp", "wb") as f:
+        np.save(f, arr)
+    os.replace(f"{path}.tmp", path)
+
+
+def _compile_transform(step) -> Optional[Dict]:
+    name = type(step).__name__
+    if step is None or step == "passthrough":
+        return None
+    if name == "StandardScaler":
+        return {
+            "kind": "standard",
+            "mean": None if step.mean_ is None or not step.with_mean else np.asarray(step.mean_, dtype=np.float64),
+            "scale": None if step.scale_ is None or not step.with_std else np.asarray(step.scale_, dtype=np.float64),
+        }
+    if name == "MinMaxScaler" and not getattr(step, "clip", False):
+        return {"kind": "minmax", "scale": np.asarray(step.scale_, dtype=np.float64), "min": np.asarray(step.min_, dtype=np.float64)}
+    if name == "SimpleImputer" and isinstance(step.missing_values, float) and np.isnan(step.missing_values) \
+            and not getattr(step, "add_indicator", False):
+        return {"kind": "impute", "statistics": np.asarray(step.statistics_, dtype=np.float64)}
+    raise ValueError(f"Cannot compile pipeline step {name}")
+
+
+def compile_pipeline(model) -> CompiledForest:
+    """Compile a fitted Pipeline (or bare forest) into a CompiledForest."""
+    steps = list(getattr(model, "steps", [("model", model)]))
+    transforms = [t for t in (_compile_transform(step) for _, step in steps[:-1]) if t is not None]
+    forest = steps[-1][1]
+    if not hasattr(forest, "estimators_") or getattr(forest, "n_outputs_", 1) != 1:
+        raise ValueError(f"Cannot compile estimator {type(forest).__name__}")
+
+    features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+    offset = 0
+    max_depth = 0
+    n_classes = len(forest.classes_)
+    for est in forest.estimators_:
+        tree = est.tree_
+        n = tree.node_count
+        is_leaf = tree.children_left == -1
+        node_ids = np.arange(n, dtype=np.int64) + offset
+        features.append(np.where(is_leaf, 0, tree.feature).astype(np.int64))
+        thresholds.append(np.where(is_leaf, np.inf, tree.threshold).astype(np.float64))
+        lefts.append(np.where(is_leaf, node_ids, tree.children_left + offset).astype(np.int64))
+        rights.append(np.where(is_leaf, node_ids, tree.children_right + offset).astype(np.int64))
+        # Same normalization as DecisionTreeClassifier.predict_proba
+        value = np.array(tree.value[:, 0, :n_classes], dtype=np.float64)
+        normalizer = value.sum(axis=1)[:, np.newaxis]
+        normalizer[normalizer == 0.0] = 1.0
+        values.append(value / normalizer)
+        roots.append(offset)
+        max_depth = max(max_depth, int(tree.max_depth))
+        offset += n
+
+    return CompiledForest(
+        feature=np.concatenate(features),
+        threshold=np.concatenate(thresholds),
+        left=np.concatenate(lefts),
+        right=np.concatenate(rights),
+        value=np.concatenate(values),
+        roots=np.asarray(roots, dtype=np.int64),
+        max_depth=max_depth,
+        classes=forest.classes_.tolist(),
+        transforms=transforms,
+    )
+
+
+def file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
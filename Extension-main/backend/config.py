@@ -1,8 +1,108 @@
 import os
+import tempfile
 
 
 ALLOW_ORIGINS = os.getenv("ALLOW_ORIGINS", "*").split(",")
 # Default to local MongoDB if no env var set
 MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017/phishshield")
+# Bound how long a check can wait on MongoDB (milliseconds)
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "2000"))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "2000"))
+MONGO_SOCKET_TIMEOUT_MS = int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", "3000"))
+# After this many consecutive MongoDB failures, skip it for MONGO_BREAKER_RESET_SECONDS
+MONGO_BREAKER_FAILURES = int(os.getenv("MONGO_BREAKER_FAILURES", "3"))
+MONGO_BREAKER_RESET_SECONDS = float(os.getenv("MONGO_BREAKER_RESET_SECONDS", "15"))
 PORT = int(os.getenv("PORT", "8000"))
 
+# Upper bound on URLs accepted by /api/check-urls (and its streaming form) in one request
+MAX_BATCH_URLS = int(os.getenv("MAX_BATCH_URLS", "500"))
+# /api/check-urls/stream: model-scored lines are sent in chunks of this size
+STREAM_MODEL_BATCH = int(os.getenv("STREAM_MODEL_BATCH", "32"))
+
+# In-memory whitelist/blacklist host index (see host_index.py)
+HOST_INDEX_ENABLED = os.getenv("HOST_INDEX_ENABLED", "1") == "1"
+HOST_INDEX_REFRESH_SECONDS = float(os.getenv("HOST_INDEX_REFRESH_SECONDS", "10"))
+HOST_INDEX_FULL_RELOAD_SECONDS = float(os.getenv("HOST_INDEX_FULL_RELOAD_SECONDS", "600"))
+# Parent-domain matching: a blacklisted example.com also covers evil.example.com
+BLACKLIST_MATCH_PARENTS = os.getenv("BLACKLIST_MATCH_PARENTS", "1") == "1"
+WHITELIST_MATCH_PARENTS = os.getenv("WHITELIST_MATCH_PARENTS", "0") == "1"
+# Local copies of the list indexes, loaded at startup when MongoDB is unreachable
+# (empty disables them); saved at most every LIST_SNAPSHOT_SECONDS when they change
+LIST_SNAPSHOT_DIR = os.getenv("LIST_SNAPSHOT_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "list_snapshots"))
+LIST_SNAPSHOT_SECONDS = float(os.getenv("LIST_SNAPSHOT_SECONDS", "300"))
+# /api/blacklist/delta: re-sent window behind the client's version, and the
+# most documents returned before the client is told to refetch the snapshot
+BLACKLIST_DELTA_OVERLAP_SECONDS = float(os.getenv("BLACKLIST_DELTA_OVERLAP_SECONDS", "60"))
+BLACKLIST_DELTA_MAX = int(os.getenv("BLACKLIST_DELTA_MAX", "50000"))
+
+# Server-side verdict cache (0 disables it)
+VERDICT_CACHE_SIZE = int(os.getenv("VERDICT_CACHE_SIZE", "10000"))
+VERDICT_CACHE_TTL_SECONDS = float(os.getenv("VERDICT_CACHE_TTL_SECONDS", "300"))
+# Per-host memo of list, trust and host adjustment results (0 disables it)
+HOST_MEMO_SIZE = int(os.getenv("HOST_MEMO_SIZE", "50000"))
+HOST_MEMO_TTL_SECONDS = float(os.getenv("HOST_MEMO_TTL_SECONDS", "300"))
+# Coalesce concurrent check-url requests for the same URL into one computation
+SINGLEFLIGHT_ENABLED = os.getenv("SINGLEFLIGHT_ENABLED", "1") == "1"
+
+# Cache-Control max-age for GET /api/check-url: list and trusted-pattern
+# verdicts vs model-scored ones
+CHECK_URL_LIST_MAX_AGE = int(os.getenv("CHECK_URL_LIST_MAX_AGE", "3600"))
+CHECK_URL_MODEL_MAX_AGE = int(os.getenv("CHECK_URL_MODEL_MAX_AGE", "300"))
+
+# Optional file of extra trusted domain suffixes, one "suffix [category]" per line
+TRUSTED_SUFFIXES_FILE = os.getenv("TRUSTED_SUFFIXES_FILE", "")
+
+# Per-stage latency histograms for /metrics (cache counters are always exported)
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "0") == "1"
+
+# Async serving mode: async endpoints, Mongo via AsyncMongoClient, model
+# inference on a dedicated thread pool and a cap on in-flight checks
+ASYNC_MODE = os.getenv("ASYNC_MODE", "0") == "1"
+MODEL_EXECUTOR_WORKERS = int(os.getenv("MODEL_EXECUTOR_WORKERS", str(os.cpu_count() or 1)))
+DB_EXECUTOR_WORKERS = int(os.getenv("DB_EXECUTOR_WORKERS", "32"))
+MAX_INFLIGHT_CHECKS = int(os.getenv("MAX_INFLIGHT_CHECKS", "4096"))
+
+# Serve the compiled forest (scripts/export_compiled_model.py) when it matches the .pkl
+USE_COMPILED_MODEL = os.getenv("USE_COMPILED_MODEL", "1") == "1"
+COMPILED_MODEL_PATH = os.getenv("COMPILED_MODEL_PATH", "")
+# Reload the model when its .pkl, feature_names.json or compiled meta.json change,
+# checking every MODEL_WATCH_SECONDS (0 disables the watcher)
+MODEL_WATCH_SECONDS = float(os.getenv("MODEL_WATCH_SECONDS", "0"))
+# Required as X-Admin-Token by /api/admin/* endpoints; empty disables them
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+# Micro-batching: hold single-URL model calls for up to MICROBATCH_WINDOW_MS
+# (or MICROBATCH_MAX_SIZE rows) and score them with one model call
+MICROBATCH_ENABLED = os.getenv("MICROBATCH_ENABLED", "0") == "1"
+MICROBATCH_WINDOW_MS = float(os.getenv("MICROBATCH_WINDOW_MS", "2"))
+MICROBATCH_MAX_SIZE = int(os.getenv("MICROBATCH_MAX_SIZE", "64"))
+# A caller waits this long for its batched score before scoring the URL directly
+MICROBATCH_TIMEOUT_MS = float(os.getenv("MICROBATCH_TIMEOUT_MS", "1000"))
+
+# Reports are queued in memory and written in batches by a background thread
+# (Mongo insert_many, or appended to REPORTS_FILE as JSONL without Mongo)
+REPORTS_FILE = os.getenv("REPORTS_FILE", "")
+REPORT_QUEUE_MAX = int(os.getenv("REPORT_QUEUE_MAX", "10000"))
+REPORT_BATCH_SIZE = int(os.getenv("REPORT_BATCH_SIZE", "500"))
+REPORT_FLUSH_SECONDS = float(os.getenv("REPORT_FLUSH_SECONDS", "1"))
+# Repeated reports for the same URL within this window are acknowledged but not stored
+REPORT_DEDUP_SECONDS = float(os.getenv("REPORT_DEDUP_SECONDS", "60"))
+# With Mongo, reports that cannot be written (database down, circuit open, or
+# still queued at shutdown) are appended here and written on the next start
+REPORTS_SPILL_FILE = os.getenv("REPORTS_SPILL_FILE", "")
+REPORT_SPILL_AFTER = int(os.getenv("REPORT_SPILL_AFTER", "3"))
+
+# Fast start: load the compiled model memory-mapped on a background thread
+# after the server is up (see /healthz and /readyz); sklearn is only imported
+# if the compiled artifact is missing or stale
+FAST_START = os.getenv("FAST_START", "0") == "1"
+# How long a request arriving during start-up waits for the model
+MODEL_WAIT_SECONDS = float(os.getenv("MODEL_WAIT_SECONDS", "30"))
+
+# Multi-worker serving (uvicorn --workers N): memory-map the compiled model and
+# publish host index snapshots to SHARED_INDEX_DIR so workers share the pages
+SHARED_MEMORY = os.getenv("SHARED_MEMORY", "0") == "1"
+SHARED_INDEX_DIR = os.getenv(
+    "SHARED_INDEX_DIR",
+    "/dev/shm/phishshield" if os.path.isdir("/dev/shm") else os.path.join(tempfile.gettempdir(), "phishshield"),
+)
@@ -0,0 +1,256 @@
+"""
+URL feature extraction for the phishing model.
+
+`build_ml_features` is the reference implementation the model was trained
+with. `FeatureExtractor` computes the same values for the serving path
+without building a dict or a DataFrame.
+
+The model's host features (`feat_subdomain_count`, `feat_suffix_length`)
+split the hostname naively, so "bbc.co.uk" counts as a subdomain of "co.uk";
+they are kept as trained. PSL_FEATURES are the same measures taken from the
+public suffix list, for models trained with them.
+"""
+import re
+import threading
+from functools import lru_cache
+from typing import Dict, Iterable, List, Tuple
+from urllib.parse import urlparse
+
+import numpy as np
+
+try:
+    from .public_suffix import parse_host  # type: ignore
+except ImportError:
+    from public_suffix import parse_host  # type: ignore
+
+
+def _count(pattern: str, text: str) -> int:
+    return len(re.findall(pattern, text))
+
+
+def _is_ip(host: str) -> int:
+    return 1 if re.fullmatch(r"\d+\.\d+\.\d+\.\d+", host or "") else 0
+
+
+def build_ml_features(url: str, feature_names: List[str]) -> Dict[str, float]:
+    parsed = urlparse(url)
+    host = parsed.hostname or ""
+    path = parsed.path or ""
+    suffix = (host.split(".")[-1] if "." in host else "")
+    subdomains = host.split(".")[:-2] if host.count(".") >= 2 else []
+
+    text = url or ""
+
+    feature_values: Dict[str, float] = {
+        "feat_url_length": float(len(text)),
+        "feat_hostname_length": float(len(host)),
+        "feat_path_length": float(len(path)),
+        "feat_count_hyphen": float(text.count("-")),
+        "feat_count_at": float(text.count("@")),
+        "feat_count_dot": float(text.count(".")),
+        "feat_count_slash": float(text.count("/")),
+        "feat_count_percent": float(text.count("%")),
+        "feat_count_digits": float(_count(r"\d", text)),
+        "feat_count_letters": float(_count(r"[A-Za-z]", text)),
+        "feat_has_login": 1.0 if re.search(r"login", text, re.I) else 0.0,
+        "feat_has_secure": 1.0 if re.search(r"secure", text, re.I) else 0.0,
+        "feat_has_bank": 1.0 if re.search(r"bank", text, re.I) else 0.0,
+        "feat_has_account": 1.0 if re.search(r"account", text, re.I) else 0.0,
+        "feat_has_verify": 1.0 if re.search(r"verify", text, re.I) else 0.0,
+        "feat_has_password": 1.0 if re.search(r"password|passwd|pwd", text, re.I) else 0.0,
+        "feat_has_signin": 1.0 if re.search(r"sign\s*in|signin", text, re.I) else 0.0,
+        "feat_total_keywords": 0.0,  # computed below
+        "feat_subdomain_count": float(len([s for s in subdomains if s])),
+        "feat_domain_length": float(len(host.split(".")[0])) if host else 0.0,
+        "feat_suffix_length": float(len(suffix)),
+        "feat_use_https": 1.0 if parsed.scheme == "https" else 0.0,
+        "feat_use_ip": float(_is_ip(host)),
+    }
+
+    keyword_flags = [
+        feature_values["feat_has_login"],
+        feature_values["feat_has_secure"],
+        feature_values["feat_has_bank"],
+        feature_values["feat_has_account"],
+        feature_values["feat_has_verify"],
+        feature_values["feat_has_password"],
+        feature_values["feat_has_signin"],
+    ]
+    feature_values["feat_total_keywords"] = float(sum(1 for v in keyword_flags if v == 1.0))
+
+    if any(name in PSL_FEATURES for name in feature_names):
+        feature_values.update(zip(PSL_FEATURES, _psl_values(host)))
+
+    # Only return the requested features in the exact order the model expects
+    return {name: feature_values.get(name, 0.0) for name in feature_names}
+
+
+PSL_FEATURES = [
+    "feat_psl_subdomain_count",
+    "feat_psl_suffix_length",
+    "feat_registrable_domain_length",
+]
+
+
+def _psl_values(host: str) -> List[float]:
+    parts = parse_host(host)
+    return [
+        float(sum(1 for s in parts.subdomains if s)),
+        float(len(parts.suffix)),
+        float(len(parts.domain)),
+    ]
+
+
+# Order of the values produced by FeatureExtractor._values
+_CANONICAL_FEATURES = [
+    "feat_url_length",
+    "feat_hostname_length",
+    "feat_path_length",
+    "feat_count_hyphen",
+    "feat_count_at",
+    "feat_count_dot",
+    "feat_count_slash",
+    "feat_count_percent",
+    "feat_count_digits",
+    "feat_count_letters",
+    "feat_has_login",
+    "feat_has_secure",
+    "feat_has_bank",
+    "feat_has_account",
+    "feat_has_verify",
+    "feat_has_password",
+    "feat_has_signin",
+    "feat_total_keywords",
+    "feat_subdomain_count",
+    "feat_domain_length",
+    "feat_suffix_length",
+    "feat_use_https",
+    "feat_use_ip",
+] + PSL_FEATURES
+
+# One alternation for all keyword flags, matched against the lowercased URL.
+# No keyword overlaps the start of another, so a single non-overlapping scan
+# sees every keyword that the per-flag re.search calls would.
+_KEYWORD_RE = re.compile(r"(login)|(secure)|(bank)|(account)|(verify)|(password|passwd|pwd)|(sign\s*in|signin)")
+_IP_RE = re.compile(r"\d+\.\d+\.\d+\.\d+")
+
+# bytes.translate deletion tables: keep only digits / only ASCII letters
+_NON_DIGITS = bytes(c for c in range(256) if not 48 <= c <= 57)
+_NON_LETTERS = bytes(c for c in range(256) if not (65 <= c <= 90 or 97 <= c <= 122))
+
+# Hosts whose host-level feature values FeatureExtractor keeps
+HOST_CACHE_SIZE = 65536
+
+
+class FeatureExtractor:
+    """
+    Fast path for build_ml_features.
+
+    Keyword flags come from one regex scan, character classes are counted
+    with C-level str.count / bytes.translate, and values are written straight
+    into a float row in `feature_names` order. Values that only depend on the
+    hostname are memoized per host, so URLs on a known host only pay for
+    their path and query. Non-ASCII URLs fall back to build_ml_features so
+    results stay identical to training.
+    """
+
+    def __init__(self, feature_names: List[str], host_cache_size: int = HOST_CACHE_SIZE):
+        self.feature_names = list(feature_names)
+        self.n_features = len(self.feature_names)
+        # (destination column, index into _values) for every known feature;
+        # unknown names stay 0.0 like build_ml_features' .get(name, 0.0)
+        self._take = [
+            (i, _CANONICAL_FEATURES.index(name))
+            for i, name in enumerate(self.feature_names)
+            if name in _CANONICAL_FEATURES
+        ]
+        # The PSL lookup is skipped for models that do not use its features
+        self._psl = any(name in PSL_FEATURES for name in self.feature_names)
+        self.host_values = lru_cache(maxsize=host_cache_size)(self._host_values)
+        self._local = threading.local()
+
+    def _host_values(self, host: str) -> Tuple[float, ...]:
+        """
+        (hostname_length, subdomain_count, domain_length, suffix_length,
+        use_ip), followed by the PSL values when the model uses them.
+        """
+        labels = host.split(".")
+        values = (
+            float(len(host)),
+            float(sum(1 for s in labels[:-2] if s)) if len(labels) >= 3 else 0.0,
+            float(len(labels[0])) if host else 0.0,
+            float(len(labels[-1])) if len(labels) > 1 else 0.0,
+            1.0 if _IP_RE.fullmatch(host) else 0.0,
+        )
+        if self._psl:
+            values += tuple(_psl_values(host))
+        return values
+
+    def host_stats(self) -> Dict:
+        info = self.host_values.cache_info()
+        return {"size": info.currsize, "hits": info.hits, "misses": info.misses}
+
+    def _values(self, url: str) -> List[float]:
+        text = url or ""
+        parsed = urlparse(url)
+        hostname_length, subdomain_count, domain_length, suffix_length, use_ip, *psl = \
+            self.host_values(parsed.hostname or "")
+
+        flags = [0.0] * 7
+        for m in _KEYWORD_RE.finditer(text.lower()):
+            flags[m.lastindex - 1] = 1.0
+
+        raw = text.encode("ascii")
+        return [
+            float(len(text)),
+            hostname_length,
+            float(len(parsed.path or "")),
+            float(text.count("-")),
+            float(text.count("@")),
+            float(text.count(".")),
+            float(text.count("/")),
+            float(text.count("%")),
+            float(len(raw.translate(None, _NON_DIGITS))),
+            float(len(raw.translate(None, _NON_LETTERS))),
+            *flags,
+            float(sum(flags)),
+            subdomain_count,
+            domain_length,
+            suffix_length,
+            1.0 if parsed.scheme == "https" else 0.0,
+            use_ip,
+            *psl,
+        ]
+
+    def fill(self, url: str, out: np.ndarray) -> np.ndarray:
+        """Write the features of `url` into the 1-D float array `out`."""
+        if not (url or "").isascii():
+            features = build_ml_features(url, self.feature_names)
+            out[:] = [features[name] for name in self.feature_names]
+            return out
+        values = self._values(url)
+        out[:] = 0.0
+        for dst, src in self._take:
+            out[dst] = values[src]
+        return out
+
+    def row(self, url: str) -> np.ndarray:
+        """
+        Features of `url` as a (1, n_features) array.
+
+        The array is a per-thread buffer reused by the next call, so consume
+        it (e.g. pass it to predict_proba) before extracting another URL.
+        """
+        buf = getattr(self._local, "row", None)
+        if buf is None:
+            buf = self._local.row = np.zeros((1, self.n_features), dtype=np.float64)
+        self.fill(url, buf[0])
+        return buf
+
+    def matrix(self, urls: Iterable[str]) -> np.ndarray:
+        """Features of many URLs as a new (len(urls), n_features) array."""
+        urls = list(urls)
+        out = np.zeros((len(urls), self.n_features), dtype=np.float64)
+        for i, url in enumerate(urls):
+            self.fill(url, out[i])
+        return out
@@ -0,0 +1,329 @@
+"""
+In-process index of whitelist/blacklist hosts.
+
+Hosts are stored as sorted 64-bit hashes (first 8 bytes of SHA-256), so a
+million entries take ~8 MB and a lookup is a binary search per candidate
+host. Recent additions go to a small overlay set that is merged into the
+sorted array once it grows past MERGE_THRESHOLD.
+
+With `shared_dir`, every sorted array is also written to a content-addressed
+file in that directory and served from a read-only memory map. Worker
+processes that build the same index map the same file, so the OS keeps one
+copy of the pages for all of them.
+"""
+import glob
+import hashlib
+import logging
+import os
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from datetime import datetime
+from typing import Callable, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import numpy as np
+
+try:
+    from .public_suffix import parse_host  # type: ignore
+except ImportError:
+    from public_suffix import parse_host  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+MERGE_THRESHOLD = 4096
+
+
+def host_hash(host: str) -> int:
+    return int.from_bytes(hashlib.sha256(host.encode("utf-8")).digest()[:8], "big")
+
+
+def parent_hosts(host: str) -> List[str]:
+    """
+    host itself followed by its parent domains down to the registrable
+    domain, so a listed "example.co.uk" covers "evil.example.co.uk" but a
+    listed public suffix ("co.uk", "github.io") covers nothing below it.
+    """
+    depth = len(parse_host(host).subdomains)
+    labels = host.split(".")
+    return [".".join(labels[i:]) for i in range(depth + 1)]
+
+
+def reverse_host(host: str) -> str:
+    """
+    List key for a host: lower-cased, trailing dot dropped, labels reversed
+    ("Evil.Example.com." -> "com.example.evil"). Parent domains become
+    prefixes of their subdomains' keys, and equality lookups on the key are
+    case-sensitive, so both kinds of query can use a plain index.
+    """
+    host = (host or "").strip().rstrip(".").lower()
+    return ".".join(reversed(host.split("."))) if host else ""
+
+
+def rhost_keys(host: str, match_parents: bool = False) -> List[str]:
+    """Keys to look up for `host`: its own, plus its parent domains' when matching parents."""
+    if not host:
+        return []
+    hosts = parent_hosts(host.lower()) if match_parents else [host.lower()]
+    return [reverse_host(h) for h in hosts]
+
+
+RHOST_INDEX_OPTIONS = {
+    "unique": True,
+    # Documents without a usable host have no key and must not collide on null
+    "partialFilterExpression": {"rhost": {"$type": "string"}},
+}
+
+
+LOAD_PROJECTION = {"rhost": 1, "host": 1, "url": 1, "imported_at": 1}
+
+
+def _newer(current: Optional[datetime], candidate) -> Optional[datetime]:
+    if not isinstance(candidate, datetime):
+        return current
+    return candidate if current is None or candidate > current else current
+
+
+def doc_host(doc: dict) -> str:
+    if doc.get("rhost"):
+        return reverse_host(doc["rhost"])
+    host = doc.get("host") or ""
+    if not host and doc.get("url"):
+        url = doc["url"]
+        try:
+            host = urlparse(url if "://" in url else f"http://{url}").hostname or ""
+        except ValueError:
+            host = ""
+    return host.lower()
+
+
+class HostIndex:
+    """Set of hosts supporting exact and (optionally) parent-domain matching."""
+
+    def __init__(self, name: str, match_parents: bool = False, shared_dir: Optional[str] = None):
+        self.name = name
+        self.match_parents = match_parents
+        self.shared_dir = shared_dir
+        self.loaded = False
+        self._sorted = array("Q")
+        self._overlay = set()
+        self._last_id = None
+        # Newest `imported_at` among the documents loaded so far (see list_snapshot)
+        self.stamp: Optional[datetime] = None
+        # "mongo", or "snapshot" when loaded from a local copy (see list_snapshot.load_index)
+        self.source = "mongo"
+        self._write_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._sorted) + len(self._overlay)
+
+    def _has_hash(self, h: int) -> bool:
+        if h in self._overlay:
+            return True
+        data = self._sorted
+        if isinstance(data, np.ndarray):
+            i = int(np.searchsorted(data, np.uint64(h)))
+        else:
+            i = bisect_left(data, h)
+        return i < len(data) and int(data[i]) == h
+
+    def contains(self, host: str) -> bool:
+        if not host:
+            return False
+        candidates = parent_hosts(host) if self.match_parents else [host]
+        return any(self._has_hash(host_hash(h)) for h in candidates)
+
+    def replace(self, hosts: Iterable[str], last_id=None, stamp: Optional[datetime] = None) -> bool:
+        """
+        Swap in a freshly built index (readers keep using the old one until then).
+        Returns True if the set of hosts changed.
+        """
+        data = array("Q", sorted({host_hash(h) for h in hosts if h}))
+        with self._write_lock:
+            old = self._sorted
+            changed = (
+                not self.loaded
+                or len(data) != len(old)
+                or data.tobytes() != old.tobytes()
+                or bool(self._overlay - set(data))
+            )
+            self._sorted = self._share(data)
+            self._overlay = set()
+            self._last_id = last_id
+            self.stamp = stamp
+            self.source = "mongo"
+            self.loaded = True
+        return changed
+
+    def replace_hashes(self, hashes: Iterable[int], stamp: Optional[datetime] = None) -> None:
+        """Swap in precomputed host hashes from a local snapshot, until the next load_from."""
+        data = array("Q", sorted(int(h) for h in hashes))
+        with self._write_lock:
+            self._sorted = self._share(data)
+            self._overlay = set()
+            self._last_id = None
+            self.stamp = stamp
+            self.source = "snapshot"
+            self.loaded = True
+
+    def add(self, hosts: Iterable[str]) -> None:
+        with self._write_lock:
+            for h in hosts:
+                if h:
+                    self._overlay.add(host_hash(h.lower()))
+            if len(self._overlay) >= MERGE_THRESHOLD:
+                self._merge()
+
+    def _merge(self) -> None:
+        merged = set(self._overlay)
+        self._sorted = self._share(array("Q", sorted(set(map(int, self._sorted)) | merged)))
+        # Drop only what was merged; the new array is already visible to readers
+        self._overlay = self._overlay - merged
+
+    def hashes(self) -> array:
+        """Sorted host hashes including the overlay, e.g. to rebuild the index in another process."""
+        with self._write_lock:
+            return array("Q", sorted(set(map(int, self._sorted)) | self._overlay))
+
+    @classmethod
+    def from_hashes(cls, name: str, hashes: Iterable[int], match_parents: bool = False) -> "HostIndex":
+        index = cls(name, match_parents=match_parents)
+        index._sorted = array("Q", sorted(hashes))
+        index.loaded = True
+        return index
+
+    def _share(self, data: array):
+        """
+        `data`, or a read-only memory map of a file with the same content when
+        `shared_dir` is set. Falls back to `data` if the file cannot be used.
+        """
+        if not self.shared_dir or not data:
+            return data
+        raw = data.tobytes()
+        path = os.path.join(self.shared_dir, f"{self.name}-{hashlib.sha256(raw).hexdigest()[:16]}.u64")
+        try:
+            if not os.path.exists(path):
+                os.makedirs(self.shared_dir, exist_ok=True)
+                tmp = f"{path}.{os.getpid()}.tmp"
+                with open(tmp, "wb") as f:
+                    f.write(raw)
+                os.replace(tmp, path)
+            shared = np.memmap(path, dtype=np.uint64, mode="r")
+        except (OSError, ValueError) as e:
+            logger.warning("Could not share %s index via %s: %s", self.name, path, e)
+            return data
+        # Older snapshots can go; processes still mapping them keep their pages
+        for old in glob.glob(os.path.join(self.shared_dir, f"{self.name}-*.u64")):
+            if old != path:
+                try:
+                    os.remove(old)
+                except OSError:
+                    pass
+        return shared
+
+    def load_from(self, coll) -> bool:
+        """Full reload from a Mongo collection. Returns True if the hosts changed."""
+        hosts = []
+        last_id = None
+        stamp = None
+        for doc in coll.find({}, LOAD_PROJECTION):
+            hosts.append(doc_host(doc))
+            if last_id is None or doc["_id"] > last_id:
+                last_id = doc["_id"]
+            stamp = _newer(stamp, doc.get("imported_at"))
+        changed = self.replace(hosts, last_id, stamp)
+        logger.info("%s index loaded: %d hosts", self.name, len(self))
+        return changed
+
+    def refresh_from(self, coll) -> List[str]:
+        """Pick up documents inserted since the last load/refresh. Returns the new hosts."""
+        query = {"_id": {"$gt": self._last_id}} if self._last_id is not None else {}
+        new_hosts = []
+        last_id = self._last_id
+        stamp = self.stamp
+        for doc in coll.find(query, LOAD_PROJECTION).sort("_id", 1):
+            new_hosts.append(doc_host(doc))
+            last_id = doc["_id"]
+            stamp = _newer(stamp, doc.get("imported_at"))
+        if new_hosts:
+            self.add(new_hosts)
+            self._last_id = last_id
+            self.stamp = stamp
+        return [h for h in new_hosts if h]
+
+
+class HostIndexRefresher(threading.Thread):
+    """
+    Background poller keeping HostIndex instances in sync with Mongo.
+
+    Inserts are picked up every `interval` seconds by `_id`; a full reload every
+    `full_reload_interval` seconds catches deletions and in-place edits.
+    Change streams would need a replica set, so plain polling is used.
+
+    With a `breaker`, sources are skipped while it is open and every poll
+    reports to it; an index serving a local snapshot is fully reloaded as
+    soon as Mongo answers again.
+    """
+
+    def __init__(
+        self,
+        sources: List[Tuple[HostIndex, Callable[[], Optional[object]]]],
+        interval: float,
+        full_reload_interval: float,
+        on_change: Optional[Callable[[HostIndex, Optional[List[str]]], None]] = None,
+        breaker=None,
+        on_cycle: Optional[Callable[[], None]] = None,
+    ):
+        super().__init__(name="host-index-refresher", daemon=True)
+        self.sources = sources
+        self.interval = interval
+        self.full_reload_interval = full_reload_interval
+        # Called with the new hosts after an incremental refresh, or with None
+        # after a full reload that changed the index
+        self.on_change = on_change
+        self.breaker = breaker
+        # Called after every pass over the sources
+        self.on_cycle = on_cycle
+        self._stop_event = threading.Event()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+    def run(self) -> None:
+        last_full = time.monotonic()
+        while not self._stop_event.wait(self.interval):
+            full = self.full_reload_interval > 0 and time.monotonic() - last_full >= self.full_reload_interval
+            for index, get_coll in self.sources:
+                if self.breaker is not None and not self.breaker.allow():
+                    continue
+                try:
+                    self._refresh(index, get_coll, full)
+                except Exception as e:
+                    if self.breaker is not None and isinstance(e, self.breaker.errors):
+                        self.breaker.record_failure(e)
+                        logger.warning("Refreshing %s index failed: %s", index.name, e)
+                    else:
+                        logger.exception("Refreshing %s index failed", index.name)
+                else:
+                    if self.breaker is not None:
+                        self.breaker.record_success()
+            if full:
+                last_full = time.monotonic()
+            if self.on_cycle:
+                try:
+                    self.on_cycle()
+                except Exception:
+                    logger.exception("Index refresher cycle hook failed")
+
+    def _refresh(self, index: HostIndex, get_coll: Callable[[], Optional[object]], full: bool) -> None:
+        coll = get_coll()
+        if coll is None:
+            return
+        if full or not index.loaded or index.source != "mongo":
+            if index.load_from(coll) and self.on_change:
+                self.on_change(index, None)
+        else:
+            new_hosts = index.refresh_from(coll)
+            if new_hosts and self.on_change:
+                self.on_change(index, new_hosts)
@@ -0,0 +1,127 @@
+"""
+Bounded LRU memo of the host-level parts of a verdict, with per-entry TTL.
+
+The verdict cache is keyed on the full URL, so sites that put per-user
+tokens in their paths miss it on every link. Most of a verdict only depends
+on the hostname, though: the list lookup, the trusted-pattern check and the
+subdomain/TLD/personal-domain factors of adjust_score_for_context. Those
+are kept here per host, so a new URL on a known host only needs its path
+features and a model call. (The host-level model features are memoized by
+FeatureExtractor itself, since they belong to the serving model.)
+
+List changes evict a host and its subdomains, as in VerdictCache, looking
+only at hosts under the same registrable domain.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Optional, Tuple
+
+try:
+    from .verdict_cache import affected_hosts, domain_key  # type: ignore
+except ImportError:
+    from verdict_cache import affected_hosts, domain_key  # type: ignore
+
+
+class HostProfile(NamedTuple):
+    # "whitelist"/"blacklist" if the host is listed, else None
+    listed: Optional[str]
+    # check_trusted_host result
+    trusted: Tuple[bool, str]
+    # smart_whitelist.host_adjustments: (factor, reason) in the order they apply
+    factors: Tuple[Tuple[float, str], ...]
+
+
+class HostMemo:
+    def __init__(self, maxsize: int = 50000, ttl: float = 300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        # host -> (expires_at, profile)
+        self._entries: "OrderedDict[str, Tuple[float, HostProfile]]" = OrderedDict()
+        # registrable domain -> hosts in _entries
+        self._by_domain: Dict[str, set] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, host: str) -> Optional[HostProfile]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(host)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    self._remove(host)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(host)
+            self.hits += 1
+            return entry[1]
+
+    def peek(self, host: str) -> Optional[HostProfile]:
+        """Like get(), but leaves hit/miss counters and LRU order alone."""
+        entry = self._entries.get(host)
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        return entry[1]
+
+    def put(self, host: str, profile: HostProfile) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            if host not in self._entries:
+                self._by_domain.setdefault(domain_key(host), set()).add(host)
+            self._entries[host] = (time.monotonic() + self.ttl, profile)
+            self._entries.move_to_end(host)
+            while len(self._entries) > self.maxsize:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate_host(self, host: str) -> int:
+        """Drop `host` and any of its subdomains. Returns the number removed."""
+        host = (host or "").lower()
+        if not host:
+            return 0
+        with self._lock:
+            stale = affected_hosts(self._by_domain, host)
+            for h in stale:
+                self._remove(h)
+            self.invalidations += len(stale)
+        return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+            self._by_domain.clear()
+
+    def stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / total) if total else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+    def _remove(self, host: str) -> None:
+        del self._entries[host]
+        domain = domain_key(host)
+        hosts = self._by_domain.get(domain)
+        if hosts is not None:
+            hosts.discard(host)
+            if not hosts:
+                del self._by_domain[domain]
@@ -0,0 +1,189 @@
+"""
+Versioned binary snapshot of a HostIndex, plus deltas since a version, so
+clients (the extension's background worker) can answer list hits locally.
+
+A version is the newest `imported_at` the index has seen, in milliseconds
+since the epoch. It comes from the documents themselves, so every worker
+serving the same collection reports the same version for the same data.
+
+Snapshot layout (big-endian):
+   0  4  magic b"PSHL"
+   4  1  format (1)
+   5  1  flags (bit 0: parent domains match, as in HostIndex.match_parents)
+   6  2  reserved
+   8  8  version
+  16  4  host count
+  20  4  reserved
+  24  8  per host: host_index.host_hash of the lower-cased host, ascending
+
+The snapshot is kept up to date in place: hosts added to the index are
+merged into the sorted array on the next read, and only a full index reload
+rebuilds it. Deltas come straight from the collection's `imported_at` field
+and re-send a short overlap window, since imports write in batches and the
+index picks them up by polling; adding a hash twice is harmless.
+
+The same layout is used to persist whole indexes to disk (save_index /
+load_index), so lookups can start from the last copy when Mongo is down.
+"""
+import hashlib
+import os
+import struct
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+try:
+    from .host_index import LOAD_PROJECTION, HostIndex, doc_host, host_hash  # type: ignore
+except ImportError:
+    from host_index import LOAD_PROJECTION, HostIndex, doc_host, host_hash  # type: ignore
+
+MAGIC = b"PSHL"
+FORMAT = 1
+FLAG_MATCH_PARENTS = 1
+HEADER = struct.Struct(">4sBB2xQI4x")
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def to_version(stamp: Optional[datetime]) -> int:
+    """Milliseconds since the epoch for an `imported_at` value (naive values are UTC)."""
+    if stamp is None:
+        return 0
+    if stamp.tzinfo is not None:
+        stamp = stamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return (stamp - _EPOCH) // timedelta(milliseconds=1)
+
+
+def from_version(version: int) -> datetime:
+    return _EPOCH + timedelta(milliseconds=version)
+
+
+def encode(hashes: np.ndarray, version: int, match_parents: bool) -> bytes:
+    flags = FLAG_MATCH_PARENTS if match_parents else 0
+    return HEADER.pack(MAGIC, FORMAT, flags, version, len(hashes)) + hashes.astype(">u8").tobytes()
+
+
+def decode(body: bytes) -> Tuple[int, bool, np.ndarray]:
+    """(version, match_parents, sorted hashes); ValueError if `body` is not a snapshot."""
+    if len(body) < HEADER.size:
+        raise ValueError("snapshot too short")
+    magic, fmt, flags, version, count = HEADER.unpack_from(body)
+    if magic != MAGIC or fmt != FORMAT:
+        raise ValueError("not a host list snapshot")
+    if len(body) != HEADER.size + 8 * count:
+        raise ValueError("truncated snapshot")
+    hashes = np.frombuffer(body, dtype=">u8", offset=HEADER.size).astype(np.uint64)
+    return version, bool(flags & FLAG_MATCH_PARENTS), hashes
+
+
+def read_header(path: str) -> Optional[Tuple[int, int]]:
+    """(version, count) of the snapshot at `path`, or None if there is none."""
+    try:
+        with open(path, "rb") as f:
+            magic, fmt, _, version, count = HEADER.unpack(f.read(HEADER.size))
+    except (OSError, struct.error):
+        return None
+    return (version, count) if magic == MAGIC and fmt == FORMAT else None
+
+
+def save_index(index: HostIndex, path: str) -> Tuple[int, int]:
+    """Write `index` to `path` atomically. Returns (version, count)."""
+    version = to_version(index.stamp)
+    hashes = np.frombuffer(index.hashes().tobytes(), dtype=np.uint64)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(encode(hashes, version, index.match_parents))
+    os.replace(tmp, path)
+    return version, len(hashes)
+
+
+def load_index(index: HostIndex, path: str) -> int:
+    """Load `index` from a snapshot written by save_index. Returns the host count."""
+    with open(path, "rb") as f:
+        version, _, hashes = decode(f.read())
+    index.replace_hashes(hashes, from_version(version) if version else None)
+    return len(hashes)
+
+
+class ListSnapshot:
+    def __init__(self, index: HostIndex):
+        self.index = index
+        self.rebuilds = 0
+        self.merges = 0
+        self._hashes = np.empty(0, dtype=np.uint64)
+        self._pending = set()
+        self._full = True
+        self._built: Optional[Tuple[int, bytes, str]] = None
+        self._lock = threading.Lock()
+
+    def add(self, hosts: Iterable[str]) -> None:
+        """Hosts just added to the index; merged on the next get()."""
+        with self._lock:
+            self._pending.update(host_hash(h.lower()) for h in hosts if h)
+            self._built = None
+
+    def invalidate(self) -> None:
+        """The index was reloaded (e.g. deletions); rebuild from it on the next get()."""
+        with self._lock:
+            self._full = True
+            self._pending.clear()
+            self._built = None
+
+    def get(self) -> Optional[Tuple[int, bytes, str]]:
+        """(version, body, etag), or None until the index has been loaded."""
+        if not self.index.loaded:
+            return None
+        with self._lock:
+            # Read the version before the hashes so it never claims more than the body has
+            version = to_version(self.index.stamp)
+            if self._built is not None and self._built[0] == version:
+                return self._built
+            if self._full:
+                self._hashes = np.frombuffer(self.index.hashes().tobytes(), dtype=np.uint64)
+                self._full = False
+                self.rebuilds += 1
+            elif self._pending:
+                added = np.fromiter(self._pending, dtype=np.uint64, count=len(self._pending))
+                self._hashes = np.union1d(self._hashes, added)
+                self.merges += 1
+            self._pending.clear()
+            body = encode(self._hashes, version, self.index.match_parents)
+            etag = f'"{version:x}-{hashlib.sha256(body).hexdigest()[:16]}"'
+            self._built = (version, body, etag)
+            return self._built
+
+    def stats(self) -> Dict:
+        built = self._built
+        return {
+            "version": built[0] if built else None,
+            "hosts": len(self._hashes),
+            "pending": len(self._pending),
+            "rebuilds": self.rebuilds,
+            "merges": self.merges,
+        }
+
+
+def delta(coll, since: int, overlap_seconds: float = 60.0, limit: int = 50000) -> Dict:
+    """
+    Hashes of hosts imported after version `since` (minus the overlap), as
+    16-digit hex strings. `full` is set when the client has no version yet
+    or more than `limit` documents changed; it should fetch the snapshot.
+    """
+    if since <= 0:
+        return {"version": since, "full": True, "hashes": []}
+    query = {"imported_at": {"$gt": from_version(since) - timedelta(seconds=overlap_seconds)}}
+    docs = list(coll.find(query, {**LOAD_PROJECTION, "_id": 0}).limit(limit + 1))
+    if len(docs) > limit:
+        return {"version": since, "full": True, "hashes": []}
+    version = since
+    hashes = set()
+    for doc in docs:
+        host = doc_host(doc)
+        if host:
+            hashes.add(host_hash(host))
+        if isinstance(doc.get("imported_at"), datetime):
+            version = max(version, to_version(doc["imported_at"]))
+    return {"version": version, "full": False, "hashes": [f"{h:016x}" for h in sorted(hashes)]}
@@ -0,0 +1,186 @@
+"""
+Optional latency/decision instrumentation for the check-url pipeline,
+rendered in the Prometheus text exposition format.
+
+When disabled, `stage()` hands back a shared no-op context manager and the
+counters return immediately, so instrumented code pays one attribute
+lookup and a trivial `with` per stage.
+"""
+import sys
+import threading
+import time
+from bisect import bisect_left
+from contextlib import nullcontext
+from typing import Callable, Dict, Iterable, List, Tuple
+
+# Seconds; the check-url stages range from microseconds (index lookups)
+# to tens of milliseconds (model under load)
+DEFAULT_BUCKETS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+)
+
+_NOOP = nullcontext()
+
+# (name, type, help, [(labels, value)])
+Sample = Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]
+
+
+class Histogram:
+    def __init__(self, buckets: Iterable[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+            self.count += 1
+
+
+class _StageTimer:
+    __slots__ = ("histogram", "start")
+
+    def __init__(self, histogram: Histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start)
+        return False
+
+
+class Metrics:
+    def __init__(self, enabled: bool = False, namespace: str = "phishshield"):
+        self.enabled = enabled
+        self.namespace = namespace
+        self._stages: Dict[str, Histogram] = {}
+        self._histograms: Dict[str, Tuple[str, Histogram]] = {}
+        self._decisions: Dict[str, int] = {}
+        self._counters: Dict[str, Tuple[str, int]] = {}
+        self._collectors: List[Callable[[], Iterable[Sample]]] = []
+        self._lock = threading.Lock()
+
+    def stage(self, name: str):
+        """Context manager timing one pipeline stage."""
+        if not self.enabled:
+            return _NOOP
+        hist = self._stages.get(name)
+        if hist is None:
+            with self._lock:
+                hist = self._stages.setdefault(name, Histogram())
+        return _StageTimer(hist)
+
+    def decision(self, kind: str) -> None:
+        """Count which stage decided a verdict (cache, whitelist, blacklist, trusted_pattern, model)."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._decisions[kind] = self._decisions.get(kind, 0) + 1
+
+    def observe(self, name: str, value: float, help_text: str = "", buckets: Iterable[float] = DEFAULT_BUCKETS) -> None:
+        """Record a value in a free-standing histogram (e.g. batch sizes)."""
+        if not self.enabled:
+            return
+        entry = self._histograms.get(name)
+        if entry is None:
+            with self._lock:
+                entry = self._histograms.setdefault(name, (help_text, Histogram(buckets)))
+        entry[1].observe(value)
+
+    def inc(self, name: str, value: int = 1, help_text: str = "") -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            old = self._counters.get(name, (help_text, 0))
+            self._counters[name] = (old[0] or help_text, old[1] + value)
+
+    def register_collector(self, collector: Callable[[], Iterable[Sample]]) -> None:
+        """Add a callable producing samples at scrape time (gauges owned elsewhere)."""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        ns = self.namespace
+        lines: List[str] = []
+        if self._stages:
+            name = f"{ns}_stage_seconds"
+            lines += [f"# HELP {name} Latency of check-url pipeline stages", f"# TYPE {name} histogram"]
+            for stage, hist in sorted(self._stages.items()):
+                lines += _render_histogram(name, hist, {"stage": stage})
+        for hname, (help_text, hist) in sorted(self._histograms.items()):
+            name = f"{ns}_{hname}"
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+            lines += _render_histogram(name, hist, {})
+        if self._decisions:
+            name = f"{ns}_decisions_total"
+            lines += [f"# HELP {name} Verdicts by deciding stage", f"# TYPE {name} counter"]
+            for kind, value in sorted(self._decisions.items()):
+                lines.append(f'{name}{{decision="{kind}"}} {value}')
+        for cname, (help_text, value) in sorted(self._counters.items()):
+            name = f"{ns}_{cname}"
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter", f"{name} {value}"]
+        for collector in self._collectors:
+            for sname, stype, help_text, samples in collector():
+                name = f"{ns}_{sname}"
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {stype}"]
+                for labels, value in samples:
+                    lines.append(f"{name}{_labels(labels)} {_fmt(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def process_memory() -> Dict[str, int]:
+    """
+    Resident memory of this process in bytes: "rss", plus "pss" (shared pages
+    split between the processes mapping them) and "shared" where /proc
+    provides them. Empty if unavailable on this platform.
+    """
+    fields = {"Rss": "rss", "Pss": "pss", "Shared_Clean": "shared", "Shared_Dirty": "shared"}
+    result: Dict[str, int] = {}
+    try:
+        with open("/proc/self/smaps_rollup", "r") as f:
+            for line in f:
+                key, _, rest = line.partition(":")
+                if key in fields:
+                    name = fields[key]
+                    result[name] = result.get(name, 0) + int(rest.split()[0]) * 1024
+    except (OSError, ValueError):
+        try:
+            import resource
+            # ru_maxrss is the peak, in KiB on Linux and bytes on macOS
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            result["rss"] = peak if sys.platform == "darwin" else peak * 1024
+        except (ImportError, OSError):
+            pass
+    return result
+
+
+def _labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels.items()) + "}"
+
+
+def _fmt(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _render_histogram(name: str, hist: Histogram, labels: Dict[str, str]) -> List[str]:
+    with hist._lock:
+        counts = list(hist.counts)
+        total, count = hist.sum, hist.count
+    lines = []
+    cumulative = 0
+    for bound, c in zip(hist.buckets + (float("inf"),), counts):
+        cumulative += c
+        le = "+Inf" if bound == float("inf") else repr(bound)
+        lines.append(f"{name}_bucket{_labels({**labels, 'le': le})} {cumulative}")
+    lines.append(f"{name}_sum{_labels(labels)} {total!r}")
+    lines.append(f"{name}_count{_labels(labels)} {count}")
+    return lines
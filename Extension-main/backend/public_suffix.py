@@ -0,0 +1,184 @@
+"""
+Offline public-suffix parsing: which part of a hostname is the public suffix
+("co.uk", "github.io"), which is the registrable domain ("bbc.co.uk") and
+which labels are subdomains.
+
+The rules come from the Public Suffix List snapshot bundled in
+data/public_suffix_list.dat. scripts/build_public_suffix.py compiles it into
+a reversed-label trie (data/public_suffix_trie.json) that loads without
+parsing the list. If the compiled trie is missing or was built from another
+snapshot, the trie is built from the list on load instead.
+
+Trie nodes are dicts keyed by label, with the node's rule flags under "";
+a node with no children is stored as its flags alone:
+
+    {"uk": {"": 1, "co": 1, "*": ...}, "ck": {"*": 1, "www": 2}, ...}
+
+Results are memoized per host, so the features, the trust rules and the
+list lookups of one request parse its host once between them.
+"""
+import hashlib
+import ipaddress
+import json
+import os
+from functools import lru_cache
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple, Union
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+LIST_PATH = os.path.join(DATA_DIR, "public_suffix_list.dat")
+TRIE_PATH = os.path.join(DATA_DIR, "public_suffix_trie.json")
+
+RULE = 1
+EXCEPTION = 2
+
+CACHE_SIZE = 65536
+
+Node = Union[int, Dict[str, "Node"]]
+
+
+class HostParts(NamedTuple):
+    # Public suffix ("co.uk"); "" for IP addresses and empty hosts
+    suffix: str
+    # Suffix plus one label ("bbc.co.uk"); "" if the host is itself a public suffix
+    domain: str
+    # Labels left of the registrable domain, outermost first ("www", "news")
+    subdomains: Tuple[str, ...]
+
+
+def _rule_labels(rule: str) -> Iterable[Tuple[str, ...]]:
+    """Labels of a rule, plus its punycode form when that differs."""
+    labels = tuple(rule.split("."))
+    yield labels
+    try:
+        ascii_labels = tuple(
+            label if label == "*" else label.encode("idna").decode("ascii") for label in labels
+        )
+    except UnicodeError:
+        return
+    if ascii_labels != labels:
+        yield ascii_labels
+
+
+def _insert(root: Dict, labels: Tuple[str, ...], flag: int) -> None:
+    node = root
+    for label in reversed(labels):
+        node = node.setdefault(label, {})
+    node[""] = node.get("", 0) | flag
+
+
+def _compact(node: Dict) -> Node:
+    children = {label: _compact(child) for label, child in node.items() if label}
+    flags = node.get("", 0)
+    if not children:
+        return flags
+    if flags:
+        children[""] = flags
+    return children
+
+
+def build_trie(lines: Iterable[str]) -> Dict[str, Node]:
+    """Compile Public Suffix List lines into the trie described above."""
+    root: Dict = {}
+    for line in lines:
+        rule = line.strip().split(None, 1)[0] if line.strip() else ""
+        if not rule or rule.startswith("//"):
+            continue
+        flag = RULE
+        if rule.startswith("!"):
+            rule, flag = rule[1:], EXCEPTION
+        for labels in _rule_labels(rule.lower()):
+            _insert(root, labels, flag)
+    return _compact(root) or {}
+
+
+def file_sha256(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _flags(node: Optional[Node]) -> int:
+    if node is None:
+        return 0
+    return node if isinstance(node, int) else node.get("", 0)
+
+
+def _is_ip(host: str) -> bool:
+    try:
+        ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return True
+
+
+class PublicSuffixList:
+    def __init__(self, trie: Dict[str, Node], cache_size: int = CACHE_SIZE):
+        self.trie = trie
+        self.parse = lru_cache(maxsize=cache_size)(self._parse)
+
+    def suffix_length(self, labels) -> int:
+        """Number of trailing labels forming the public suffix (unlisted TLDs count as one)."""
+        node: Node = self.trie
+        length = 1
+        for depth, label in enumerate(reversed(labels), 1):
+            if not isinstance(node, dict):
+                break
+            child = node.get(label)
+            wildcard = node.get("*")
+            if child is None and wildcard is None:
+                break
+            flags = _flags(child)
+            if flags & EXCEPTION:
+                return depth - 1
+            if (flags | _flags(wildcard)) & RULE:
+                length = depth
+            node = child if child is not None else wildcard
+        return length
+
+    def _parse(self, host: str) -> HostParts:
+        host = (host or "").strip().rstrip(".").lower()
+        if not host or _is_ip(host):
+            return HostParts("", host, ())
+        labels = host.split(".")
+        n = self.suffix_length(labels)
+        if n >= len(labels):
+            return HostParts(host, "", ())
+        return HostParts(".".join(labels[-n:]), ".".join(labels[-n - 1:]), tuple(labels[:-n - 1]))
+
+    def stats(self) -> Dict:
+        info = self.parse.cache_info()
+        return {"size": info.currsize, "hits": info.hits, "misses": info.misses}
+
+
+def load(trie_path: str = TRIE_PATH, list_path: str = LIST_PATH) -> PublicSuffixList:
+    """
+    The compiled trie at `trie_path`, or one built from `list_path` if the
+    compiled copy is missing or does not match the list.
+    """
+    source_sha256 = file_sha256(list_path) if os.path.exists(list_path) else None
+    try:
+        with open(trie_path, "r", encoding="utf-8") as f:
+            compiled = json.load(f)
+        if source_sha256 is None or compiled.get("source_sha256") == source_sha256:
+            return PublicSuffixList(compiled["trie"])
+        print(f"⚠️  {trie_path} was built from another list; run scripts/build_public_suffix.py")
+    except (OSError, ValueError, KeyError) as e:
+        if source_sha256 is None:
+            raise
+        print(f"⚠️  Public suffix trie unavailable ({e}); building it from {list_path}")
+    with open(list_path, "r", encoding="utf-8") as f:
+        return PublicSuffixList(build_trie(f))
+
+
+_default: Optional[PublicSuffixList] = None
+
+
+def default_list() -> PublicSuffixList:
+    global _default
+    if _default is None:
+        _default = load()
+    return _default
+
+
+def parse_host(host: str) -> HostParts:
+    """Suffix, registrable domain and subdomain labels of `host` (memoized)."""
+    return default_list().parse(host)
@@ -0,0 +1,257 @@
+"""
+Write-behind sink for user reports.
+
+`ReportSink.submit` only appends to a bounded in-memory queue; a background
+thread drains it in batches through a writer callable (`insert_many` on
+Mongo, or appended JSONL lines when Mongo is not configured). Repeated
+reports of the same URL within `dedup_window` seconds are dropped, a full
+queue rejects new reports instead of growing, and `close()` flushes what is
+left.
+
+A writer may return the documents of the batch it could not write; only
+those are queued again. Anything else it raises puts the whole batch back.
+
+With a `spill` writer (a JSONL file in front of Mongo), reports that cannot
+be written are not lost: after `spill_after` failed flushes in a row, and
+for whatever is still queued on `close()` or does not fit back in the queue,
+they are appended to the spill file instead. `read_spill` + `restore` put
+them back in the queue on the next start.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ReportSink:
+    def __init__(
+        self,
+        write_batch: Callable[[List[Dict]], Optional[List[Dict]]],
+        max_queue: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        dedup_window: float = 60.0,
+        spill: Optional[Callable[[List[Dict]], None]] = None,
+        spill_after: int = 3,
+    ):
+        self.write_batch = write_batch
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dedup_window = dedup_window
+        self.spill = spill
+        self.spill_after = spill_after
+        self.accepted = 0
+        self.written = 0
+        self.duplicates = 0
+        self.dropped = 0
+        self.failed_batches = 0
+        self.spilled = 0
+        self._failing = 0  # failed flushes in a row
+        self._queue: deque = deque()
+        self._recent: "OrderedDict[str, float]" = OrderedDict()  # url -> last accepted (monotonic)
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="report-sink", daemon=True)
+        self._thread.start()
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def submit(self, doc: Dict) -> str:
+        """Queue one report. Returns "queued", "duplicate" or "dropped"."""
+        url = doc.get("url", "")
+        now = time.monotonic()
+        with self._cond:
+            self._expire_recent(now)
+            if self.dedup_window > 0 and url in self._recent:
+                self.duplicates += 1
+                return "duplicate"
+            if self._closed or len(self._queue) >= self.max_queue:
+                self.dropped += 1
+                return "dropped"
+            self._queue.append(doc)
+            self.accepted += 1
+            if self.dedup_window > 0:
+                self._recent[url] = now
+            if len(self._queue) >= self.batch_size:
+                self._cond.notify()
+        return "queued"
+
+    def close(self, timeout: float = 10.0) -> None:
+        """Stop the flusher after writing everything still queued."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join(timeout=timeout)
+        # The flusher is stuck on a slow write: keep the rest on disk
+        with self._cond:
+            rest = list(self._queue)
+            self._queue.clear()
+        if rest:
+            self._drop_or_spill(rest)
+
+    def restore(self, docs: List[Dict]) -> None:
+        """Queue reports read back from the spill file (no dedup; overflow is spilled again)."""
+        with self._cond:
+            room = max(self.max_queue - len(self._queue), 0)
+            self._queue.extend(docs[:room])
+            self._cond.notify()
+        if docs[room:]:
+            self._drop_or_spill(docs[room:])
+
+    def stats(self) -> Dict:
+        return {
+            "queued": len(self._queue),
+            "accepted": self.accepted,
+            "written": self.written,
+            "duplicates": self.duplicates,
+            "dropped": self.dropped,
+            "failed_batches": self.failed_batches,
+            "spilled": self.spilled,
+        }
+
+    def _expire_recent(self, now: float) -> None:
+        cutoff = now - self.dedup_window
+        recent = self._recent
+        while recent:
+            url, seen = next(iter(recent.items()))
+            if seen > cutoff:
+                break
+            del recent[url]
+
+    def _take_batch(self) -> List[Dict]:
+        with self._cond:
+            if not self._closed and len(self._queue) < self.batch_size:
+                self._cond.wait(self.flush_interval)
+            n = min(len(self._queue), self.batch_size)
+            return [self._queue.popleft() for _ in range(n)]
+
+    def _run(self) -> None:
+        while True:
+            batch = self._take_batch()
+            if batch:
+                self._flush(batch)
+            elif self._closed:
+                return
+
+    def _flush(self, batch: List[Dict]) -> None:
+        try:
+            retry = self.write_batch(batch) or []
+        except Exception as e:
+            # Expected while the database is down (or its circuit is open), so no traceback
+            logger.warning("Writing %d reports failed, keeping them queued: %s", len(batch), e)
+            self._requeue(batch)
+            return
+        self._failing = 0
+        self.written += len(batch) - len(retry)
+        if retry:
+            logger.warning("Writing %d of %d reports failed, keeping them queued", len(retry), len(batch))
+            self._requeue(retry)
+
+    def _requeue(self, docs: List[Dict]) -> None:
+        self.failed_batches += 1
+        self._failing += 1
+        if self._closed or (self.spill is not None and self._failing >= self.spill_after):
+            self._drop_or_spill(docs)
+            return
+        with self._cond:
+            # Put them back in front, keeping the queue bounded
+            room = max(self.max_queue - len(self._queue), 0)
+            self._queue.extendleft(reversed(docs[:room]))
+        if docs[room:]:
+            self._drop_or_spill(docs[room:])
+        time.sleep(self.flush_interval)
+
+    def _drop_or_spill(self, docs: List[Dict]) -> None:
+        if self.spill is not None:
+            try:
+                self.spill(docs)
+                self.spilled += len(docs)
+                logger.warning("Spilled %d unwritten reports to disk", len(docs))
+                return
+            except Exception as e:
+                logger.error("Spilling %d reports failed: %s", len(docs), e)
+        self.dropped += len(docs)
+
+
+# Duplicate key: the document is already stored (e.g. a retried batch)
+DUPLICATE_KEY = 11000
+
+
+def mongo_writer(coll) -> Callable[[List[Dict]], Optional[List[Dict]]]:
+    from pymongo.errors import BulkWriteError
+
+    def write(batch: List[Dict]) -> Optional[List[Dict]]:
+        # insert_many sets each document's _id, so a batch that is written
+        # again (after a timeout that the server had already committed, or a
+        # partial failure) hits duplicate keys for what is already stored
+        try:
+            coll.insert_many(batch, ordered=False)
+        except BulkWriteError as e:
+            # Unordered: everything without a write error was inserted
+            return [
+                batch[err["index"]]
+                for err in e.details.get("writeErrors", [])
+                if err.get("code") != DUPLICATE_KEY
+            ]
+        return None
+    return write
+
+
+def jsonl_writer(path: str) -> Callable[[List[Dict]], Optional[List[Dict]]]:
+    def write(batch: List[Dict]) -> None:
+        data = "".join(json.dumps(doc, default=str) + "\n" for doc in batch)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(data)
+    return write
+
+
+def read_spill(path: str) -> List[Dict]:
+    """
+    Take the reports spilled to `path` (one JSON object per line). The file
+    is renamed to `<name>.replay` and removed once read, so reports spilled
+    again meanwhile go to a fresh file; a `.replay` file left by a crash is
+    read first.
+    """
+    replay = path + ".replay"
+    docs: List[Dict] = []
+    for _ in range(2):
+        if not os.path.exists(replay):
+            if not os.path.exists(path):
+                break
+            os.replace(path, replay)
+        with open(replay, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    docs.append(json.loads(line))
+                except ValueError:
+                    logger.warning("Skipping unreadable line in %s", replay)
+        os.remove(replay)
+    return docs
+
+
+def migrate_json_array(json_path: str, jsonl_path: str) -> int:
+    """
+    One-time move of the old `reports.json` (a JSON array rewritten on every
+    report) into the append-only JSONL file. The old file is renamed to
+    `<name>.migrated`. Returns the number of reports moved.
+    """
+    if not os.path.exists(json_path):
+        return 0
+    with open(json_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if not isinstance(data, list):
+        raise ValueError(f"{json_path} is not a JSON array")
+    if data:
+        jsonl_writer(jsonl_path)(data)
+    os.replace(json_path, json_path + ".migrated")
+    return len(data)
@@ -0,0 +1,117 @@
+"""
+Verdict rules shared by the API (app.py) and offline scoring
+(scripts/score_urls.py): list and trusted-pattern short-circuits, smart
+whitelist adjustments, the HTTP penalty and the risk thresholds, plus
+loading of the compiled serving model. Nothing here touches Mongo or
+metrics, so callers add their own lookups and instrumentation around it.
+"""
+import os
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+try:
+    from . import compiled_forest, smart_whitelist  # type: ignore
+except Exception:
+    try:
+        from backend import compiled_forest, smart_whitelist  # type: ignore
+    except Exception:
+        import compiled_forest  # type: ignore
+        import smart_whitelist  # type: ignore
+
+
+# Version label when the model artifact cannot be hashed (no .pkl on disk)
+MODEL_VERSION = "rf-pipeline"
+
+
+def model_version(model_path: str, compiled=None) -> str:
+    """
+    "rf-" plus the first 12 hex digits of the .pkl's SHA-256. A compiled model
+    records the hash of the .pkl it was built from, so both report the same
+    version and it is not recomputed when serving one.
+    """
+    sha = compiled.meta.get("source_sha256") if compiled is not None else None
+    if not sha and os.path.exists(model_path):
+        sha = compiled_forest.file_sha256(model_path)
+    return f"rf-{sha[:12]}" if sha else MODEL_VERSION
+
+
+def host_of(url: str) -> str:
+    return (urlparse(url).hostname or "").lower()
+
+
+def list_verdict(list_name: str, model_version: str) -> Dict:
+    if list_name == "whitelist":
+        return {"risk": "safe", "score": 0.0, "reasons": ["whitelist"], "model_version": model_version}
+    return {"risk": "malicious", "score": 1.0, "reasons": ["blacklist"], "model_version": model_version}
+
+
+def trusted_verdict(trusted: Tuple[bool, str], model_version: str) -> Optional[Dict]:
+    is_trusted, trust_reason = trusted
+    if is_trusted:
+        return {
+            "risk": "safe",
+            "score": 0.0,
+            "reasons": [trust_reason],
+            "model_version": model_version,
+        }
+    return None
+
+
+def map_risk(url: str, proba: float, adjustments: List[str], model_version: str) -> Dict:
+    # Check for HTTP (no SSL) - security warning
+    is_http_no_ssl = url.lower().startswith("http://")
+    if is_http_no_ssl:
+        # Increase risk score for HTTP sites (no encryption)
+        proba = min(1.0, proba + 0.25)  # Add 25% to risk score
+        adjustments.append("http_no_ssl_warning")
+
+    # Map to risk levels
+    if proba >= 0.8:
+        risk = "malicious"
+    elif proba >= 0.5:
+        risk = "suspicious"
+    elif is_http_no_ssl:
+        # HTTP sites are at least suspicious even with low ML score
+        risk = "suspicious"
+        proba = max(proba, 0.5)
+    else:
+        risk = "safe"
+
+    reasons = ["model_probability"]
+    if adjustments:
+        reasons.extend(adjustments)
+
+    return {
+        "risk": risk,
+        "score": proba,
+        "reasons": reasons,
+        "model_version": model_version,
+    }
+
+
+def model_verdict(url: str, proba: float, trusted: Tuple[bool, str], model_version: str) -> Dict:
+    """Apply smart whitelist adjustments, the HTTP penalty and risk thresholds to a model score."""
+    adjusted_score, adjustments = smart_whitelist.adjust_score_for_context(url, proba, trusted=trusted)
+    return map_risk(url, adjusted_score, adjustments, model_version)
+
+
+def load_compiled_model(compiled_path: str, model_path: str, feature_names: List[str], mmap: bool = False):
+    """
+    Compiled forest exported by scripts/export_compiled_model.py, if present and
+    built from the current .pkl with the current feature order; else None.
+    Without the .pkl on disk the artifact is trusted as the serving model.
+    """
+    if not os.path.isdir(compiled_path):
+        return None
+    try:
+        model = compiled_forest.CompiledForest.load(compiled_path, mmap=mmap)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"⚠️  Ignoring compiled model: {e}")
+        return None
+    if os.path.exists(model_path) and model.meta.get("source_sha256") != compiled_forest.file_sha256(model_path):
+        print("⚠️  Compiled model is stale (built from a different .pkl); serving the sklearn pipeline")
+        return None
+    if model.meta.get("feature_names") != feature_names:
+        print("⚠️  Compiled model feature order differs from feature_names.json; serving the sklearn pipeline")
+        return None
+    return model
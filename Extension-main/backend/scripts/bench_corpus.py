@@ -0,0 +1,50 @@
+"""
+Fixed URL corpus for benchmarks and load tests: every URL from
+Machine-Learning-main/blacklist.txt plus deterministic synthetic benign
+URLs, so runs on different machines and days score the same inputs.
+"""
+import os
+import random
+from typing import List
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ML_DIR = os.path.join(os.path.dirname(BACKEND_DIR), "Machine-Learning-main")
+BLACKLIST_PATH = os.path.join(ML_DIR, "blacklist.txt")
+
+SEED = 20240601
+
+BENIGN_DOMAINS = [
+    "example.com", "wikipedia.org", "docs.python.org", "bbc.co.uk", "nytimes.com", "github.com",
+    "stackoverflow.com", "mozilla.org", "shop.example.net", "news.ycombinator.com", "weather.gov",
+    "university.edu", "blog.example.io", "maps.google.com", "cdn.jsdelivr.net", "vnexpress.net",
+]
+BENIGN_SUBDOMAINS = ["", "www.", "m.", "static.", "en.", "api."]
+BENIGN_PATHS = [
+    "", "/", "/about", "/contact", "/news/2024/05/article-title", "/products/item-12345",
+    "/search?q=python+tutorial", "/wiki/Phishing", "/docs/3/library/urllib.parse.html",
+    "/a/b/c.html", "/category/tech?page=2", "/static/js/app.min.js", "/user/profile/settings",
+]
+
+
+def blacklist_urls() -> List[str]:
+    if not os.path.exists(BLACKLIST_PATH):
+        return []
+    with open(BLACKLIST_PATH, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+
+def benign_urls(n: int, seed: int = SEED) -> List[str]:
+    rng = random.Random(seed)
+    urls = []
+    for _ in range(n):
+        scheme = "https" if rng.random() < 0.85 else "http"
+        host = rng.choice(BENIGN_SUBDOMAINS) + rng.choice(BENIGN_DOMAINS)
+        urls.append(f"{scheme}://{host}{rng.choice(BENIGN_PATHS)}")
+    return urls
+
+
+def build_corpus(n_benign: int = 800, seed: int = SEED) -> List[str]:
+    """Blacklist URLs followed by `n_benign` synthetic benign URLs, shuffled with a fixed seed."""
+    urls = blacklist_urls() + benign_urls(n_benign, seed)
+    random.Random(seed).shuffle(urls)
+    return urls
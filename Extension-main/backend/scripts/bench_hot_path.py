@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Microbenchmarks for the check-url hot path, with baseline comparison.
+
+Cases: build_ml_features (reference) and FeatureExtractor, trusted-pattern
+checks, adjust_score_for_context, predict_proba on one row and on batches
+(sklearn pipeline and the serving model), and check_url end to end. End to
+end runs against an in-process Mongo stand-in: cold (caches off, host
+index loaded), cached, known hosts (verdict cache off, host memo warm, as
+for new URLs on hosts seen before), and with the index unloaded so lookups
+go through the Mongo query path. Inputs come from bench_corpus (blacklist.txt plus fixed
+synthetic benign URLs).
+
+Each case is timed `--repeat` times over the whole corpus; the fastest
+pass (per operation) is what gets compared, as it is the least noisy.
+Results are written as JSON; with a baseline file present, any case slower
+than the baseline by more than `--threshold` percent fails the run.
+
+Usage:
+  python3 backend/scripts/bench_hot_path.py --save-baseline      # record a baseline on this machine
+  python3 backend/scripts/bench_hot_path.py --threshold 15       # compare against it
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Keep app.py from connecting to a real database; the stand-in is wired in below
+os.environ["MONGO_URI"] = ""
+
+from bench_corpus import build_corpus  # noqa: E402
+from memory_mongo import seeded_collections  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_baseline.json")
+BATCH_SIZES = (64, 512)
+
+
+def timeit(fn: Callable, items: List, repeat: int, setup: Optional[Callable] = None) -> Dict:
+    per_op = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        for item in items:
+            fn(item)
+        per_op.append((time.perf_counter() - start) / len(items))
+    return {
+        "per_op_us": min(per_op) * 1e6,
+        "median_us": statistics.median(per_op) * 1e6,
+        "ops": len(items),
+        "repeat": repeat,
+    }
+
+
+def run(repeat: int, only: List[str]) -> Dict[str, Dict]:
+    import app
+    import smart_whitelist
+    from features import build_ml_features
+
+    corpus = build_corpus()
+    app._load_models()
+    pipeline = app._get_pipeline()
+    serving = app.serving
+    extractor = serving.extractor
+    names = extractor.feature_names
+    rows = [extractor.row(u).copy() for u in corpus]
+    batches = {n: [extractor.matrix(corpus[i:i + n]) for i in range(0, len(corpus) - n + 1, n)]
+               for n in BATCH_SIZES}
+
+    colls = seeded_collections(app._host_of)
+    app._reports_coll = colls["reports"]
+    app._blacklist_coll = colls["blacklist"]
+    app._whitelist_coll = colls["whitelist"]
+    app.whitelist_index.load_from(app._whitelist_coll)
+    app.blacklist_index.load_from(app._blacklist_coll)
+    inputs = [app.URLInput(url=u) for u in corpus]
+
+    def check(inp):
+        return app.check_url(inp)
+
+    def cold():
+        app.verdicts.maxsize = 0
+        app.verdicts.clear()
+        app.host_profiles.maxsize = 0
+        app.host_profiles.clear()
+        extractor.host_values.cache_clear()
+
+    def warm():
+        app.verdicts.maxsize = len(corpus) * 2
+        app.host_profiles.maxsize = len(corpus) * 2
+        for inp in inputs:
+            check(inp)
+
+    def known_hosts():
+        cold()
+        app.host_profiles.maxsize = len(corpus) * 2
+        for inp in inputs:
+            check(inp)
+
+    def unload_index():
+        cold()
+        app.whitelist_index.loaded = False
+        app.blacklist_index.loaded = False
+
+    cases = [
+        ("features_build_ml_features", lambda u: build_ml_features(u, names), corpus, None),
+        ("features_extractor_row", extractor.row, corpus, None),
+        ("check_trusted_pattern", smart_whitelist.check_trusted_pattern, corpus,
+         smart_whitelist.check_trusted_host.cache_clear),
+        ("adjust_score_for_context", lambda u: smart_whitelist.adjust_score_for_context(u, 0.5), corpus,
+         smart_whitelist.check_trusted_host.cache_clear),
+        ("predict_one_sklearn", pipeline.predict_proba, rows, None),
+        ("predict_one_serving", serving.model.predict_proba, rows, None),
+    ]
+    for n in BATCH_SIZES:
+        cases.append((f"predict_batch{n}_sklearn", pipeline.predict_proba, batches[n], None))
+        cases.append((f"predict_batch{n}_serving", serving.model.predict_proba, batches[n], None))
+    cases += [
+        ("check_url_e2e_cold", check, inputs, cold),
+        ("check_url_e2e_cached", check, inputs, warm),
+        ("check_url_e2e_known_host", check, inputs, known_hosts),
+        ("check_url_e2e_mongo_lookup", check, inputs, unload_index),
+    ]
+
+    results = {}
+    for name, fn, items, setup in cases:
+        if only and not any(o in name for o in only):
+            continue
+        if not items:
+            continue
+        results[name] = timeit(fn, items, repeat, setup)
+        if name.startswith("predict_batch"):
+            results[name]["rows_per_op"] = int(items[0].shape[0])
+        print(f"   {name:<32} {results[name]['per_op_us']:>11.2f} µs/op  (median {results[name]['median_us']:.2f})",
+              file=sys.stderr)
+    return results
+
+
+def _versions() -> Dict[str, str]:
+    versions = {"python": platform.python_version()}
+    for mod in ("numpy", "sklearn", "fastapi", "pymongo"):
+        try:
+            versions[mod] = __import__(mod).__version__
+        except Exception:
+            pass
+    return versions
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], threshold: float) -> List[str]:
+    """Names of cases slower than baseline by more than `threshold` percent (prints a table)."""
+    regressions = []
+    print(f"\n{'case':<32} {'baseline µs':>12} {'current µs':>12} {'change':>9}")
+    for name, res in results.items():
+        base = baseline.get(name)
+        if not base:
+            print(f"{name:<32} {'-':>12} {res['per_op_us']:>12.2f} {'new':>9}")
+            continue
+        change = (res["per_op_us"] - base["per_op_us"]) / base["per_op_us"] * 100
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = "  ❌"
+        print(f"{name:<32} {base['per_op_us']:>12.2f} {res['per_op_us']:>12.2f} {change:>+8.1f}%{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the check-url hot path")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed passes over the corpus per case (default: 5)")
+    parser.add_argument("--only", nargs="*", default=[], help="Run only cases whose name contains one of these")
+    parser.add_argument("--out", default="", help="Write results JSON here")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the baseline")
+    parser.add_argument("--threshold", type=float, default=25.0,
+                        help="Fail if a case is slower than baseline by more than this percent (default: 25)")
+    args = parser.parse_args()
+
+    print("⏱️  Running hot-path benchmarks...", file=sys.stderr)
+    results = run(args.repeat, args.only)
+    report = {
+        "meta": {
+            "created_at": datetime.utcnow().isoformat() + "Z",
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "versions": _versions(),
+        },
+        "results": results,
+    }
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"📝 Results written to {args.out}", file=sys.stderr)
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"📌 Baseline saved to {args.baseline}", file=sys.stderr)
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"⚠️  No baseline at {args.baseline}; run with --save-baseline first", file=sys.stderr)
+        return
+    with open(args.baseline, "r") as f:
+        baseline = json.load(f).get("results", {})
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"\n❌ {len(regressions)} case(s) regressed by more than {args.threshold:g}%: {', '.join(regressions)}")
+        sys.exit(1)
+    print(f"\n✅ No regressions beyond {args.threshold:g}%")
+
+
+if __name__ == "__main__":
+    main()
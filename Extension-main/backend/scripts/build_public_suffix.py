@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Compile the bundled Public Suffix List into the trie loaded by public_suffix.py.
+
+To update the snapshot, replace backend/data/public_suffix_list.dat with a
+fresh copy of https://publicsuffix.org/list/public_suffix_list.dat and run
+this script; commit both files.
+
+Usage:
+  python3 backend/scripts/build_public_suffix.py
+  python3 backend/scripts/build_public_suffix.py --list other.dat --out other.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from public_suffix import LIST_PATH, TRIE_PATH, PublicSuffixList, build_trie, file_sha256  # noqa: E402
+
+# (host, expected registrable domain), checked before the trie is written
+CHECKS = [
+    ("example.com", "example.com"),
+    ("www.example.com", "example.com"),
+    ("news.bbc.co.uk", "bbc.co.uk"),
+    ("co.uk", ""),
+    ("user.github.io", "user.github.io"),
+    ("a.b.example.ck", "b.example.ck"),
+    ("www.ck", "www.ck"),
+    ("city.kawasaki.jp", "city.kawasaki.jp"),
+    ("foo.bar.kawasaki.jp", "foo.bar.kawasaki.jp"),
+    ("shop.example.unlistedtld", "example.unlistedtld"),
+    ("192.168.0.1", "192.168.0.1"),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile the Public Suffix List into a trie")
+    parser.add_argument("--list", default=LIST_PATH, help=f"Public Suffix List file (default: {LIST_PATH})")
+    parser.add_argument("--out", default=TRIE_PATH, help=f"Output JSON (default: {TRIE_PATH})")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.list):
+        print(f"❌ File not found: {args.list}")
+        sys.exit(1)
+
+    started = time.perf_counter()
+    with open(args.list, "r", encoding="utf-8") as f:
+        trie = build_trie(f)
+    psl = PublicSuffixList(trie)
+    failed = [(host, want, psl.parse(host).domain) for host, want in CHECKS if psl.parse(host).domain != want]
+    for host, want, got in failed:
+        print(f"❌ {host}: expected {want!r}, got {got!r}")
+    if failed:
+        sys.exit(1)
+
+    compiled = {"source_sha256": file_sha256(args.list), "trie": trie}
+    tmp = f"{args.out}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(compiled, f, ensure_ascii=False, separators=(",", ":"), sort_keys=True)
+    os.replace(tmp, args.out)
+    print(f"✅ {args.out}: {len(trie):,} top-level labels, "
+          f"{os.path.getsize(args.out) / 1024:.0f} KiB in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Shared streaming importer for the blacklist/whitelist TXT scripts.
+
+Lines are read lazily in chunks, parsed to (url, host) records (optionally
+in a process pool), de-duplicated by host within each chunk and written
+with unordered `bulk_write` batches of upserts keyed on the reversed-host
+`rhost` field (see host_index.reverse_host), which has a unique index.
+
+Two write modes:
+  "upsert"  - `$set` the document; existing hosts count as updates (blacklist)
+  "insert"  - `$setOnInsert` only; existing hosts are left alone and count
+              as skips (whitelist)
+
+With dry_run, each batch is checked against the collection with one
+`find({"rhost": {"$in": ...}})` and nothing is written.
+"""
+import os
+import sys
+import time
+from collections import deque
+from datetime import datetime
+from functools import partial
+from itertools import islice
+from multiprocessing import Pool
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from pymongo import MongoClient, UpdateOne
+from pymongo.errors import BulkWriteError
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from host_index import RHOST_INDEX_OPTIONS, reverse_host  # noqa: E402
+
+DEFAULT_BATCH_SIZE = 5000
+PROGRESS_EVERY_SECONDS = 2.0
+
+Record = Tuple[str, str]  # (url, host)
+
+
+def get_db():
+    mongo_uri = os.getenv("MONGO_URI", "")
+    if not mongo_uri:
+        print("❌ MONGO_URI not set. Set it first:")
+        print("   export MONGO_URI='mongodb://localhost:27017/phishshield'")
+        sys.exit(1)
+    client = MongoClient(mongo_uri)
+    return client.get_default_database() if "/" in mongo_uri.split("?")[0] else client["phishshield"]
+
+
+def parse_url(line: str, default_scheme: Optional[str] = None) -> Optional[Record]:
+    """
+    (url, lowercase host) for one input line, or None for blanks, comments
+    and unparsable entries. Without `default_scheme`, lines lacking a scheme
+    are rejected; with it, they are prefixed with `<default_scheme>://`.
+    """
+    url = line.strip()
+    if not url or url.startswith("#"):
+        return None
+    if default_scheme and not url.startswith("http"):
+        url = f"{default_scheme}://{url}"
+    try:
+        parsed = urlparse(url)
+        if not parsed.scheme or not parsed.netloc:
+            return None
+        host = (parsed.hostname or "").lower()
+    except ValueError:
+        return None
+    if not host:
+        return None
+    return url, host
+
+
+def _parse_chunk(lines: List[str], default_scheme: Optional[str]) -> List[Optional[Record]]:
+    return [parse_url(line, default_scheme) for line in lines]
+
+
+def iter_chunks(path: str, chunk_size: int, limit: int = 0) -> Iterator[List[str]]:
+    """Lines of `path` in lists of `chunk_size`, stopping after `limit` lines if set."""
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        lines: Iterable[str] = islice(f, limit) if limit else f
+        while True:
+            chunk = list(islice(lines, chunk_size))
+            if not chunk:
+                return
+            yield chunk
+
+
+def iter_parsed(path: str, chunk_size: int, default_scheme: Optional[str] = None,
+                workers: int = 0, limit: int = 0) -> Iterator[List[Optional[Record]]]:
+    """Parsed chunks in file order; `workers` > 1 parses in a process pool."""
+    parse = partial(_parse_chunk, default_scheme=default_scheme)
+    chunks = iter_chunks(path, chunk_size, limit)
+    if workers <= 1:
+        for chunk in chunks:
+            yield parse(chunk)
+        return
+    with Pool(workers) as pool:
+        # Pool.imap would read the whole input ahead of the writer; keep a bounded window instead
+        pending: deque = deque()
+        for chunk in chunks:
+            pending.append(pool.apply_async(parse, (chunk,)))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().get()
+        while pending:
+            yield pending.popleft().get()
+
+
+class BulkImporter:
+    def __init__(self, coll, mode: str = "upsert", source: str = "manual",
+                 batch_size: int = DEFAULT_BATCH_SIZE, dry_run: bool = False):
+        if mode not in ("upsert", "insert"):
+            raise ValueError(f"Unknown import mode: {mode}")
+        self.coll = coll
+        self.mode = mode
+        self.source = source
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.now = datetime.utcnow()
+        self.lines = 0
+        self.inserted = 0
+        self.updated = 0
+        self.skipped = 0
+        self.errors = 0
+        self._pending: Dict[str, Record] = {}  # rhost -> (url, host), last one wins
+        self._started = time.perf_counter()
+        self._last_progress = self._started
+
+    def ensure_indexes(self) -> None:
+        if not self.dry_run:
+            self.coll.create_index("rhost", **RHOST_INDEX_OPTIONS)
+            self.coll.create_index("host", background=True)
+            self.coll.create_index("url", background=True)
+
+    def add_chunk(self, records: List[Optional[Record]]) -> None:
+        for record in records:
+            self.lines += 1
+            if record is None:
+                self.skipped += 1
+                continue
+            rhost = reverse_host(record[1])
+            if rhost in self._pending:
+                self.skipped += 1  # duplicate host within the batch
+            self._pending[rhost] = record
+            if len(self._pending) >= self.batch_size:
+                self.flush()
+        self._report_progress()
+
+    def flush(self) -> None:
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        # Stamped per batch so blacklist deltas (by imported_at) follow a long import
+        self.now = datetime.utcnow()
+        try:
+            if self.dry_run:
+                self._count_dry_run(pending)
+            else:
+                self._write(pending)
+        except Exception as e:
+            self.errors += len(pending)
+            print(f"❌ Batch of {len(pending)} failed: {e}", file=sys.stderr)
+
+    def _doc(self, url: str, host: str, rhost: str) -> Dict:
+        return {"url": url, "host": host, "rhost": rhost, "source": self.source, "imported_at": self.now}
+
+    def _write(self, pending: Dict[str, Record]) -> None:
+        op = "$set" if self.mode == "upsert" else "$setOnInsert"
+        requests = [
+            UpdateOne({"rhost": rhost}, {op: self._doc(url, host, rhost)}, upsert=True)
+            for rhost, (url, host) in pending.items()
+        ]
+        try:
+            upserted = self.coll.bulk_write(requests, ordered=False).upserted_count
+            failed = 0
+        except BulkWriteError as e:
+            # Unordered: every request without a write error went through
+            upserted = e.details.get("nUpserted", 0)
+            write_errors = e.details.get("writeErrors", [])
+            failed = len(write_errors)
+            self.errors += failed
+            print(f"❌ {failed} of {len(pending)} upserts failed: {write_errors[0].get('errmsg', '')}"
+                  if write_errors else f"❌ Batch of {len(pending)} partly failed: {e}", file=sys.stderr)
+        self.inserted += upserted
+        existing = len(pending) - upserted - failed
+        if self.mode == "upsert":
+            self.updated += existing
+        else:
+            self.skipped += existing
+
+    def _count_dry_run(self, pending: Dict[str, Record]) -> None:
+        existing = {doc.get("rhost") for doc in self.coll.find({"rhost": {"$in": list(pending)}}, {"rhost": 1, "_id": 0})}
+        found = sum(1 for rhost in pending if rhost in existing)
+        self.inserted += len(pending) - found
+        if self.mode == "upsert":
+            self.updated += found
+        else:
+            self.skipped += found
+
+    def _report_progress(self, force: bool = False) -> None:
+        now = time.perf_counter()
+        if not force and now - self._last_progress < PROGRESS_EVERY_SECONDS:
+            return
+        self._last_progress = now
+        elapsed = max(now - self._started, 1e-9)
+        print(f"⏳ {self.lines:,} lines, {self.lines / elapsed:,.0f} rows/s "
+              f"(inserted {self.inserted:,}, updated {self.updated:,}, skipped {self.skipped:,})", flush=True)
+
+    def finish(self) -> Dict:
+        self.flush()
+        elapsed = time.perf_counter() - self._started
+        return {
+            "lines": self.lines,
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "skipped": self.skipped,
+            "errors": self.errors,
+            "seconds": elapsed,
+            "rows_per_second": self.lines / elapsed if elapsed > 0 else 0.0,
+        }
+
+
+def add_arguments(parser) -> None:
+    parser.add_argument("--txt", required=True, help="Path to TXT file (one URL per line)")
+    parser.add_argument("--limit", type=int, default=0, help="Limit rows for quick test")
+    parser.add_argument("--source", default="manual", help="Source label (default: manual)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f"Upserts per bulk_write (default: {DEFAULT_BATCH_SIZE})")
+    parser.add_argument("--workers", type=int, default=0, help="Parse lines in N processes (default: inline)")
+    parser.add_argument("--dry-run", action="store_true", help="Report inserts/updates/skips without writing")
+
+
+def run_import(args, collection: str, mode: str, default_scheme: Optional[str] = None, db=None) -> Dict:
+    """Stream `args.txt` into `collection`; prints progress and a summary."""
+    if not os.path.exists(args.txt):
+        print(f"❌ File not found: {args.txt}")
+        sys.exit(1)
+    if db is None:
+        db = get_db()
+    importer = BulkImporter(db[collection], mode=mode, source=args.source,
+                            batch_size=args.batch_size, dry_run=args.dry_run)
+    importer.ensure_indexes()
+
+    print(f"📂 Importing {args.txt} into {collection}" + (" (dry run)" if args.dry_run else ""))
+    for records in iter_parsed(args.txt, args.batch_size, default_scheme, args.workers, args.limit):
+        importer.add_chunk(records)
+    summary = importer.finish()
+
+    print("\n" + "=" * 60)
+    print("✅ Dry run complete!" if args.dry_run else "✅ Import complete!")
+    print(f"   Lines:    {summary['lines']:,}")
+    print(f"   Inserted: {summary['inserted']:,}")
+    print(f"   Updated:  {summary['updated']:,}")
+    print(f"   Skipped:  {summary['skipped']:,}")
+    print(f"   Errors:   {summary['errors']:,}")
+    print(f"   Time:     {summary['seconds']:.1f}s ({summary['rows_per_second']:,.0f} rows/s)")
+    print("=" * 60)
+    return summary
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Check that the serving FeatureExtractor matches build_ml_features.
+
+Thin wrapper around backend/tests/test_feature_parity.py, which covers the
+benchmark corpus, edge cases, non-ASCII and malformed URLs. Exits non-zero
+on any mismatch.
+
+Usage:
+  python3 backend/scripts/check_feature_parity.py [--txt urls.txt]
+"""
+import argparse
+import os
+import sys
+import unittest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TESTS_DIR = os.path.join(BACKEND_DIR, "tests")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check FeatureExtractor parity with build_ml_features")
+    parser.add_argument("--txt", default="", help="Extra TXT file with one URL per line")
+    args = parser.parse_args()
+    if args.txt:
+        os.environ["PARITY_URLS_TXT"] = args.txt
+
+    suite = unittest.defaultTestLoader.discover(TESTS_DIR, pattern="test_feature_parity.py")
+    result = unittest.TextTestRunner(verbosity=1).run(suite)
+    if not result.wasSuccessful():
+        print("❌ FeatureExtractor does not match build_ml_features")
+        sys.exit(1)
+    print("✅ FeatureExtractor matches build_ml_features")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Compile phishing_detector_model.pkl into flat NumPy arrays for serving.
+
+Verifies the compiled forest against pipeline.predict_proba on the
+blacklist corpus plus synthetic benign URLs before writing it.
+
+Usage:
+  python3 backend/scripts/export_compiled_model.py
+  python3 backend/scripts/export_compiled_model.py --model other.pkl --out other.compiled
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import warnings
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ML_DIR = os.path.join(os.path.dirname(BACKEND_DIR), "Machine-Learning-main")
+sys.path.insert(0, BACKEND_DIR)
+
+import joblib  # noqa: E402
+import numpy as np  # noqa: E402
+
+from compiled_forest import CompiledForest, compile_pipeline, file_sha256  # noqa: E402
+from features import FeatureExtractor  # noqa: E402
+
+BENIGN_HOSTS = ["example.com", "wikipedia.org", "docs.python.org", "bbc.co.uk", "shop.example.net", "192.168.1.10"]
+BENIGN_PATHS = ["", "/", "/about", "/a/b/c.html", "/search?q=phishing+test", "/login", "/account/settings"]
+
+
+def corpus():
+    urls = []
+    blacklist = os.path.join(ML_DIR, "blacklist.txt")
+    if os.path.exists(blacklist):
+        with open(blacklist, "r", encoding="utf-8") as f:
+            urls += [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    for scheme in ("http://", "https://"):
+        for host in BENIGN_HOSTS:
+            urls += [f"{scheme}{host}{path}" for path in BENIGN_PATHS]
+    return urls
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the RandomForest pipeline as a compiled artifact")
+    parser.add_argument("--model", default=os.path.join(ML_DIR, "phishing_detector_model.pkl"), help="Path to the sklearn pipeline .pkl")
+    parser.add_argument("--out", default=os.path.join(ML_DIR, "phishing_detector_model.compiled"), help="Output directory")
+    parser.add_argument("--tolerance", type=float, default=1e-9, help="Max allowed |compiled - sklearn| probability difference")
+    args = parser.parse_args()
+
+    with open(os.path.join(ML_DIR, "feature_names.json"), "r") as f:
+        feature_names = json.load(f).get("feature_names", [])
+
+    print(f"📂 Loading {args.model}")
+    pipeline = joblib.load(args.model)
+    try:
+        compiled = compile_pipeline(pipeline)
+    except ValueError as e:
+        raise SystemExit(f"❌ {e}")
+    compiled.meta.update({
+        "source": os.path.basename(args.model),
+        "source_sha256": file_sha256(args.model),
+        "feature_names": feature_names,
+    })
+    print(f"🌲 {compiled.n_estimators} trees, {len(compiled.feature)} nodes, max depth {compiled.max_depth}")
+
+    X = FeatureExtractor(feature_names).matrix(corpus())
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        start = time.perf_counter()
+        expected = pipeline.predict_proba(X)
+        sklearn_s = time.perf_counter() - start
+        start = time.perf_counter()
+        sklearn_row_s = min(_timed(pipeline.predict_proba, X[:1]) for _ in range(20))
+    start = time.perf_counter()
+    actual = compiled.predict_proba(X)
+    compiled_s = time.perf_counter() - start
+    compiled_row_s = min(_timed(compiled.predict_proba, X[:1]) for _ in range(20))
+
+    diff = float(np.abs(actual - expected).max())
+    print(f"🔍 {len(X)} rows, max |diff| = {diff:.3g}")
+    print(f"⏱  batch: sklearn {sklearn_s * 1e3:.2f} ms, compiled {compiled_s * 1e3:.2f} ms")
+    print(f"⏱  1 row: sklearn {sklearn_row_s * 1e3:.3f} ms, compiled {compiled_row_s * 1e3:.3f} ms")
+    if diff > args.tolerance:
+        raise SystemExit(f"❌ Compiled model differs from sklearn by {diff:.3g} (> {args.tolerance}); not written")
+
+    compiled.save(args.out)
+    CompiledForest.load(args.out)  # round-trip check
+    print(f"✅ Wrote {args.out}")
+
+
+def _timed(fn, X):
+    start = time.perf_counter()
+    fn(X)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+"""
+Load generator replaying the extension's traffic pattern against a backend.
+
+Each virtual user is one browser and loops over page visits. A visit is
+what background.js and the popup send:
+  - the local list sync: GET /api/blacklist/snapshot and
+    GET /api/whitelist/snapshot on the first visit, then every
+    --delta-seconds GET /api/blacklist/delta?since=<version> plus a
+    revalidation of the whitelist snapshot (If-None-Match), and a
+    revalidated blacklist snapshot every --snapshot-seconds;
+  - a burst of 3 concurrent GET /api/check-url?url=... for the same URL
+    (tabs.onActivated, tabs.onUpdated, webNavigation.onCompleted). Like
+    the extension, a URL checked in the last 5 minutes is not sent again,
+    and the browser's HTTP cache is honoured: a fresh response (max-age)
+    is reused without a request, a stale one is revalidated with its ETag;
+  - with probability --popup-rate, the popup: GET / (health),
+    POST /api/check-url for the tab and a link scan, as one
+    POST /api/check-urls/stream (--popup-mode stream, what the popup
+    does), one POST /api/check-urls (batch) or one check-url per link
+    (per-link);
+  - with probability --report-rate, POST /api/report-url.
+Visited pages and links are drawn from bench_corpus with a skewed
+(Zipf-like) popularity, so requests repeat like real browsing. Hosts on
+the local blacklist copy are still sent to check-url, so list-heavy
+corpora slightly overstate the load.
+
+Alternatively --replay FILE sends a recorded JSONL log of
+{"method", "path", "body", "headers"} lines, optionally with "t" (seconds from the
+start of the log) honoured when --replay-timing is set.
+
+The backend is either an existing server (--target) or one started
+locally with in-memory Mongo stand-ins (--spawn, see
+serve_memory_backend.py). The report has throughput, p50/p95/p99
+latency and error rate per endpoint, plus requests/s per worker and per
+core for the spawned server.
+
+Usage:
+  python3 backend/scripts/load_test.py --spawn --workers 2 --concurrency 32 --duration 30
+  python3 backend/scripts/load_test.py --target http://127.0.0.1:8000 --replay requests.jsonl
+"""
+import argparse
+import bisect
+import http.client
+import itertools
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import quote, urlparse
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, SCRIPTS_DIR)
+
+from bench_corpus import build_corpus  # noqa: E402
+
+BURST = 3
+# background.js keeps a checked URL's verdict this long (CACHE_TTL)
+EXTENSION_CACHE_SECONDS = 300.0
+# popup LINK_SCAN.MAX_LINKS (config.js)
+MAX_SCAN_LINKS = 500
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def record(self, endpoint: str, seconds: float, ok: bool) -> None:
+        with self._lock:
+            self.latencies[endpoint].append(seconds)
+            if not ok:
+                self.errors[endpoint] += 1
+
+
+class Client:
+    """One keep-alive HTTP connection per thread."""
+
+    def __init__(self, target: str, recorder: Recorder, timeout: float):
+        parsed = urlparse(target)
+        self.host = parsed.hostname or "127.0.0.1"
+        self.port = parsed.port or 80
+        self.recorder = recorder
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _conn(self) -> http.client.HTTPConnection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            self._local.conn = conn
+        return conn
+
+    def request(
+        self, method: str, path: str, body: Optional[Dict] = None, headers: Optional[Dict[str, str]] = None
+    ) -> Tuple[int, Dict[str, str], bytes]:
+        """Send one request and record it under its path without the query. Returns (status, headers, body)."""
+        data = json.dumps(body).encode() if body is not None else None
+        headers = dict(headers or {})
+        if data is not None:
+            headers["Content-Type"] = "application/json"
+        start = time.perf_counter()
+        ok = False
+        status, resp_headers, payload = 0, {}, b""
+        try:
+            conn = self._conn()
+            conn.request(method, path, body=data, headers=headers)
+            resp = conn.getresponse()
+            payload = resp.read()
+            status = resp.status
+            resp_headers = {k.lower(): v for k, v in resp.getheaders()}
+            ok = (200 <= status < 300 or status == 304) and b'"error"' not in payload
+        except (OSError, http.client.HTTPException):
+            self._local.conn = None
+        self.recorder.record(f"{method} {path.split('?')[0]}", time.perf_counter() - start, ok)
+        return status, resp_headers, payload
+
+
+class Popularity:
+    """Zipf-like sampler over a list (index i has weight 1 / (i + 1) ** s)."""
+
+    def __init__(self, items: List[str], s: float, rng: random.Random):
+        self.items = items
+        self.cum = list(itertools.accumulate(1.0 / (i + 1) ** s for i in range(len(items))))
+        self.rng = rng
+
+    def pick(self) -> str:
+        return self.items[bisect.bisect_left(self.cum, self.rng.random() * self.cum[-1])]
+
+
+def _max_age(headers: Dict[str, str]) -> float:
+    for part in headers.get("cache-control", "").split(","):
+        name, _, value = part.strip().partition("=")
+        if name == "max-age" and value.isdigit():
+            return float(value)
+    return 0.0
+
+
+class Browser:
+    """Per-user state the extension and the browser keep between requests."""
+
+    def __init__(self, client: Client, args):
+        self.client = client
+        self.args = args
+        self._checked: Dict[str, float] = {}  # url -> when background.js cached its verdict
+        self._http: Dict[str, Tuple[str, float]] = {}  # path -> (etag, fresh until)
+        self._lock = threading.Lock()
+        self.blacklist_version = 0
+        self.snapshot_at: Optional[float] = None
+        self.synced_at = 0.0
+
+    def get(self, path: str) -> None:
+        """GET through the browser cache: fresh entries skip the request, stale ones are revalidated."""
+        now = time.monotonic()
+        with self._lock:
+            etag, fresh_until = self._http.get(path, ("", 0.0))
+        if now < fresh_until:
+            return
+        status, headers, _ = self.client.request("GET", path, headers={"If-None-Match": etag} if etag else None)
+        if status in (200, 304) and headers.get("etag"):
+            with self._lock:
+                self._http[path] = (headers["etag"], time.monotonic() + _max_age(headers))
+
+    def check_url(self, url: str) -> None:
+        now = time.monotonic()
+        with self._lock:
+            checked = self._checked.get(url)
+            if checked is not None and now - checked < EXTENSION_CACHE_SECONDS:
+                return
+        self.get(f"/api/check-url?url={quote(url, safe='')}")
+        with self._lock:
+            self._checked[url] = time.monotonic()
+
+    def sync_lists(self) -> None:
+        now = time.monotonic()
+        if self.snapshot_at is None or now - self.snapshot_at > self.args.snapshot_seconds:
+            headers = self._revalidate("/api/blacklist/snapshot")
+            self.blacklist_version = int(headers.get("x-list-version", self.blacklist_version) or 0)
+            self.snapshot_at = now
+        elif now - self.synced_at > self.args.delta_seconds:
+            _, _, payload = self.client.request("GET", f"/api/blacklist/delta?since={self.blacklist_version}")
+            try:
+                self.blacklist_version = int(json.loads(payload).get("version", self.blacklist_version))
+            except (ValueError, AttributeError):
+                pass
+        else:
+            return
+        self.synced_at = now
+        self._revalidate("/api/whitelist/snapshot")
+
+    def _revalidate(self, path: str) -> Dict[str, str]:
+        """Conditional GET of a no-cache snapshot (cache: 'no-cache' in background.js). Returns the headers."""
+        with self._lock:
+            etag = self._http.get(path, ("", 0.0))[0]
+        status, headers, _ = self.client.request("GET", path, headers={"If-None-Match": etag} if etag else None)
+        if status in (200, 304) and headers.get("etag"):
+            with self._lock:
+                self._http[path] = (headers["etag"], 0.0)
+        return headers
+
+
+def run_visits(client: Client, pool: ThreadPoolExecutor, args, deadline: float, seed: int, counter) -> None:
+    rng = random.Random(seed)
+    corpus = build_corpus()
+    pages = Popularity(corpus, args.skew, rng)
+    links = Popularity(corpus[::-1], args.skew, rng)
+    browser = Browser(client, args)
+    while time.monotonic() < deadline and next(counter) < args.visits:
+        url = pages.pick()
+        browser.sync_lists()
+        burst = [pool.submit(browser.check_url, url) for _ in range(BURST)]
+        for f in burst:
+            f.result()
+        if rng.random() < args.popup_rate:
+            client.request("GET", "/")
+            client.request("POST", "/api/check-url", {"url": url})
+            page_links = [links.pick() for _ in range(rng.randint(5, 50))][:MAX_SCAN_LINKS]
+            if args.popup_mode == "stream":
+                client.request("POST", "/api/check-urls/stream", {"urls": list(dict.fromkeys(page_links))})
+            elif args.popup_mode == "batch":
+                client.request("POST", "/api/check-urls", {"urls": page_links})
+            else:
+                for f in [pool.submit(client.request, "POST", "/api/check-url", {"url": u}) for u in page_links]:
+                    f.result()
+        if rng.random() < args.report_rate:
+            client.request("POST", "/api/report-url", {"url": url})
+        if args.think_ms:
+            time.sleep(rng.uniform(0, 2 * args.think_ms) / 1000.0)
+
+
+def run_replay(client: Client, pool: ThreadPoolExecutor, args, deadline: float) -> None:
+    with open(args.replay, "r", encoding="utf-8") as f:
+        entries = [json.loads(line) for line in f if line.strip()]
+    start = time.monotonic()
+    pending = []
+    for entry in entries:
+        if time.monotonic() >= deadline:
+            break
+        if args.replay_timing and "t" in entry:
+            delay = start + float(entry["t"]) / args.speed - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        pending.append(pool.submit(client.request, entry.get("method", "POST"), entry["path"], entry.get("body"),
+                                   entry.get("headers")))
+        if len(pending) >= args.concurrency * 4:
+            pending = [p for p in pending if not p.done()]
+            if len(pending) >= args.concurrency * 4:
+                pending.pop(0).result()
+    for p in pending:
+        p.result()
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, max(0, int(round(q / 100.0 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[k]
+
+
+def summarize(recorder: Recorder, elapsed: float) -> Dict[str, Dict]:
+    summary = {}
+    all_latencies: List[float] = []
+    total_errors = 0
+    for endpoint, values in sorted(recorder.latencies.items()):
+        values = sorted(values)
+        all_latencies += values
+        errors = recorder.errors.get(endpoint, 0)
+        total_errors += errors
+        summary[endpoint] = _stats(values, errors, elapsed)
+    summary["ALL"] = _stats(sorted(all_latencies), total_errors, elapsed)
+    return summary
+
+
+def _stats(values: List[float], errors: int, elapsed: float) -> Dict:
+    n = len(values)
+    return {
+        "requests": n,
+        "rps": n / elapsed if elapsed > 0 else 0.0,
+        "p50_ms": _percentile(values, 50) * 1000,
+        "p95_ms": _percentile(values, 95) * 1000,
+        "p99_ms": _percentile(values, 99) * 1000,
+        "max_ms": (values[-1] * 1000) if values else 0.0,
+        "error_rate": errors / n if n else 0.0,
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def spawn_backend(workers: int, timeout: float):
+    port = _free_port()
+    proc = subprocess.Popen(
+        [sys.executable, os.path.join(SCRIPTS_DIR, "serve_memory_backend.py"), "--port", str(port),
+         "--workers", str(workers)],
+        env=dict(os.environ, MONGO_URI=""),
+    )
+    target = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise SystemExit("❌ Backend exited during startup")
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+            conn.request("GET", "/readyz")
+            if conn.getresponse().status == 200:
+                return proc, target
+        except OSError:
+            pass
+        time.sleep(0.2)
+    proc.terminate()
+    raise SystemExit(f"❌ Backend not ready after {timeout:.0f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay the extension's traffic pattern against the backend")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--target", help="Base URL of a running backend, e.g. http://127.0.0.1:8000")
+    target.add_argument("--spawn", action="store_true", help="Start a local backend with in-memory Mongo stand-ins")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers for --spawn (default: 1)")
+    parser.add_argument("--concurrency", type=int, default=16, help="Virtual users (default: 16)")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to run (default: 30)")
+    parser.add_argument("--visits", type=int, default=10 ** 12, help="Stop after this many page visits")
+    parser.add_argument("--popup-rate", type=float, default=0.3, help="Share of visits that open the popup")
+    parser.add_argument("--popup-mode", choices=["stream", "batch", "per-link"], default="stream",
+                        help="Link scan as one check-urls/stream call (the popup), one check-urls call or one "
+                             "check-url per link")
+    parser.add_argument("--report-rate", type=float, default=0.01, help="Share of visits that report the URL")
+    parser.add_argument("--skew", type=float, default=1.1, help="Zipf exponent for URL popularity (0 = uniform)")
+    parser.add_argument("--delta-seconds", type=float, default=600.0,
+                        help="Blacklist delta sync interval per user (background.js: 600)")
+    parser.add_argument("--snapshot-seconds", type=float, default=86400.0,
+                        help="Blacklist snapshot revalidation interval per user (background.js: 86400)")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="Mean pause between a user's visits")
+    parser.add_argument("--replay", help="Replay a recorded JSONL request log instead of synthetic visits")
+    parser.add_argument("--replay-timing", action="store_true", help="Honour the log's \"t\" offsets")
+    parser.add_argument("--speed", type=float, default=1.0, help="Replay speed-up factor with --replay-timing")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", default="", help="Write the summary as JSON here")
+    args = parser.parse_args()
+
+    proc = None
+    if args.spawn:
+        print(f"🚀 Starting backend with {args.workers} worker(s)...", file=sys.stderr)
+        proc, base_url = spawn_backend(args.workers, timeout=120.0)
+    else:
+        base_url = args.target
+
+    recorder = Recorder()
+    client = Client(base_url, recorder, args.timeout)
+    # Bursts and per-link scans need extra in-flight requests beyond one per user
+    pool = ThreadPoolExecutor(max_workers=args.concurrency * 4, thread_name_prefix="load")
+    print(f"🔥 {args.concurrency} users against {base_url} for {args.duration:g}s", file=sys.stderr)
+    started = time.monotonic()
+    deadline = started + args.duration
+    try:
+        if args.replay:
+            run_replay(client, pool, args, deadline)
+        else:
+            counter = itertools.count()
+            users = [threading.Thread(target=run_visits, args=(client, pool, args, deadline, args.seed + i, counter))
+                     for i in range(args.concurrency)]
+            for u in users:
+                u.start()
+            for u in users:
+                u.join()
+    finally:
+        elapsed = time.monotonic() - started
+        pool.shutdown(wait=True)
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=15)
+
+    summary = summarize(recorder, elapsed)
+    print(f"\n{'endpoint':<30} {'requests':>9} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for endpoint, s in summary.items():
+        print(f"{endpoint:<30} {s['requests']:>9} {s['rps']:>9.1f} {s['p50_ms']:>8.2f} {s['p95_ms']:>8.2f} "
+              f"{s['p99_ms']:>8.2f} {s['error_rate'] * 100:>6.2f}%")
+    result = {"elapsed_seconds": elapsed, "concurrency": args.concurrency, "endpoints": summary}
+    if args.spawn:
+        rps = summary["ALL"]["rps"]
+        result.update(workers=args.workers, cpu_count=os.cpu_count(),
+                      rps_per_worker=rps / args.workers, rps_per_core=rps / (os.cpu_count() or 1))
+        print(f"\n📈 {rps:.1f} req/s total, {result['rps_per_worker']:.1f} per worker, "
+              f"{result['rps_per_core']:.1f} per core ({os.cpu_count()} cores)")
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        sys.exit(130)
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Compare per-worker memory of `uvicorn app:app --workers N` with and without
+SHARED_MEMORY.
+
+For each mode the server is started on a free port, /readyz is polled until
+the model is warm, and every worker's RSS and PSS (shared pages split
+between the processes mapping them) are read from /proc. PSS is the number
+that shows sharing; RSS counts shared pages in every worker. Linux only.
+
+Usage:
+  python3 backend/scripts/measure_worker_rss.py [--workers 4] [--modes private shared]
+"""
+import argparse
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from typing import Dict, List
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODES = {
+    "private": {"SHARED_MEMORY": "0", "FAST_START": "0"},
+    "shared": {"SHARED_MEMORY": "1", "FAST_START": "0"},
+}
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _children(pid: int) -> List[int]:
+    kids = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "r") as f:
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+        if ppid == pid:
+            kids.append(int(entry))
+    return kids
+
+
+def _memory(pid: int) -> Dict[str, int]:
+    result = {}
+    with open(f"/proc/{pid}/smaps_rollup", "r") as f:
+        for line in f:
+            key, _, rest = line.partition(":")
+            if key in ("Rss", "Pss"):
+                result[key.lower()] = int(rest.split()[0]) * 1024
+    return result
+
+
+def _wait_ready(port: int, workers: int, timeout: float) -> None:
+    # Each request lands on some worker; keep polling until several 200s in a row
+    deadline = time.monotonic() + timeout
+    ok = 0
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/readyz", timeout=2) as resp:
+                ok = ok + 1 if resp.status == 200 else 0
+        except Exception:
+            ok = 0
+        if ok >= workers * 3:
+            return
+        time.sleep(0.2)
+    raise SystemExit(f"❌ Server on port {port} not ready after {timeout:.0f}s")
+
+
+def measure(mode: str, workers: int, timeout: float) -> List[Dict[str, int]]:
+    port = _free_port()
+    env = dict(os.environ, **MODES[mode])
+    env.setdefault("MONGO_URI", "")
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env,
+    )
+    try:
+        _wait_ready(port, workers, timeout)
+        time.sleep(1.0)
+        # uvicorn's supervisor forks the workers (multiprocessing may add a resource tracker)
+        pids = [pid for pid in _children(proc.pid) if os.path.exists(f"/proc/{pid}/smaps_rollup")]
+        return [dict(pid=pid, **_memory(pid)) for pid in pids]
+    finally:
+        proc.send_signal(signal.SIGINT)
+        try:
+            proc.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure per-worker RSS/PSS with and without SHARED_MEMORY")
+    parser.add_argument("--workers", type=int, default=4, help="uvicorn worker count (default: 4)")
+    parser.add_argument("--modes", nargs="+", default=list(MODES), choices=list(MODES))
+    parser.add_argument("--timeout", type=float, default=120.0, help="Seconds to wait for readiness")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    if not os.path.exists("/proc/self/smaps_rollup"):
+        raise SystemExit("❌ /proc/<pid>/smaps_rollup is required (Linux 4.14+)")
+
+    results = {}
+    for mode in args.modes:
+        print(f"🚀 Starting {args.workers} workers ({mode})...", file=sys.stderr)
+        results[mode] = measure(mode, args.workers, args.timeout)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    mb = 2 ** 20
+    for mode, workers in results.items():
+        print(f"\n📊 {mode}")
+        for w in workers:
+            print(f"   pid {w['pid']:>7}: RSS {w['rss'] / mb:7.1f} MB   PSS {w['pss'] / mb:7.1f} MB")
+        print(f"   total      RSS {sum(w['rss'] for w in workers) / mb:7.1f} MB   "
+              f"PSS {sum(w['pss'] for w in workers) / mb:7.1f} MB")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        sys.exit(130)
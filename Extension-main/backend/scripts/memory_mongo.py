@@ -0,0 +1,107 @@
+"""
+In-process stand-in for the small part of pymongo the backend uses, for
+benchmarks and load tests that should not depend on a database.
+
+Supports find / find_one (equality, $or, $in, $gt, $regex with "i"),
+cursor sort, insert_one / insert_many, update_one with $set /
+$setOnInsert and upsert, count_documents and create_index (no-op). Writes
+take a lock; reads scan a snapshot of the document list.
+"""
+import re
+import threading
+from types import SimpleNamespace
+from typing import Dict, Iterable, List, Optional
+
+from bench_corpus import blacklist_urls
+from host_index import reverse_host
+
+
+class _Cursor(list):
+    def sort(self, key, direction=1):
+        return _Cursor(sorted(self, key=lambda d: d[key], reverse=direction < 0))
+
+    def limit(self, n):
+        return _Cursor(self[:n]) if n else self
+
+
+def _matches(doc: Dict, query: Dict) -> bool:
+    for key, cond in query.items():
+        if key == "$or":
+            if not any(_matches(doc, q) for q in cond):
+                return False
+            continue
+        value = doc.get(key)
+        if isinstance(cond, dict):
+            if "$regex" in cond:
+                flags = re.IGNORECASE if "i" in cond.get("$options", "") else 0
+                if not isinstance(value, str) or not re.search(cond["$regex"], value, flags):
+                    return False
+            if "$gt" in cond and (value is None or not value > cond["$gt"]):
+                return False
+            if "$in" in cond and value not in cond["$in"]:
+                return False
+        elif value != cond:
+            return False
+    return True
+
+
+class MemoryCollection:
+    def __init__(self, docs: Iterable[Dict] = ()):
+        self.docs: List[Dict] = []
+        self._next_id = 1
+        self._lock = threading.Lock()
+        for doc in docs:
+            self.insert_one(doc)
+
+    def find(self, query: Optional[Dict] = None, projection: Optional[Dict] = None) -> _Cursor:
+        return _Cursor(d for d in list(self.docs) if _matches(d, query or {}))
+
+    def find_one(self, query: Optional[Dict] = None, projection: Optional[Dict] = None) -> Optional[Dict]:
+        return next((d for d in list(self.docs) if _matches(d, query or {})), None)
+
+    def count_documents(self, query: Dict) -> int:
+        return len(self.find(query))
+
+    def create_index(self, *args, **kwargs) -> str:
+        return ""
+
+    def insert_one(self, doc: Dict):
+        with self._lock:
+            doc = dict(doc)
+            if "_id" not in doc:
+                doc["_id"] = self._next_id
+                self._next_id += 1
+            self.docs.append(doc)
+        return SimpleNamespace(inserted_id=doc["_id"])
+
+    def insert_many(self, docs: Iterable[Dict], ordered: bool = True):
+        return SimpleNamespace(inserted_ids=[self.insert_one(d).inserted_id for d in docs])
+
+    def update_one(self, query: Dict, update: Dict, upsert: bool = False):
+        with self._lock:
+            doc = next((d for d in self.docs if _matches(d, query)), None)
+            if doc is not None:
+                doc.update(update.get("$set", {}))
+                return SimpleNamespace(matched_count=1, modified_count=1, upserted_id=None)
+        if not upsert:
+            return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=None)
+        new = {k: v for k, v in query.items() if not k.startswith("$") and not isinstance(v, dict)}
+        new.update(update.get("$setOnInsert", {}))
+        new.update(update.get("$set", {}))
+        return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=self.insert_one(new).inserted_id)
+
+
+def seeded_collections(host_of) -> Dict[str, MemoryCollection]:
+    """
+    reports/whitelist/blacklist stand-ins. Every other blacklist.txt URL is
+    listed, so corpus traffic mixes list hits and model calls.
+    """
+    def doc(url: str) -> Dict:
+        host = host_of(url)
+        return {"url": url, "host": host, "rhost": reverse_host(host)}
+
+    return {
+        "reports": MemoryCollection(),
+        "whitelist": MemoryCollection(doc(f"https://{h}") for h in ("example.com", "docs.python.org")),
+        "blacklist": MemoryCollection(doc(u) for u in blacklist_urls()[::2]),
+    }
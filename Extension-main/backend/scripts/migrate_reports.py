@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Move the old backend/reports.json (a JSON array rewritten on every report)
+into the append-only reports.jsonl the backend writes without Mongo.
+
+The old file is renamed to reports.json.migrated. Run it once, with the
+backend stopped; the backend itself no longer reads reports.json.
+
+Usage: python3 migrate_reports.py [--json backend/reports.json] [--jsonl backend/reports.jsonl]
+"""
+import argparse
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import config as cfg  # noqa: E402
+from report_sink import migrate_json_array  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move reports.json into reports.jsonl")
+    parser.add_argument("--json", default=os.path.join(BACKEND_DIR, "reports.json"), help="Old JSON array file")
+    parser.add_argument(
+        "--jsonl",
+        default=cfg.REPORTS_FILE or os.path.join(BACKEND_DIR, "reports.jsonl"),
+        help="JSONL file the backend appends reports to (default: REPORTS_FILE or backend/reports.jsonl)",
+    )
+    args = parser.parse_args()
+
+    if not os.path.exists(args.json):
+        print(f"✅ Nothing to migrate: {args.json} does not exist")
+        return
+    try:
+        moved = migrate_json_array(args.json, args.jsonl)
+    except (OSError, ValueError) as e:
+        print(f"❌ Could not migrate {args.json}: {e}")
+        sys.exit(1)
+    print(f"📦 Migrated {moved} reports from {args.json} to {args.jsonl}")
+    print(f"   Old file renamed to {args.json}.migrated")
+
+
+if __name__ == "__main__":
+    main()
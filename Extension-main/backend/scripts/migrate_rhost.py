@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Backfill the reversed-host `rhost` key on whitelist/blacklist documents and
+create its unique index.
+
+Documents without `rhost` get it from their `host` (or `url`) in unordered
+bulk batches. Documents that end up sharing an `rhost` are merged: the most
+recently imported one is kept and the others are deleted. Documents with no
+usable host are left without a key (the index is partial, so they do not
+collide) and reported.
+
+Usage: python3 migrate_rhost.py [--collections whitelist blacklist] [--batch-size 5000] [--dry-run]
+"""
+import argparse
+import os
+import sys
+from datetime import datetime
+from typing import Dict
+
+from pymongo import DeleteOne, UpdateOne
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from bulk_import import DEFAULT_BATCH_SIZE, get_db  # noqa: E402
+from host_index import RHOST_INDEX_OPTIONS, doc_host, reverse_host  # noqa: E402
+
+
+def backfill(coll, batch_size: int, dry_run: bool) -> Dict[str, int]:
+    counts = {"updated": 0, "no_host": 0}
+    pending = []
+    cursor = coll.find({"rhost": {"$exists": False}}, {"host": 1, "url": 1})
+    for doc in cursor:
+        host = doc_host(doc)
+        if not host:
+            counts["no_host"] += 1
+            continue
+        counts["updated"] += 1
+        pending.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"host": host, "rhost": reverse_host(host)}}))
+        if len(pending) >= batch_size:
+            if not dry_run:
+                coll.bulk_write(pending, ordered=False)
+            pending = []
+    if pending and not dry_run:
+        coll.bulk_write(pending, ordered=False)
+    return counts
+
+
+def merge_duplicates(coll, batch_size: int, dry_run: bool) -> int:
+    """Delete all but the newest document per `rhost`; returns how many were (or would be) deleted."""
+    groups = coll.aggregate([
+        {"$match": {"rhost": {"$type": "string"}}},
+        {"$sort": {"imported_at": -1, "_id": -1}},
+        {"$group": {"_id": "$rhost", "ids": {"$push": "$_id"}, "n": {"$sum": 1}}},
+        {"$match": {"n": {"$gt": 1}}},
+    ], allowDiskUse=True)
+    deleted = 0
+    pending = []
+    for group in groups:
+        for _id in group["ids"][1:]:
+            deleted += 1
+            pending.append(DeleteOne({"_id": _id}))
+        if len(pending) >= batch_size:
+            if not dry_run:
+                coll.bulk_write(pending, ordered=False)
+            pending = []
+    if pending and not dry_run:
+        coll.bulk_write(pending, ordered=False)
+    return deleted
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill rhost keys and create the unique rhost index")
+    parser.add_argument("--collections", nargs="*", default=["whitelist", "blacklist"],
+                        help="Collections to migrate (default: whitelist blacklist)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f"Writes per bulk_write (default: {DEFAULT_BATCH_SIZE})")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would change without writing")
+    args = parser.parse_args()
+
+    db = get_db()
+    started = datetime.utcnow()
+    for name in args.collections:
+        coll = db[name]
+        print(f"📂 {name}" + (" (dry run)" if args.dry_run else ""))
+        counts = backfill(coll, args.batch_size, args.dry_run)
+        print(f"   Backfilled: {counts['updated']:,}")
+        if counts["no_host"]:
+            print(f"   ⚠️  No usable host (left unkeyed): {counts['no_host']:,}")
+        if args.dry_run:
+            # Keys are not written in a dry run, so duplicates can only be counted on
+            # documents that already have one
+            print("   Duplicates: checked on existing keys only")
+        deleted = merge_duplicates(coll, args.batch_size, args.dry_run)
+        print(f"   Duplicates removed: {deleted:,}")
+        if not args.dry_run:
+            coll.create_index("rhost", **RHOST_INDEX_OPTIONS)
+            print("   ✅ Unique rhost index ready")
+
+    print(f"\n✅ Done in {(datetime.utcnow() - started).total_seconds():.1f}s")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        sys.exit(130)
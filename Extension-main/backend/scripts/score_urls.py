@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Offline bulk scoring: run the /api/check-url decision logic over large URL
+files (proxy/DNS logs) without going through HTTP.
+
+Input is streamed from files, gzip files (*.gz) or stdin ("-") and cut into
+chunks. Each chunk is scored in a process pool with the same rules as the
+API: whitelist/blacklist index lookups, trusted patterns, the serving model
+(compiled forest when available, else the sklearn pipeline) and the
+smart_whitelist adjustments / risk mapping from scoring.py. Verdicts are
+written in input order as JSONL or CSV; at most 2 chunks per worker are in
+flight, so memory stays bounded however large the input is.
+
+Lists come from Mongo (MONGO_URI) unless --no-mongo is given; --blacklist /
+--whitelist add TXT files (one URL or host per line).
+
+Usage:
+  python3 backend/scripts/score_urls.py access.log.gz --field 7 -o verdicts.jsonl --workers 8
+  zcat urls.gz | python3 backend/scripts/score_urls.py - --format csv > verdicts.csv
+"""
+import argparse
+import csv
+import gzip
+import io
+import json
+import os
+import sys
+import time
+import warnings
+from collections import Counter, deque
+from itertools import islice
+from multiprocessing import Pool
+from typing import Dict, Iterator, List, Optional
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ML_DIR = os.path.join(os.path.dirname(BACKEND_DIR), "Machine-Learning-main")
+sys.path.insert(0, BACKEND_DIR)
+
+import config as cfg  # noqa: E402
+import host_index  # noqa: E402
+import scoring  # noqa: E402
+import smart_whitelist  # noqa: E402
+from features import FeatureExtractor  # noqa: E402
+
+MODEL_PATH = os.path.join(ML_DIR, "phishing_detector_model.pkl")
+FEATURES_PATH = os.path.join(ML_DIR, "feature_names.json")
+COMPILED_MODEL_PATH = getattr(cfg, "COMPILED_MODEL_PATH", "") or os.path.join(ML_DIR, "phishing_detector_model.compiled")
+
+CSV_FIELDS = ["url", "risk", "score", "reasons", "model_version", "error"]
+
+# Per-process state, set up by _init_worker
+_model = None
+_pipeline = None  # sklearn pipeline: the serving model, or loaded for the label fallback
+_model_version = scoring.MODEL_VERSION
+_extractor = None
+_whitelist = None
+_blacklist = None
+
+
+def _init_worker(whitelist_hashes, blacklist_hashes, use_compiled: bool) -> None:
+    global _model, _pipeline, _model_version, _extractor, _whitelist, _blacklist
+    with open(FEATURES_PATH, "r") as f:
+        feature_names = json.load(f).get("feature_names", [])
+    _extractor = FeatureExtractor(feature_names)
+    # Memory-mapped, so pool workers share the compiled arrays
+    _model = scoring.load_compiled_model(COMPILED_MODEL_PATH, MODEL_PATH, feature_names, mmap=True) if use_compiled else None
+    _model_version = scoring.model_version(MODEL_PATH, _model)
+    if _model is None:
+        _model = _get_pipeline()
+    warnings.filterwarnings("ignore", message="X does not have valid feature names", category=UserWarning)
+    if getattr(cfg, "TRUSTED_SUFFIXES_FILE", ""):
+        smart_whitelist.load_trusted_suffixes(cfg.TRUSTED_SUFFIXES_FILE)
+    _whitelist = host_index.HostIndex.from_hashes(
+        "whitelist", whitelist_hashes, match_parents=getattr(cfg, "WHITELIST_MATCH_PARENTS", False))
+    _blacklist = host_index.HostIndex.from_hashes(
+        "blacklist", blacklist_hashes, match_parents=getattr(cfg, "BLACKLIST_MATCH_PARENTS", True))
+
+
+def _get_pipeline():
+    global _pipeline
+    if _pipeline is None:
+        import joblib
+        _pipeline = joblib.load(MODEL_PATH)
+    return _pipeline
+
+
+def _predict(urls: List[str]) -> List[float]:
+    X = _extractor.matrix(urls)
+    # Same fallback as the API: labels from the sklearn pipeline if predict_proba fails
+    try:
+        return [float(p[1]) for p in _model.predict_proba(X)]
+    except Exception:
+        return [1.0 if int(label) == 1 else 0.0 for label in _get_pipeline().predict(X)]
+
+
+def score_chunk(urls: List[str]) -> List[Dict]:
+    """Verdicts for `urls` in order, as /api/check-urls would return them."""
+    version = _model_version
+    results: Dict[str, Dict] = {}
+    to_score: List[str] = []
+    for url in dict.fromkeys(urls):
+        try:
+            host = scoring.host_of(url)
+        except ValueError as e:
+            results[url] = {"error": str(e)}
+            continue
+        if host and _whitelist.contains(host):
+            results[url] = scoring.list_verdict("whitelist", version)
+        elif host and _blacklist.contains(host):
+            results[url] = scoring.list_verdict("blacklist", version)
+        else:
+            verdict = scoring.trusted_verdict(smart_whitelist.check_trusted_host(host), version)
+            if verdict is None:
+                to_score.append(url)
+            else:
+                results[url] = verdict
+    if to_score:
+        for url, proba in zip(to_score, _predict(to_score)):
+            results[url] = scoring.model_verdict(url, proba, (False, ""), version)
+    return [{"url": url, **results[url]} for url in urls]
+
+
+def _open_input(path: str):
+    if path == "-":
+        return io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8", errors="replace")
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", errors="replace")
+    return open(path, "r", encoding="utf-8", errors="replace")
+
+
+def iter_urls(paths: List[str], field: int = 0, prefix_scheme: Optional[str] = None) -> Iterator[str]:
+    """URLs from every input, one per non-blank, non-comment line (or its `field`-th column)."""
+    for path in paths:
+        with _open_input(path) as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                if field:
+                    parts = line.split()
+                    if len(parts) < field:
+                        continue
+                    line = parts[field - 1]
+                if prefix_scheme and "://" not in line:
+                    line = f"{prefix_scheme}://{line}"
+                yield line
+
+
+def iter_chunks(urls: Iterator[str], size: int) -> Iterator[List[str]]:
+    while True:
+        chunk = list(islice(urls, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _load_list_hashes(args):
+    """Sorted host hashes for (whitelist, blacklist) from Mongo and/or TXT files."""
+    sources = {"whitelist": args.whitelist, "blacklist": args.blacklist}
+    result = []
+    db = None
+    if not args.no_mongo and os.getenv("MONGO_URI", ""):
+        from pymongo import MongoClient
+        mongo_uri = os.environ["MONGO_URI"]
+        client = MongoClient(mongo_uri)
+        db = client.get_default_database() if "/" in mongo_uri.split("?")[0] else client["phishshield"]
+    for name in ("whitelist", "blacklist"):
+        index = host_index.HostIndex(name)
+        hosts = []
+        if db is not None:
+            index.load_from(db[name])
+        for path in sources[name] or []:
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                hosts += [host_index.doc_host({"url": line.strip()}) for line in f
+                          if line.strip() and not line.startswith("#")]
+        index.add(hosts)
+        print(f"📋 {name}: {len(index):,} hosts", file=sys.stderr)
+        result.append(index.hashes())
+    return result
+
+
+class _Writer:
+    def __init__(self, out, fmt: str):
+        self.out = out
+        self.fmt = fmt
+        self.csv = None
+        if fmt == "csv":
+            self.csv = csv.DictWriter(out, fieldnames=CSV_FIELDS, extrasaction="ignore")
+            self.csv.writeheader()
+
+    def write(self, rows: List[Dict]) -> None:
+        if self.csv is not None:
+            for row in rows:
+                self.csv.writerow(dict(row, reasons=";".join(row.get("reasons", []))))
+        else:
+            self.out.write("".join(json.dumps(row) + "\n" for row in rows))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score URLs from files/logs with the check-url logic")
+    parser.add_argument("inputs", nargs="+", help="Input files (.gz supported) or - for stdin")
+    parser.add_argument("-o", "--output", default="-", help="Output file (.gz supported), default stdout")
+    parser.add_argument("--format", choices=["jsonl", "csv"], default="jsonl")
+    parser.add_argument("--field", type=int, default=0,
+                        help="Take the URL from this 1-based whitespace-separated column (default: whole line)")
+    parser.add_argument("--prefix-scheme", default=None,
+                        help="Prefix scheme-less entries (e.g. DNS names) with SCHEME://")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Scoring processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=2000, help="URLs per task (default: 2000)")
+    parser.add_argument("--whitelist", action="append", help="Extra whitelist TXT file (repeatable)")
+    parser.add_argument("--blacklist", action="append", help="Extra blacklist TXT file (repeatable)")
+    parser.add_argument("--no-mongo", action="store_true", help="Do not load lists from MONGO_URI")
+    parser.add_argument("--sklearn", action="store_true", help="Score with the sklearn pipeline instead of the compiled model")
+    args = parser.parse_args()
+
+    init_args = (*_load_list_hashes(args), not args.sklearn)
+    workers = max(args.workers, 1)
+
+    if args.output == "-":
+        out = sys.stdout
+    elif args.output.endswith(".gz"):
+        out = gzip.open(args.output, "wt", encoding="utf-8", newline="")
+    else:
+        out = open(args.output, "w", encoding="utf-8", newline="")
+    writer = _Writer(out, args.format)
+
+    risks: Counter = Counter()
+    total = 0
+    started = time.perf_counter()
+    last_progress = started
+
+    def emit(rows: List[Dict]) -> None:
+        nonlocal total, last_progress
+        writer.write(rows)
+        total += len(rows)
+        risks.update(row.get("risk", "error") for row in rows)
+        now = time.perf_counter()
+        if now - last_progress >= 5.0:
+            last_progress = now
+            rate = total / (now - started)
+            print(f"⏳ {total:,} URLs, {rate:,.0f} URLs/s ({rate / workers:,.0f}/s per core)", file=sys.stderr, flush=True)
+
+    chunks = iter_chunks(iter_urls(args.inputs, args.field, args.prefix_scheme), args.chunk_size)
+    try:
+        if workers == 1:
+            _init_worker(*init_args)
+            for chunk in chunks:
+                emit(score_chunk(chunk))
+        else:
+            with Pool(workers, initializer=_init_worker, initargs=init_args) as pool:
+                # Pool.imap would read the whole input ahead; keep a bounded window instead
+                pending: deque = deque()
+                for chunk in chunks:
+                    pending.append(pool.apply_async(score_chunk, (chunk,)))
+                    if len(pending) >= workers * 2:
+                        emit(pending.popleft().get())
+                while pending:
+                    emit(pending.popleft().get())
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    elapsed = time.perf_counter() - started
+    rate = total / elapsed if elapsed > 0 else 0.0
+    print("\n" + "=" * 60, file=sys.stderr)
+    print(f"✅ Scored {total:,} URLs in {elapsed:.1f}s", file=sys.stderr)
+    print(f"   {rate:,.0f} URLs/s with {workers} worker(s) = {rate / workers:,.0f} URLs/s per core", file=sys.stderr)
+    for risk, count in risks.most_common():
+        print(f"   {risk}: {count:,}", file=sys.stderr)
+    print("=" * 60, file=sys.stderr)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        sys.exit(130)
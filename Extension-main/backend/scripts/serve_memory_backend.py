@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Run the backend under uvicorn with in-process Mongo stand-ins
+(memory_mongo.py) instead of a database, for local load tests.
+
+Each worker process gets its own seeded stand-in, so writes made through
+one worker are not visible to the others.
+
+Usage:
+  python3 backend/scripts/serve_memory_backend.py --port 8000 --workers 2
+"""
+import argparse
+import os
+import sys
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(SCRIPTS_DIR)
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, SCRIPTS_DIR)
+
+os.environ["MONGO_URI"] = ""
+
+import app as backend  # noqa: E402
+from memory_mongo import seeded_collections  # noqa: E402
+
+_colls = seeded_collections(backend._host_of)
+backend._reports_coll = _colls["reports"]
+backend._whitelist_coll = _colls["whitelist"]
+backend._blacklist_coll = _colls["blacklist"]
+
+app = backend.app
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Serve the backend with in-memory Mongo stand-ins")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+    # Multiple workers need an import string; each worker re-imports this module
+    target = app if args.workers == 1 else "serve_memory_backend:app"
+    uvicorn.run(target, host=args.host, port=args.port, workers=args.workers,
+                app_dir=SCRIPTS_DIR, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
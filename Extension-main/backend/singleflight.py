@@ -0,0 +1,91 @@
+"""
+Coalescing of identical in-flight computations ("singleflight").
+
+The first caller for a key runs the computation; callers arriving with the
+same key before it finishes wait for that result instead of starting their
+own. The key is released as soon as the computation ends, successful or
+not, so a failure is handed to the callers that were already waiting and
+never reused by later ones.
+
+Sync callers (threadpool endpoints) and async callers (event loop) share
+one table, so a duplicate can join a flight started by either kind. An
+async computation runs as its own task, shielded from its leader: if the
+client that started it disconnects, the callers waiting on it still get
+the result.
+"""
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Awaitable, Callable, Dict, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.leaders = 0
+        self.coalesced = 0
+        self._calls: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def _join(self, key: str) -> Tuple[Future, bool]:
+        """(future for `key`, whether this caller has to compute it)."""
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future, False
+            future = Future()
+            self._calls[key] = future
+            self.leaders += 1
+            return future, True
+
+    def _finish(self, key: str, future: Future, result=None, error: BaseException = None) -> None:
+        with self._lock:
+            self._calls.pop(key, None)
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def do(self, key: str, fn: Callable[[], T]) -> T:
+        if not self.enabled:
+            return fn()
+        future, leader = self._join(key)
+        if not leader:
+            return future.result()
+        try:
+            result = fn()
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, result)
+        return result
+
+    async def do_async(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        if not self.enabled:
+            return await fn()
+        future, leader = self._join(key)
+        if not leader:
+            return await asyncio.wrap_future(future)
+        task = asyncio.ensure_future(fn())
+        task.add_done_callback(lambda t: self._finish_task(key, future, t))
+        return await asyncio.shield(task)
+
+    def _finish_task(self, key: str, future: Future, task: "asyncio.Future") -> None:
+        if task.cancelled():
+            # Only when the loop itself is going away
+            with self._lock:
+                self._calls.pop(key, None)
+            future.cancel()
+        elif task.exception() is not None:
+            self._finish(key, future, error=task.exception())
+        else:
+            self._finish(key, future, task.result())
+
+    def stats(self) -> Dict:
+        return {"inflight": len(self._calls), "leaders": self.leaders, "coalesced": self.coalesced}
@@ -3,44 +3,112 @@
 Smart whitelist patterns to reduce false positives.
 """
 import re
-from typing import List, Tuple
+from functools import lru_cache
+from typing import List, Optional, Tuple
+from urllib.parse import urlparse
 
-# Trusted domain patterns
-TRUSTED_PATTERNS = [
-    # Developer platforms
-    (r'.*\.(github\.io|gitlab\.io|gitbook\.io)$', 'developer_platform'),
-    (r'.*\.(netlify\.app|vercel\.app|herokuapp\.com)$', 'hosting_platform'),
-    (r'.*\.(azurewebsites\.net|amazonaws\.com|cloudfront\.net)$', 'cloud_provider'),
-    (r'.*\.(firebaseapp\.com|web\.app|appspot\.com)$', 'google_cloud'),
-    
+try:
+    from .public_suffix import parse_host  # type: ignore
+except ImportError:
+    from public_suffix import parse_host  # type: ignore
+
+# Trusted domain suffixes, matched on hostname label boundaries
+# (e.g. "google.com" covers "google.com" and "mail.google.com", not "evilgoogle.com").
+# Free hosting platforms (github.io, netlify.app, herokuapp.com, web.app,
+# amazonaws.com, ...) are deliberately absent: anyone can register a
+# subdomain there, and trusted hosts never reach the model
+TRUSTED_SUFFIXES = [
     # Educational institutions
-    (r'.*\.(edu|edu\.vn|edu\.au|edu\.uk|ac\.uk|ac\.jp)$', 'educational'),
+    (('edu', 'edu.vn', 'edu.au', 'edu.uk', 'ac.uk', 'ac.jp'), 'educational'),
     
     # Government
-    (r'.*\.(gov|gov\.uk|gov\.au|gov\.vn|mil)$', 'government'),
+    (('gov', 'gov.uk', 'gov.au', 'gov.vn', 'mil'), 'government'),
     
     # Well-known tech companies & platforms
-    (r'.*(google|microsoft|apple|amazon|facebook|twitter|meta)\.com$', 'tech_giant'),
-    (r'.*(youtube|youtu\.be).*$', 'google_platform'),
-    (r'.*(instagram|whatsapp|messenger)\.com$', 'meta_platform'),
-    (r'.*(linkedin|github|gitlab|bitbucket)\.com$', 'professional_platform'),
-    (r'.*(netflix|spotify|twitch|discord|slack|zoom)\.com$', 'popular_service'),
-    (r'.*(reddit|quora|medium)\.com$', 'social_platform'),
-    (r'.*(paypal|stripe|visa|mastercard)\.com$', 'payment_service'),
-    (r'.*(dropbox|onedrive|icloud)\.com$', 'cloud_storage'),
-    (r'.*(adobe|canva|figma)\.com$', 'creative_tools'),
-    (r'.*(notion|trello|asana|monday)\.com$', 'productivity_tools'),
-    (r'.*(chatgpt|openai|anthropic|claude)\.com$', 'ai_platform'),
+    (('google.com', 'microsoft.com', 'apple.com', 'amazon.com', 'facebook.com', 'twitter.com', 'meta.com'), 'tech_giant'),
+    (('youtube.com', 'youtu.be'), 'google_platform'),
+    (('instagram.com', 'whatsapp.com', 'messenger.com'), 'meta_platform'),
+    (('linkedin.com', 'github.com', 'gitlab.com', 'bitbucket.com'), 'professional_platform'),
+    (('netflix.com', 'spotify.com', 'twitch.com', 'discord.com', 'slack.com', 'zoom.com'), 'popular_service'),
+    (('reddit.com', 'quora.com', 'medium.com'), 'social_platform'),
+    (('paypal.com', 'stripe.com', 'visa.com', 'mastercard.com'), 'payment_service'),
+    (('dropbox.com', 'onedrive.com', 'icloud.com'), 'cloud_storage'),
+    (('adobe.com', 'canva.com', 'figma.com'), 'creative_tools'),
+    (('notion.com', 'trello.com', 'asana.com', 'monday.com'), 'productivity_tools'),
+    (('chatgpt.com', 'openai.com', 'anthropic.com', 'claude.com'), 'ai_platform'),
     
     # Open source & community
-    (r'.*\.(mozilla\.org|wikipedia\.org|wikimedia\.org)$', 'open_source'),
-    (r'.*\.(stackoverflow\.com|stackexchange\.com)$', 'developer_community'),
+    (('mozilla.org', 'wikipedia.org', 'wikimedia.org'), 'open_source'),
+    (('stackoverflow.com', 'stackexchange.com'), 'developer_community'),
     
     # Security & research
-    (r'.*\.(virustotal\.com|hybrid-analysis\.com|urlscan\.io)$', 'security_research'),
-    (r'.*\.(shodan\.io|securitytrails\.com)$', 'security_tools'),
+    (('virustotal.com', 'hybrid-analysis.com', 'urlscan.io'), 'security_research'),
+    (('shodan.io', 'securitytrails.com'), 'security_tools'),
 ]
 
+
+class SuffixTrie:
+    """
+    Reversed-label trie of domain suffixes.
+
+    Lookup cost depends on the number of labels in the hostname, not on the
+    number of suffixes loaded, so thousands of operator-supplied entries
+    cost the same per request as the built-in list.
+    """
+
+    _CATEGORY = None  # node key holding the category; labels are never None
+
+    def __init__(self):
+        self._root = {}
+        self.size = 0
+
+    def add(self, suffix: str, category: str) -> None:
+        node = self._root
+        for label in reversed(suffix.lower().strip(".").split(".")):
+            node = node.setdefault(label, {})
+        if self._CATEGORY not in node:
+            # First registration wins, like the old first-matching pattern
+            node[self._CATEGORY] = category
+            self.size += 1
+
+    def match(self, hostname: str) -> Optional[str]:
+        """Category of the longest suffix of `hostname` in the trie, or None."""
+        node = self._root
+        category = None
+        for label in reversed(hostname.split(".")):
+            node = node.get(label)
+            if node is None:
+                break
+            category = node.get(self._CATEGORY, category)
+        return category
+
+
+_trusted_trie = SuffixTrie()
+for _suffixes, _category in TRUSTED_SUFFIXES:
+    for _suffix in _suffixes:
+        _trusted_trie.add(_suffix, _category)
+
+
+def load_trusted_suffixes(path: str, default_category: str = 'custom') -> int:
+    """
+    Add trusted suffixes from a text file, one per line: "suffix [category]".
+    Blank lines and lines starting with '#' are ignored.
+    
+    Returns:
+        Number of suffixes added
+    """
+    before = _trusted_trie.size
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            parts = line.split()
+            _trusted_trie.add(parts[0], parts[1] if len(parts) > 1 else default_category)
+    check_trusted_host.cache_clear()
+    return _trusted_trie.size - before
+
+
 # Suspicious TLDs (higher false positive risk but commonly used legitimately)
 LEGITIMATE_NEW_TLDS = [
     '.tech',  # Often used by developers
@@ -62,9 +130,26 @@ CONTEXT_KEYWORDS = {
 }
 
 
+@lru_cache(maxsize=65536)
+def check_trusted_host(hostname: str) -> Tuple[bool, str]:
+    """
+    Check if a hostname falls under a trusted suffix.
+    
+    Args:
+        hostname: Lowercase hostname (no scheme, port or path)
+        
+    Returns:
+        (is_trusted, reason)
+    """
+    category = _trusted_trie.match(hostname) if hostname else None
+    if category:
+        return True, f"trusted_pattern:{category}"
+    return False, ""
+
+
 def check_trusted_pattern(url: str) -> Tuple[bool, str]:
     """
-    Check if URL matches any trusted pattern.
+    Check if URL's hostname matches any trusted pattern.
     
     Args:
         url: URL to check
@@ -72,16 +157,54 @@ def check_trusted_pattern(url: str) -> Tuple[bool, str]:
     Returns:
         (is_trusted, reason)
     """
-    url_lower = url.lower()
+    try:
+        parsed = urlparse(url if '://' in url else f'http://{url}')
+        hostname = (parsed.hostname or "").lower()
+    except ValueError:
+        return False, ""
+    return check_trusted_host(hostname)
+
+
+def host_adjustments(hostname: str) -> Tuple[Tuple[float, str], ...]:
+    """
+    The hostname-only factors of adjust_score_for_context, as (factor, reason)
+    in the order they are applied. They depend on nothing but the host, so
+    callers can compute them once per host and pass them back in.
+    """
+    hostname = (hostname or "").lower()
+    factors = []
     
-    for pattern, category in TRUSTED_PATTERNS:
-        if re.match(pattern, url_lower, re.IGNORECASE):
-            return True, f"trusted_pattern:{category}"
+    # Check for subdomain context (labels left of the registrable domain,
+    # so "shop.co.uk" has none)
+    subdomains = parse_host(hostname).subdomains
+    if subdomains:
+        subdomain = subdomains[0]
+        if subdomain in CONTEXT_KEYWORDS:
+            # Subdomain might be legitimate (lab, dev, test, etc.)
+            factors.append((0.85, f"legitimate_subdomain:{subdomain}"))
     
-    return False, ""
+    # Check if using new TLD that's commonly legitimate
+    for tld in LEGITIMATE_NEW_TLDS:
+        if hostname.endswith(tld):
+            # Slightly reduce suspicion for these TLDs
+            factors.append((0.9, f"legitimate_tld:{tld}"))
+            break
+    
+    # Check for personal domains (name + surname patterns)
+    name_pattern = r'^[a-z]+[a-z]+\.'  # firstname+lastname pattern
+    if re.match(name_pattern, hostname):
+        # Might be personal website
+        factors.append((0.85, "personal_domain_pattern"))
+    
+    return tuple(factors)
 
 
-def adjust_score_for_context(url: str, base_score: float) -> Tuple[float, List[str]]:
+def adjust_score_for_context(
+    url: str,
+    base_score: float,
+    trusted: Optional[Tuple[bool, str]] = None,
+    host_factors: Optional[Tuple[Tuple[float, str], ...]] = None,
+) -> Tuple[float, List[str]]:
     """
     Adjust ML score based on contextual factors.
     Reduces false positives for legitimate-looking URLs.
@@ -89,6 +212,10 @@ def adjust_score_for_context(url: str, base_score: float) -> Tuple[float, List[s
     Args:
         url: URL to analyze
         base_score: ML model score (0-1, higher = more dangerous)
+        trusted: Result of check_trusted_pattern for this URL, if the caller
+            already has it
+        host_factors: Result of host_adjustments for this URL's host, if the
+            caller already has it
         
     Returns:
         (adjusted_score, reasons)
@@ -97,7 +224,7 @@ def adjust_score_for_context(url: str, base_score: float) -> Tuple[float, List[s
     adjusted_score = base_score
     
     # Check for trusted patterns first
-    is_trusted, reason = check_trusted_pattern(url)
+    is_trusted, reason = trusted if trusted is not None else check_trusted_pattern(url)
     if is_trusted:
         # Heavily discount score for trusted patterns
         adjusted_score *= 0.3
@@ -105,39 +232,20 @@ def adjust_score_for_context(url: str, base_score: float) -> Tuple[float, List[s
         return adjusted_score, adjustments
     
     # Parse URL components
-    from urllib.parse import urlparse
     parsed = urlparse(url)
-    hostname = (parsed.hostname or "").lower()
-    path = (parsed.path or "").lower()
     
     # Check for HTTPS (slight bonus)
     if parsed.scheme == 'https':
         adjusted_score *= 0.95
         adjustments.append("has_https")
     
-    # Check for subdomain context
-    parts = hostname.split('.')
-    if len(parts) > 2:
-        subdomain = parts[0]
-        if subdomain in CONTEXT_KEYWORDS:
-            # Subdomain might be legitimate (lab, dev, test, etc.)
-            adjusted_score *= 0.85
-            adjustments.append(f"legitimate_subdomain:{subdomain}")
-    
-    # Check if using new TLD that's commonly legitimate
-    for tld in LEGITIMATE_NEW_TLDS:
-        if hostname.endswith(tld):
-            # Slightly reduce suspicion for these TLDs
-            adjusted_score *= 0.9
-            adjustments.append(f"legitimate_tld:{tld}")
-            break
-    
-    # Check for personal domains (name + surname patterns)
-    name_pattern = r'^[a-z]+[a-z]+\.'  # firstname+lastname pattern
-    if re.match(name_pattern, hostname):
-        # Might be personal website
-        adjusted_score *= 0.85
-        adjustments.append("personal_domain_pattern")
+    # Subdomain, TLD and personal-domain factors, applied one at a time so the
+    # result is the same whether or not they were memoized
+    if host_factors is None:
+        host_factors = host_adjustments(parsed.hostname or "")
+    for factor, factor_reason in host_factors:
+        adjusted_score *= factor
+        adjustments.append(factor_reason)
     
     # If URL has no suspicious keywords
     suspicious_keywords = ['login', 'verify', 'secure', 'account', 'update', 
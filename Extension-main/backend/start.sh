@@ -16,6 +16,9 @@ fi
 # Set MongoDB URI
 export MONGO_URI="${MONGO_URI:-mongodb://localhost:27017/phishshield}"
 
+# Load the model in the background after the server is up (see /readyz)
+export FAST_START="${FAST_START:-1}"
+
 # Start server
 echo "🚀 Starting PhishShield Backend..."
 echo "   MongoDB: $MONGO_URI"
@@ -0,0 +1,151 @@
+"""
+Bounded LRU cache of check-url verdicts with per-entry TTL.
+
+Entries remember the host they were computed for and the model version
+that produced them, so list changes can evict a host (and its subdomains)
+and a model swap turns every older entry into a miss.
+
+Hosts are also indexed by registrable domain. Since list matching stops at
+the registrable domain (host_index.parent_hosts), a list change for a host
+only affects hosts under the same registrable domain, so evicting it does
+not scan the whole cache.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+try:
+    from .public_suffix import parse_host  # type: ignore
+except ImportError:
+    from public_suffix import parse_host  # type: ignore
+
+
+def domain_key(host: str) -> str:
+    """Registrable domain of `host`, or the host itself if it has none (public suffixes)."""
+    return parse_host(host).domain or host
+
+
+def affected_hosts(by_domain: Dict[str, set], host: str):
+    """Hosts in `by_domain` that a list change for `host` can affect: it and its subdomains."""
+    suffix = "." + host
+    return [h for h in by_domain.get(domain_key(host), ()) if h == host or h.endswith(suffix)]
+
+
+class VerdictCache:
+    def __init__(self, maxsize: int = 10000, ttl: float = 300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        # key -> (expires_at, host, model_version, verdict)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._by_host: Dict[str, set] = {}
+        # registrable domain -> hosts in _by_host
+        self._by_domain: Dict[str, set] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str, model_version: str) -> Optional[Dict]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, host, version, verdict = entry
+            if expires_at < time.monotonic() or version != model_version:
+                self._remove(key, host)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return verdict
+
+    def peek(self, key: str, model_version: str) -> Optional[Dict]:
+        """Like get(), but leaves hit/miss counters and LRU order alone."""
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic() or entry[2] != model_version:
+            return None
+        return entry[3]
+
+    def put(self, key: str, host: str, model_version: str, verdict: Dict) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._unlink_host(key, old[1])
+            self._entries[key] = (time.monotonic() + self.ttl, host, model_version, verdict)
+            keys = self._by_host.get(host)
+            if keys is None:
+                keys = self._by_host[host] = set()
+                self._by_domain.setdefault(domain_key(host), set()).add(host)
+            keys.add(key)
+            while len(self._entries) > self.maxsize:
+                old_key, old = self._entries.popitem(last=False)
+                self._unlink_host(old_key, old[1])
+                self.evictions += 1
+
+    def invalidate_host(self, host: str) -> int:
+        """Drop entries for `host` and any of its subdomains. Returns the number removed."""
+        host = (host or "").lower()
+        if not host:
+            return 0
+        removed = 0
+        with self._lock:
+            for h in affected_hosts(self._by_domain, host):
+                for key in list(self._by_host.get(h, ())):
+                    self._remove(key, h)
+                    removed += 1
+            self.invalidations += removed
+        return removed
+
+    def clear(self) -> None:
+        with self._lock:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+            self._by_host.clear()
+            self._by_domain.clear()
+
+    def stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / total) if total else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+    def _remove(self, key: str, host: str) -> None:
+        self._entries.pop(key, None)
+        self._unlink_host(key, host)
+
+    def _unlink_host(self, key: str, host: str) -> None:
+        keys = self._by_host.get(host)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_host[host]
+                self._unlink_domain(host)
+
+    def _unlink_domain(self, host: str) -> None:
+        domain = domain_key(host)
+        hosts = self._by_domain.get(domain)
+        if hosts is not None:
+            hosts.discard(host)
+            if not hosts:
+                del self._by_domain[domain]